@@ -0,0 +1 @@
+"""Performance benchmarks for the YouTube terminal simulator."""
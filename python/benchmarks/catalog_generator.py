@@ -0,0 +1,94 @@
+"""Writes deterministic synthetic catalogs in the videos.txt format.
+
+The same arguments always produce the same file, so results of runs on
+different versions of the code can be compared. Titles are made of words
+drawn from a fixed vocabulary, their number of words follows a normal
+distribution, and tags come from a pool of configurable cardinality with
+a skewed (Zipf-like) popularity, like real tags. Video ids are
+video_00000000, video_00000001, ... in file order, or random 11 character
+ids like YouTube's with --random-ids, so that nothing gets them sorted
+for free.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.catalog_generator --videos 1000000 videos.txt
+"""
+
+import argparse
+import random
+from itertools import accumulate
+
+WORDS = (
+    "amazing funny cats dogs life google video about nothing music live "
+    "cooking travel guide review unboxing tutorial highlights football "
+    "morning routine vlog best worst ever top ten tips tricks how to make "
+    "build learn python java coding challenge walkthrough trailer official "
+    "remix cover reaction explained history science space ocean mountain "
+    "city night drive relaxing piano lofi beats study sleep rain"
+).split()
+
+
+# The characters of YouTube video ids.
+ID_CHARACTERS = ("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+                 "0123456789-_")
+
+
+def generate_catalog(path, videos, tags=1000, tags_per_video=(0, 3),
+                     title_words=(4.0, 2.0), seed=0, random_ids=False):
+    """Writes a synthetic catalog and returns the video ids.
+
+    Args:
+        path: The file to write.
+        videos: The number of videos.
+        tags: The number of distinct tags.
+        tags_per_video: The (min, max) number of tags of a video.
+        title_words: The (mean, standard deviation) of the number of
+            words of a title; every title has at least one word.
+        seed: The seed of the random generator.
+        random_ids: Whether the video ids are random instead of numbered
+            in file order.
+    """
+    rng = random.Random(seed)
+    tag_names = [f"#tag{i}" for i in range(tags)]
+    # Tag i is picked with a weight of 1 / (i + 1).
+    cumulative = list(accumulate(1 / (i + 1) for i in range(tags)))
+    mean, stddev = title_words
+    low, high = tags_per_video
+    video_ids = []
+    with open(path, "w", encoding="utf-8") as video_file:
+        for i in range(videos):
+            length = max(1, round(rng.gauss(mean, stddev)))
+            title = " ".join(rng.choices(WORDS, k=length)).capitalize()
+            if random_ids:
+                video_id = "".join(rng.choices(ID_CHARACTERS, k=11))
+            else:
+                video_id = f"video_{i:08d}"
+            count = rng.randint(low, high)
+            video_tags = dict.fromkeys(
+                rng.choices(tag_names, cum_weights=cumulative, k=count))
+            video_file.write(
+                f"{title} {i} | {video_id} | {' , '.join(video_tags)}\n")
+            video_ids.append(video_id)
+    return video_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--videos", type=int, default=100_000)
+    parser.add_argument("--tags", type=int, default=1000,
+                        help="number of distinct tags")
+    parser.add_argument("--tags-per-video", type=int, nargs=2,
+                        default=[0, 3], metavar=("MIN", "MAX"))
+    parser.add_argument("--title-words", type=float, nargs=2,
+                        default=[4.0, 2.0], metavar=("MEAN", "STDDEV"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--random-ids", action="store_true",
+                        help="random video ids instead of numbered ones")
+    args = parser.parse_args()
+    generate_catalog(args.path, args.videos, args.tags,
+                     tuple(args.tags_per_video), tuple(args.title_words),
+                     args.seed, args.random_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""Benchmarks every VideoPlayer command on synthetic catalogs.
+
+For each catalog size a deterministic catalog is generated (see
+catalog_generator) and loaded in a fresh interpreter, so the reported
+peak RSS belongs to that size alone. Every command then runs through the
+CommandParser with its output discarded, on a fresh session, for up to
+--ops operations or --seconds seconds. Commands that need some state
+first (STOP needs a playing video, ALLOW_VIDEO a flagged one, ...) get it
+from untimed commands run before each timed one. A command registered by
+the CommandParser without a benchmark below is an error, so new commands
+cannot be left out.
+
+The results are written as JSON: per size the load time and peak RSS,
+per command the ops/sec, latency percentiles and the peak memory
+allocated while it runs. Pass an earlier result file to --compare to
+print the change in ops/sec.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.command_benchmark --sizes 1000 100000 1000000 \\
+        --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.catalog_generator import WORDS, generate_catalog
+from src.columnar_library import ColumnarVideoLibrary
+from src.command_parser import CommandParser
+from src.output_sink import OutputSink
+from src.sqlite_library import SqliteVideoLibrary
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+LIBRARIES = {
+    "memory": VideoLibrary,
+    "columnar": ColumnarVideoLibrary,
+    "sqlite": lambda path: SqliteVideoLibrary(path=path),
+}
+
+# Operations measured with tracemalloc, which slows them down a lot.
+_MEMORY_OPS = 20
+
+
+class _NullStream:
+    def write(self, text):
+        pass
+
+
+class CommandBenchmark:
+    """A class used to describe how one command is benchmarked.
+
+    Attributes:
+        name: The command name.
+        command: Called with the operation number, returns the command.
+        setup: Commands run once on the fresh session, untimed.
+        prepare: Called with the operation number, returns the commands
+            run untimed before the timed one. It may also change the
+            catalog file, for RELOAD_LIBRARY.
+        teardown: Commands run once at the end, untimed, e.g. to allow
+            the videos the benchmark flagged in the shared library.
+    """
+
+    def __init__(self, name, command, setup=(), prepare=None, teardown=None):
+        self.name = name
+        self.command = command
+        self.setup = setup
+        self.prepare = prepare
+        self.teardown = teardown
+
+
+def command_benchmarks(video_ids, tags, path):
+    """Returns a CommandBenchmark for every command of the player.
+
+    Args:
+        video_ids: The ids of the catalog's videos.
+        tags: The tags of the catalog's videos.
+        path: The catalog file, changed by the RELOAD_LIBRARY benchmark
+            and restored by its teardown.
+    """
+    def video(i):
+        return video_ids[i * 7919 % len(video_ids)]
+
+    def typo(i):
+        # The search word with one letter dropped.
+        word = WORDS[i % len(WORDS)]
+        j = i % len(word)
+        return word[:j] + word[j + 1:]
+
+    def change_catalog(i):
+        # One new row per reload, so every timed reload applies one video.
+        with open(path, "a", encoding="utf-8") as catalog:
+            catalog.write(f"Reloaded video {i} | reloaded_{i} | #reload\n")
+        return []
+
+    with open(path, encoding="utf-8") as catalog:
+        original_catalog = catalog.read()
+
+    def restore_catalog(ops):
+        with open(path, "w", encoding="utf-8") as catalog:
+            catalog.write(original_catalog)
+        return [["RELOAD_LIBRARY"]]
+
+    playlist = "benchmark_playlist"
+    create = ["CREATE_PLAYLIST", playlist]
+    return [
+        CommandBenchmark("NUMBER_OF_VIDEOS", lambda i: ["NUMBER_OF_VIDEOS"]),
+        CommandBenchmark("SHOW_ALL_VIDEOS", lambda i: ["SHOW_ALL_VIDEOS"]),
+        CommandBenchmark("SHOW_ALL_VIDEOS (page)",
+                         lambda i: ["SHOW_ALL_VIDEOS", "20"]),
+        CommandBenchmark("PLAY", lambda i: ["PLAY", video(i)]),
+        CommandBenchmark("PLAY_RANDOM", lambda i: ["PLAY_RANDOM"]),
+        CommandBenchmark("STOP", lambda i: ["STOP"],
+                         prepare=lambda i: [["PLAY", video(i)]]),
+        CommandBenchmark("PAUSE", lambda i: ["PAUSE"],
+                         prepare=lambda i: [["PLAY", video(i)]]),
+        CommandBenchmark("CONTINUE", lambda i: ["CONTINUE"],
+                         prepare=lambda i: [["PLAY", video(i)], ["PAUSE"]]),
+        CommandBenchmark("SHOW_PLAYING", lambda i: ["SHOW_PLAYING"],
+                         setup=[["PLAY", video(0)]]),
+        CommandBenchmark("CREATE_PLAYLIST",
+                         lambda i: ["CREATE_PLAYLIST", f"playlist_{i}"]),
+        CommandBenchmark("ADD_TO_PLAYLIST",
+                         lambda i: ["ADD_TO_PLAYLIST", playlist, video(i)],
+                         setup=[create]),
+        CommandBenchmark("REMOVE_FROM_PLAYLIST",
+                         lambda i: ["REMOVE_FROM_PLAYLIST", playlist,
+                                    video(i)],
+                         setup=[create],
+                         prepare=lambda i: [["ADD_TO_PLAYLIST", playlist,
+                                             video(i)]]),
+        CommandBenchmark("CLEAR_PLAYLIST",
+                         lambda i: ["CLEAR_PLAYLIST", playlist],
+                         setup=[create],
+                         prepare=lambda i: [
+                             ["ADD_TO_PLAYLIST", playlist, video(i + j)]
+                             for j in range(10)]),
+        CommandBenchmark("DELETE_PLAYLIST",
+                         lambda i: ["DELETE_PLAYLIST", f"playlist_{i}"],
+                         prepare=lambda i: [["CREATE_PLAYLIST",
+                                             f"playlist_{i}"]]),
+        CommandBenchmark("SHOW_PLAYLIST",
+                         lambda i: ["SHOW_PLAYLIST", playlist],
+                         setup=[create] + [["ADD_TO_PLAYLIST", playlist,
+                                            video(i)] for i in range(100)]),
+        CommandBenchmark("SHOW_ALL_PLAYLISTS",
+                         lambda i: ["SHOW_ALL_PLAYLISTS"],
+                         setup=[["CREATE_PLAYLIST", f"playlist_{i}"]
+                                for i in range(100)]),
+        CommandBenchmark("SEARCH_VIDEOS",
+                         lambda i: ["SEARCH_VIDEOS", WORDS[i % len(WORDS)]]),
+        CommandBenchmark("SEARCH_VIDEOS_WITH_TAG",
+                         lambda i: ["SEARCH_VIDEOS_WITH_TAG",
+                                    tags[i % len(tags)]]),
+        CommandBenchmark("SEARCH_VIDEOS_WITH_TAG (page)",
+                         lambda i: ["SEARCH_VIDEOS_WITH_TAG",
+                                    tags[i % len(tags)], "20"]),
+        CommandBenchmark("FUZZY_SEARCH_VIDEOS",
+                         lambda i: ["FUZZY_SEARCH_VIDEOS", typo(i)]),
+        CommandBenchmark("SUGGEST",
+                         lambda i: ["SUGGEST", WORDS[i % len(WORDS)][:3]]),
+        # Flag writes publish a library snapshot, so they are slower than
+        # the session-only commands, see the README.
+        CommandBenchmark("FLAG_VIDEO",
+                         lambda i: ["FLAG_VIDEO", video(i), "benchmark"],
+                         teardown=lambda ops: [["ALLOW_VIDEO", video(i)]
+                                               for i in range(ops)]),
+        CommandBenchmark("ALLOW_VIDEO", lambda i: ["ALLOW_VIDEO", video(i)],
+                         prepare=lambda i: [["FLAG_VIDEO", video(i)]]),
+        CommandBenchmark("RELOAD_LIBRARY", lambda i: ["RELOAD_LIBRARY"]),
+        CommandBenchmark("RELOAD_LIBRARY (one row added)",
+                         lambda i: ["RELOAD_LIBRARY"],
+                         prepare=change_catalog, teardown=restore_catalog),
+        CommandBenchmark("HELP", lambda i: ["HELP"]),
+    ]
+
+
+def check_coverage(benchmarks, parser):
+    """Raises ValueError if a command of parser has no benchmark.
+
+    A benchmark covers the command its name starts with, e.g.
+    "SHOW_ALL_VIDEOS (page)" covers SHOW_ALL_VIDEOS.
+    """
+    covered = {benchmark.name.split()[0] for benchmark in benchmarks}
+    missing = [name for name in parser.command_names()
+               if name not in covered]
+    if missing:
+        raise ValueError(f"No benchmark for: {', '.join(missing)}")
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def new_parser(library):
+    # Search follow-up questions are answered with "no".
+    player = VideoPlayer(library, read_line=lambda: "no\n",
+                         output=OutputSink(_NullStream()))
+    return CommandParser(player)
+
+
+def run_ops(library, benchmark, max_ops, seconds, trace=False):
+    """Runs one benchmark on a fresh session, returns the latencies in ns."""
+    parser = new_parser(library)
+    for command in benchmark.setup:
+        parser.execute_command(command)
+    if trace:
+        tracemalloc.start()
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while len(latencies) < max_ops and (not latencies or
+                                        time.perf_counter() < deadline):
+        i = len(latencies)
+        if benchmark.prepare is not None:
+            for command in benchmark.prepare(i):
+                parser.execute_command(command)
+        command = benchmark.command(i)
+        start = time.perf_counter_ns()
+        parser.execute_command(command)
+        latencies.append(time.perf_counter_ns() - start)
+    peak = None
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if benchmark.teardown is not None:
+        for command in benchmark.teardown(len(latencies)):
+            parser.execute_command(command)
+    return latencies, peak
+
+
+def run_size(library_name, path, max_ops, seconds):
+    """Loads one catalog and benchmarks every command on it."""
+    start = time.perf_counter()
+    library = LIBRARIES[library_name](path)
+    load_seconds = time.perf_counter() - start
+    video_ids = sorted(video.video_id for video in library.iter_videos())
+    tags = sorted({tag for video in library.iter_videos()
+                   for tag in video.tags})
+
+    benchmarks = command_benchmarks(video_ids, tags, path)
+    check_coverage(benchmarks, new_parser(library))
+    commands = {}
+    for benchmark in benchmarks:
+        latencies, _ = run_ops(library, benchmark, max_ops, seconds)
+        _, peak = run_ops(library, benchmark, min(max_ops, _MEMORY_OPS),
+                          seconds, trace=True)
+        latencies.sort()
+        commands[benchmark.name] = {
+            "ops": len(latencies),
+            "ops_per_sec": len(latencies) / (sum(latencies) / 1e9),
+            "p50_us": percentile(latencies, 0.50) / 1e3,
+            "p90_us": percentile(latencies, 0.90) / 1e3,
+            "p99_us": percentile(latencies, 0.99) / 1e3,
+            "max_us": latencies[-1] / 1e3,
+            "peak_alloc_bytes": peak,
+        }
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "videos": len(library),
+        "load_seconds": load_seconds,
+        "peak_rss_bytes":
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "commands": commands,
+    }
+
+
+def print_table(result, stream):
+    for size in result["sizes"]:
+        print(f"{size['videos']:,} videos, loaded in "
+              f"{size['load_seconds']:.2f}s, peak RSS "
+              f"{size['peak_rss_bytes'] / 2**20:.1f} MiB", file=stream)
+        for name, command in size["commands"].items():
+            print(f"  {name:>29}: {command['ops_per_sec']:12,.0f} ops/sec  "
+                  f"p50 {command['p50_us']:10,.1f}us  "
+                  f"p99 {command['p99_us']:10,.1f}us  "
+                  f"peak alloc "
+                  f"{command['peak_alloc_bytes'] / 2**10:10,.1f} KiB",
+                  file=stream)
+
+
+def print_comparison(baseline, result, stream):
+    """Prints the ops/sec of result relative to baseline."""
+    previous = {size["videos"]: size["commands"]
+                for size in baseline["sizes"]}
+    for size in result["sizes"]:
+        commands = previous.get(size["videos"])
+        if commands is None:
+            continue
+        print(f"{size['videos']:,} videos, ops/sec vs baseline:", file=stream)
+        for name, command in size["commands"].items():
+            if name in commands:
+                ratio = command["ops_per_sec"] / commands[name]["ops_per_sec"]
+                print(f"  {name:>29}: {ratio:8.2f}x", file=stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--library", choices=LIBRARIES, default="memory")
+    parser.add_argument("--ops", type=int, default=1000,
+                        help="maximum operations per command")
+    parser.add_argument("--seconds", type=float, default=2.0,
+                        help="time budget per command")
+    parser.add_argument("--tags", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--random-ids", action="store_true",
+                        help="random video ids instead of numbered ones")
+    parser.add_argument("--output", help="JSON file, stdout by default")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="earlier JSON result to compare ops/sec with")
+    parser.add_argument("--child", metavar="CATALOG", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_size(args.library, args.child, args.ops,
+                                  args.seconds)))
+        return
+
+    result = {
+        "library": args.library,
+        "random_ids": args.random_ids,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "sizes": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for videos in args.sizes:
+            path = os.path.join(tmp, f"videos_{videos}.txt")
+            generate_catalog(path, videos, tags=args.tags, seed=args.seed,
+                             random_ids=args.random_ids)
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.command_benchmark",
+                 "--child", path, "--library", args.library,
+                 "--ops", str(args.ops), "--seconds", str(args.seconds)],
+                check=True, capture_output=True, text=True).stdout
+            result["sizes"].append(json.loads(output))
+            os.remove(path)
+
+    print_table(result, sys.stderr)
+    if args.compare:
+        with open(args.compare) as baseline:
+            print_comparison(json.load(baseline), result, sys.stderr)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(result, output_file, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Measures CommandParser dispatch throughput over the whole command set.
+
+The player is replaced by a stub whose methods do nothing, so only the
+parser's own work is timed. "before" models the original if/elif chain,
+which called command[0].upper() again in every branch it tested; "after"
+is the dispatch-table src.command_parser.CommandParser.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.command_parser_benchmark --rounds 20000
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from src.command_parser import CommandException, CommandParser
+from src.output_sink import OutputSink
+
+COMMANDS = [
+    ["NUMBER_OF_VIDEOS"], ["SHOW_ALL_VIDEOS"], ["PLAY", "video_id"],
+    ["PLAY_RANDOM"], ["STOP"], ["PAUSE"], ["CONTINUE"], ["SHOW_PLAYING"],
+    ["CREATE_PLAYLIST", "list"], ["ADD_TO_PLAYLIST", "list", "video_id"],
+    ["REMOVE_FROM_PLAYLIST", "list", "video_id"], ["CLEAR_PLAYLIST", "list"],
+    ["DELETE_PLAYLIST", "list"], ["SHOW_PLAYLIST", "list"],
+    ["SHOW_ALL_PLAYLISTS"], ["SEARCH_VIDEOS", "cat"],
+    ["SEARCH_VIDEOS_WITH_TAG", "#cat"], ["FLAG_VIDEO", "video_id", "reason"],
+    ["ALLOW_VIDEO", "video_id"], ["HELP"], ["play", "video_id"],
+    ["NOT_A_COMMAND"],
+]
+
+
+class NullPlayer:
+    """A VideoPlayer stand-in whose methods accept anything and do nothing."""
+
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+class IfChainCommandParser:
+    """The original dispatch: branches tested in order, upper() per test."""
+
+    # (name, player method, required args, optional args)
+    BRANCHES = [
+        ("NUMBER_OF_VIDEOS", "number_of_videos", None, 0),
+        ("SHOW_ALL_VIDEOS", "show_all_videos", None, 0),
+        ("PLAY", "play_video", 1, 0),
+        ("PLAY_RANDOM", "play_random_video", None, 0),
+        ("STOP", "stop_video", None, 0),
+        ("PAUSE", "pause_video", None, 0),
+        ("CONTINUE", "continue_video", None, 0),
+        ("SHOW_PLAYING", "show_playing", None, 0),
+        ("CREATE_PLAYLIST", "create_playlist", 1, 0),
+        ("ADD_TO_PLAYLIST", "add_to_playlist", 2, 0),
+        ("REMOVE_FROM_PLAYLIST", "remove_from_playlist", 2, 0),
+        ("CLEAR_PLAYLIST", "clear_playlist", 1, 0),
+        ("DELETE_PLAYLIST", "delete_playlist", 1, 0),
+        ("SHOW_PLAYLIST", "show_playlist", 1, 0),
+        ("SHOW_ALL_PLAYLISTS", "show_all_playlists", None, 0),
+        ("SEARCH_VIDEOS", "search_videos", 1, 0),
+        ("SEARCH_VIDEOS_WITH_TAG", "search_videos_tag", 1, 0),
+        ("FLAG_VIDEO", "flag_video", 1, 1),
+        ("ALLOW_VIDEO", "allow_video", 1, 0),
+        ("HELP", "help", None, 0),
+    ]
+
+    def __init__(self, video_player):
+        self._player = video_player
+
+    def execute_command(self, command):
+        if not command:
+            raise CommandException("Please enter a valid command.")
+        for name, method, arity, optional in self.BRANCHES:
+            if command[0].upper() == name:
+                if arity is None:
+                    getattr(self._player, method)()
+                elif arity <= len(command) - 1 <= arity + optional:
+                    getattr(self._player, method)(*command[1:])
+                else:
+                    raise CommandException(f"Please enter {name} command.")
+                return
+        print("Please enter a valid command, type HELP for a list of "
+              "available commands.")
+
+
+def commands_per_second(parser, rounds):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for command in COMMANDS:
+                parser.execute_command(command)
+        elapsed = time.perf_counter() - start
+    return rounds * len(COMMANDS) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20_000)
+    args = parser.parse_args()
+
+    before = commands_per_second(IfChainCommandParser(NullPlayer()),
+                                 args.rounds)
+    command_parser = CommandParser(NullPlayer(), OutputSink())
+    # Keep HELP output out of the measurement, like the stub player.
+    command_parser.register_command("HELP", lambda: None)
+    after = commands_per_second(command_parser, args.rounds)
+    print(f"before: {before:12,.0f} commands/sec")
+    print(f" after: {after:12,.0f} commands/sec  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
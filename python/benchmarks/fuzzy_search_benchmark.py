@@ -0,0 +1,122 @@
+"""Measures the build time and query latency of the fuzzy title index.
+
+Titles are made of pseudo-words drawn from a vocabulary with a Zipf-like
+popularity, so a few words are very common and most are rare, like in
+real titles. Queries are vocabulary words, picked uniformly, with 0, 1 or
+2 random typos (within what the index tolerates for the word's length).
+
+Two latencies are reported per query:
+    correct  finding the indexed words close to the query word, which
+             does not depend on the number of titles
+    top 10   the ten best ranked videos, which also visits every video
+             carrying one of those words
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.fuzzy_search_benchmark --titles 1000000
+"""
+
+import argparse
+import random
+import resource
+import string
+import sys
+import time
+from itertools import accumulate, islice
+
+from src.fuzzy_index import FuzzyIndex, allowed_distance
+
+_SYLLABLES = [consonant + vowel for consonant in "bcdfghklmnprstvz"
+              for vowel in "aeiou"]
+
+
+def make_vocabulary(size, rng):
+    """Returns size distinct pseudo-words of 1 to 4 syllables."""
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(_SYLLABLES, k=rng.randint(1, 4))))
+    return sorted(words)
+
+
+def make_titles(count, vocabulary, rng, words_per_title=4):
+    # Word i is picked with a weight of 1 / (i + 1).
+    cumulative = list(accumulate(1 / (i + 1)
+                                 for i in range(len(vocabulary))))
+    for i in range(count):
+        words = rng.choices(vocabulary, cum_weights=cumulative,
+                            k=words_per_title)
+        yield f"video_{i:08d}", " ".join(words).capitalize()
+
+
+def add_typos(word, rng):
+    """Returns word with up to allowed_distance(word) random edits."""
+    for _ in range(rng.randint(0, allowed_distance(word.upper()))):
+        i = rng.randrange(len(word))
+        edit = rng.choice(("delete", "insert", "replace", "swap"))
+        if edit == "delete" and len(word) > 3:
+            word = word[:i] + word[i + 1:]
+        elif edit == "insert":
+            word = word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+        elif edit == "swap" and i + 1 < len(word):
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+        else:
+            word = word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+    return word
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def timed(function, queries):
+    """Returns the sorted latencies of function over queries, in us."""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter_ns()
+        function(query)
+        latencies.append((time.perf_counter_ns() - start) / 1e3)
+    latencies.sort()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    titles = list(make_titles(args.titles, vocabulary, rng))
+
+    index = FuzzyIndex()
+    start = time.perf_counter()
+    for video_id, title in titles:
+        index.add(video_id, title)
+    build_seconds = time.perf_counter() - start
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    print(f"{args.titles:,} titles, {args.vocabulary:,} words: built in "
+          f"{build_seconds:.1f}s, peak RSS {peak_rss / 2**20:,.0f} MiB")
+
+    queries = [add_typos(rng.choice(vocabulary), rng)
+               for _ in range(args.queries)]
+    results = {
+        "correct": timed(lambda query: index.similar_words(query.upper()),
+                         queries),
+        "top 10": timed(lambda query: list(islice(index.search(query), 10)),
+                        queries),
+    }
+    for name, latencies in results.items():
+        print(f"{name:>8}: p50 {percentile(latencies, 0.5):10,.1f}us  "
+              f"p90 {percentile(latencies, 0.9):10,.1f}us  "
+              f"p99 {percentile(latencies, 0.99):10,.1f}us")
+    found = sum(1 for query in queries if next(index.search(query), None))
+    print(f"{found / len(queries):.0%} of the queries found a video")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Compares the csv based catalog loader with the streaming loader.
+
+Each loader runs in a fresh interpreter so that the reported peak RSS
+belongs to that loader alone.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.loader_benchmark --rows 1000000
+"""
+
+import argparse
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.video import Video
+from src.video_loader import iter_video_rows
+
+
+def _csv_reader_with_strip(reader):
+    """The original loader helper, kept here as the baseline."""
+    yield from ((item.strip() for item in line) for line in reader)
+
+
+def load_with_csv(path, keep):
+    videos = {}
+    rows = 0
+    with open(path) as video_file:
+        reader = _csv_reader_with_strip(csv.reader(video_file, delimiter="|"))
+        for video_info in reader:
+            title, url, tags = video_info
+            video = Video(
+                title,
+                url,
+                [tag.strip() for tag in tags.split(",")] if tags else [],
+            )
+            rows += 1
+            if keep:
+                videos[url] = video
+    return rows
+
+
+def load_streaming(path, keep):
+    videos = {}
+    rows = 0
+    for title, url, tags in iter_video_rows(path):
+        video = Video(title, url, tags)
+        rows += 1
+        if keep:
+            videos[url] = video
+    return rows
+
+
+LOADERS = {"csv": load_with_csv, "streaming": load_streaming}
+
+
+def write_catalog(path, rows):
+    with open(path, "w") as video_file:
+        for i in range(rows):
+            video_file.write(
+                f"Synthetic Video {i} | video_{i:08d} | #tag{i % 97} , #tag{i % 13}\n")
+
+
+def run_child(loader, path, keep):
+    start = time.perf_counter()
+    rows = LOADERS[loader](path, keep)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    print(json.dumps({
+        "loader": loader,
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed,
+        "peak_rss_bytes": peak_rss,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--catalog", help="existing catalog file to load")
+    parser.add_argument("--discard", action="store_true",
+                        help="drop each video after parsing it, so the peak "
+                             "RSS shows the loader's own overhead")
+    parser.add_argument("--child", choices=LOADERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.catalog, not args.discard)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.catalog
+        if path is None:
+            path = os.path.join(tmp, "videos.txt")
+            write_catalog(path, args.rows)
+        for loader in LOADERS:
+            command = [sys.executable, "-m", "benchmarks.loader_benchmark",
+                       "--child", loader, "--catalog", path]
+            if args.discard:
+                command.append("--discard")
+            output = subprocess.run(
+                command,
+                check=True, capture_output=True, text=True).stdout
+            result = json.loads(output)
+            print(f"{loader:>10}: {result['rows_per_sec']:>12,.0f} rows/sec  "
+                  f"peak RSS {result['peak_rss_bytes'] / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compares per-line print() with OutputSink batching for SHOW_ALL_VIDEOS.
+
+Output goes to os.devnull through a line-buffered stream, which is how
+stdout behaves on a terminal: every print() ends in its own write call.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.output_benchmark --videos 200000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.loader_benchmark import write_catalog
+from src.output_sink import OutputSink
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def show_all_with_print(library, stream):
+    """SHOW_ALL_VIDEOS as it was written before the output sink."""
+    print("Here's a list of all available videos:", file=stream)
+    for video in library.iter_videos():
+        print(video, file=stream)
+
+
+def show_all_with_sink(library, stream):
+    player = VideoPlayer(library, output=OutputSink(stream))
+    with player.output.command():
+        player.show_all_videos()
+
+
+def lines_per_second(show_all, library, stream, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        show_all(library, stream)
+        stream.flush()
+        best = min(best, time.perf_counter() - start)
+    return (len(library) + 1) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "videos.txt")
+        write_catalog(path, args.videos)
+        library = VideoLibrary(path)
+
+    with open(os.devnull, "w", buffering=1) as stream:
+        before = lines_per_second(show_all_with_print, library, stream,
+                                  args.repeat)
+        after = lines_per_second(show_all_with_sink, library, stream,
+                                 args.repeat)
+    print(f"print(): {before:12,.0f} lines/sec")
+    print(f"   sink: {after:12,.0f} lines/sec  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
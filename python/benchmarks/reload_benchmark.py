@@ -0,0 +1,84 @@
+"""Measures what RELOAD_LIBRARY costs when one row of a large catalog changes.
+
+A reload has two parts. First the whole file is read and compared with
+the loaded catalog, which is O(n) in the size of the file. Then the diff
+is applied to a draft of the snapshot. The catalog map and the title
+order share their chunks with the published snapshot, so that step costs
+O(sqrt(n)) plus the posting sets of the changed video's n-grams, words
+and tags. The loaded videos that are missing from the file are only
+looked for when the file has fewer known rows than the catalog.
+
+Each reload adds one row to the catalog. The search, fuzzy and prefix
+indexes are built before the first one, so the reload updates them too.
+The report shows the time to read the file, the whole reload, and the
+time to draft and apply one video on its own.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.reload_benchmark --sizes 100000 1000000
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.catalog_generator import generate_catalog
+from src.video import Video
+from src.video_library import VideoLibrary, _iter_catalog_rows
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def read_rows(path):
+    return {video_id: (title, tags)
+            for title, video_id, tags in _iter_catalog_rows(path)}
+
+
+def apply_one(library, i):
+    draft = library.snapshot()._draft(catalog=True)
+    draft._add(Video(f"Applied video {i}", f"applied_{i}", ["#reload"]))
+
+
+def run_size(size, reloads, directory):
+    path = os.path.join(directory, f"catalog_{size}.txt")
+    generate_catalog(path, size)
+    library = VideoLibrary(path)
+    library.search_titles("cat")
+    library.fuzzy_search_titles("cat")
+    library.suggest("cat", 10)
+
+    read = []
+    reload = []
+    apply = []
+    for i in range(reloads):
+        with open(path, "a", encoding="utf-8") as catalog:
+            catalog.write(f"Reloaded video {i} | reloaded_{i} | #reload\n")
+        read.append(timed(lambda: read_rows(path)))
+        # A reload within the modification time resolution would be
+        # skipped, so every reload gets its own stamp.
+        os.utime(path, ns=(0, (i + 1) * 10**9))
+        reload.append(timed(library.reload))
+        apply.append(timed(lambda: apply_one(library, i)))
+    print(f"{size:>10,} videos: read {statistics.median(read) * 1e3:9,.1f}ms"
+          f"  reload {statistics.median(reload) * 1e3:9,.1f}ms"
+          f"  draft and apply {statistics.median(apply) * 1e3:7,.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--reloads", type=int, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            run_size(size, args.reloads, directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Measures SHOW_ALL_VIDEOS rendering with and without cached video lines.
+
+A Video renders its listing line once and reuses it. This benchmark lists
+a synthetic catalog (see catalog_generator) three ways:
+    uncached  every line is built again, as Video.__repr__ used to do
+    first     the first listing of a fresh library, which fills the cache
+    cached    later listings, which only concatenate cached lines
+Output goes to os.devnull through an OutputSink, so the numbers are about
+rendering rather than the terminal. A tenth of the videos are flagged.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.render_benchmark --videos 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.catalog_generator import generate_catalog
+from src.output_sink import OutputSink
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _render_uncached(video):
+    """The original Video.__repr__, kept here as the baseline."""
+    tags = (" ".join([tag for tag in video.tags]))
+    return f"{video.title} ({video.video_id}) [{tags}]"
+
+
+def show_all_uncached(library, output):
+    """SHOW_ALL_VIDEOS with every line rendered again."""
+    with output.command():
+        output.write_line("Here's a list of all available videos:")
+        snapshot = library.snapshot()
+        for video in snapshot.iter_videos():
+            flag_reason = snapshot.get_flag_reason(video.video_id)
+            line = _render_uncached(video)
+            if flag_reason is not None:
+                line = f"{line} - FLAGGED (reason: {flag_reason})"
+            output.write_line(line)
+
+
+def show_all_cached(library, output):
+    player = VideoPlayer(library, output=output)
+    with output.command():
+        player.show_all_videos()
+
+
+def lines_per_second(show_all, library, output, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        show_all(library, output)
+        best = min(best, time.perf_counter() - start)
+    return (len(library) + 1) / best
+
+
+def load(path):
+    library = VideoLibrary(path)
+    for video_id in sorted(video.video_id
+                           for video in library.iter_videos())[::10]:
+        library.flag_video(video_id, "benchmark")
+    return library
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "videos.txt")
+        generate_catalog(path, args.videos, seed=args.seed)
+        uncached_library = load(path)
+        library = load(path)
+
+    with open(os.devnull, "w") as stream:
+        output = OutputSink(stream)
+        results = {
+            "uncached": lines_per_second(show_all_uncached, uncached_library,
+                                         output, args.repeat),
+            "first": lines_per_second(show_all_cached, library, output, 1),
+            "cached": lines_per_second(show_all_cached, library, output,
+                                       args.repeat),
+        }
+    for name, rate in results.items():
+        print(f"{name:>8}: {rate:12,.0f} lines/sec  "
+              f"{rate / results['uncached']:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""A load generator for src.server reporting latency per command.
+
+Opens many concurrent connections, each replaying the same command mix,
+and reports p50/p99 latency per command and the overall throughput. A
+server is started in a subprocess unless --port points at a running one.
+
+The searches of the mix find videos and are answered after --think
+seconds, like a user reading the results. The latency of a search is the
+time to its question plus the time from the answer to the next prompt,
+so the think time itself is not counted; with a small --workers pool it
+shows whether clients pondering an answer hold up everyone else.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.server_load_benchmark --connections 2000
+    python3 -m benchmarks.server_load_benchmark --workers 4 --think 0.5
+"""
+
+import argparse
+import asyncio
+import resource
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+PROMPT = b"YT> "
+QUESTION_END = b"we will assume it's a no.\n"
+
+# (command, answer to its follow-up question or None).
+COMMAND_MIX = [
+    ("NUMBER_OF_VIDEOS", None),
+    ("PLAY amazing_cats_video_id", None),
+    ("SHOW_PLAYING", None),
+    ("CREATE_PLAYLIST load_test", None),
+    ("ADD_TO_PLAYLIST load_test funny_dogs_video_id", None),
+    ("SHOW_PLAYLIST load_test", None),
+    ("SEARCH_VIDEOS_WITH_TAG #cat", "2"),
+    ("SEARCH_VIDEOS cat", "no"),
+    ("SHOW_ALL_VIDEOS", None),
+    ("DELETE_PLAYLIST load_test", None),
+    ("STOP", None),
+]
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def connect(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    await reader.readuntil(PROMPT)
+    return reader, writer
+
+
+async def client(reader, writer, rounds, think, latencies):
+    for _ in range(rounds):
+        for command, answer in COMMAND_MIX:
+            start = time.perf_counter()
+            writer.write(f"{command}\n".encode())
+            if answer is not None:
+                await reader.readuntil(QUESTION_END)
+                asked = time.perf_counter()
+                await asyncio.sleep(think)
+                writer.write(f"{answer}\n".encode())
+                start += time.perf_counter() - asked
+            await reader.readuntil(PROMPT)
+            latencies[command.split()[0]].append(time.perf_counter() - start)
+    writer.write(b"EXIT\n")
+    await reader.read()
+    writer.close()
+
+
+async def run_load(host, port, connections, rounds, think):
+    latencies = defaultdict(list)
+    # All connections are opened before any command is timed.
+    streams = await asyncio.gather(
+        *(connect(host, port) for _ in range(connections)))
+    start = time.perf_counter()
+    await asyncio.gather(*(client(reader, writer, rounds, think, latencies)
+                           for reader, writer in streams))
+    return latencies, time.perf_counter() - start
+
+
+def start_server(port, workers):
+    command = [sys.executable, "-m", "src.server", "--port", str(port)]
+    if workers is not None:
+        command += ["--workers", str(workers)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    server.stdout.readline()  # "Serving on ..."
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int,
+                        help="port of an already running server")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--think", type=float, default=0.1,
+                        help="seconds before answering a search")
+    parser.add_argument("--workers", type=int,
+                        help="thread pool size of the started server")
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    server = None
+    port = args.port
+    if port is None:
+        port = 8765
+        server = start_server(port, args.workers)
+    try:
+        latencies, elapsed = asyncio.run(
+            run_load(args.host, port, args.connections, args.rounds,
+                     args.think))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{args.connections} connections, {total:,} commands in "
+          f"{elapsed:.2f}s ({total / elapsed:,.0f} commands/sec)")
+    print(f"{'command':<24}{'p50 ms':>10}{'p99 ms':>10}")
+    for command, values in latencies.items():
+        values.sort()
+        print(f"{command:<24}{percentile(values, 0.5) * 1000:>10.2f}"
+              f"{percentile(values, 0.99) * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Measures how fast player sessions are created and what they cost.
+
+"shared library" creates every VideoPlayer on one loaded VideoLibrary;
+"own library" is the default VideoPlayer(), which loads videos.txt for
+each player.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.session_benchmark --sessions 100000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def measure(create, count):
+    tracemalloc.start()
+    start = time.perf_counter()
+    players = [create() for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del players
+    return count / elapsed, size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    args = parser.parse_args()
+
+    library = VideoLibrary()
+    shared = measure(lambda: VideoPlayer(library), args.sessions)
+    own = measure(VideoPlayer, max(1, args.sessions // 100))
+    for name, (per_second, size) in (("shared library", shared),
+                                     ("own library", own)):
+        print(f"{name:>15}: {per_second:12,.0f} sessions/sec  "
+              f"{size:10,.0f} bytes/session")
+
+
+if __name__ == "__main__":
+    main()
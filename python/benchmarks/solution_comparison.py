@@ -0,0 +1,257 @@
+"""Compares the implementations under solutions/python with this one.
+
+Every implementation runs the same command trace on the same synthetic
+catalog, each in a fresh interpreter. The solutions read the videos.txt
+next to their own modules, so each package is copied to a temporary
+directory and its videos.txt replaced by the catalog. The trace is fed
+through stdin, so the follow-up questions of the search commands are
+answered by the next trace line, exactly like the terminal.
+
+The report shows per implementation the catalog load time, peak RSS,
+overall and per command throughput, and how many commands printed the
+same output as this implementation (the reference), ignoring leading and
+trailing whitespace on each line. PLAY_RANDOM is not
+part of the trace because its output is random by design.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.solution_comparison --videos 10000 --commands 5000
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks.catalog_generator import WORDS, generate_catalog
+
+PYTHON_DIR = Path(__file__).resolve().parents[1]
+SOLUTIONS_DIR = PYTHON_DIR.parent / "solutions" / "python"
+REFERENCE = "current"
+
+
+def implementations():
+    """Returns {name: package directory} of every implementation."""
+    found = {REFERENCE: PYTHON_DIR / "src"}
+    for solution in sorted(SOLUTIONS_DIR.glob("solution*")):
+        # Most solutions keep their package in src/, solution2 does not.
+        package = solution / "src" if (solution / "src").is_dir() else solution
+        if (package / "video_player.py").exists():
+            found[solution.name] = package
+    return found
+
+
+def make_trace(video_ids, tags, count, seed=0):
+    """Returns a deterministic list of trace lines.
+
+    Search commands are followed by their answer: a result number, or
+    "no" which every implementation treats as not playing anything.
+    """
+    rng = random.Random(seed)
+    playlists = [f"playlist_{i}" for i in range(8)]
+
+    def video():
+        return rng.choice(video_ids)
+
+    makers = [
+        lambda: ["NUMBER_OF_VIDEOS"],
+        lambda: ["PLAY " + video()],
+        lambda: ["STOP"],
+        lambda: ["PAUSE"],
+        lambda: ["CONTINUE"],
+        lambda: ["SHOW_PLAYING"],
+        lambda: ["CREATE_PLAYLIST " + rng.choice(playlists)],
+        lambda: [f"ADD_TO_PLAYLIST {rng.choice(playlists)} {video()}"],
+        lambda: [f"REMOVE_FROM_PLAYLIST {rng.choice(playlists)} {video()}"],
+        lambda: ["CLEAR_PLAYLIST " + rng.choice(playlists)],
+        lambda: ["DELETE_PLAYLIST " + rng.choice(playlists)],
+        lambda: ["SHOW_PLAYLIST " + rng.choice(playlists)],
+        lambda: ["SHOW_ALL_PLAYLISTS"],
+        lambda: ["SEARCH_VIDEOS " + rng.choice(WORDS),
+                 rng.choice(["1", "2", "no"])],
+        lambda: ["SEARCH_VIDEOS_WITH_TAG " + rng.choice(tags),
+                 rng.choice(["1", "no"])],
+        lambda: [f"FLAG_VIDEO {video()} reason_{rng.randrange(3)}"],
+        lambda: ["ALLOW_VIDEO " + video()],
+    ]
+    # Listing the whole catalog is rare, it would dominate the run.
+    weights = [5, 10, 5, 5, 5, 5, 5, 10, 5, 2, 2, 5, 2, 5, 5, 5, 5]
+    trace = []
+    for _ in range(count):
+        trace.extend(rng.choices(makers, weights)[0]())
+    trace.append("SHOW_ALL_VIDEOS")
+    return trace
+
+
+def run_child(package_dir):
+    """Runs the trace read from stdin and prints the results as JSON."""
+    package_dir = Path(package_dir)
+    sys.path.insert(0, str(package_dir.parent))
+    package = package_dir.name
+    command_parser = importlib.import_module(f"{package}.command_parser")
+    video_player = importlib.import_module(f"{package}.video_player")
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        parser = command_parser.CommandParser(video_player.VideoPlayer())
+    load_seconds = time.perf_counter() - start
+
+    seconds = defaultdict(float)
+    counts = defaultdict(int)
+    digests = []
+    commands = []
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        command = line.split()
+        output = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            try:
+                parser.execute_command(command)
+            except command_parser.CommandException as e:
+                print(e)
+            except Exception as e:
+                print(f"error: {type(e).__name__}")
+        name = command[0]
+        seconds[name] += time.perf_counter() - start
+        counts[name] += 1
+        # The tests compare lines with `in`, so indentation and trailing
+        # spaces, where the implementations differ, are ignored here too.
+        lines = "\n".join(line.strip()
+                          for line in output.getvalue().splitlines())
+        digests.append(hashlib.md5(lines.encode()).hexdigest())
+        commands.append(line.strip())
+
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "peak_rss_bytes":
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "seconds": seconds,
+        "counts": counts,
+        "digests": digests,
+        "executed": commands,
+    }))
+
+
+def run_implementation(package_dir, catalog, trace_text, workdir):
+    """Copies an implementation next to the catalog and runs the trace."""
+    copy = Path(workdir) / package_dir.name
+    shutil.rmtree(copy, ignore_errors=True)
+    shutil.copytree(package_dir, copy,
+                    ignore=shutil.ignore_patterns("__pycache__", "*.ytcat"))
+    shutil.copyfile(catalog, copy / "videos.txt")
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.solution_comparison",
+         "--child", str(copy)],
+        input=trace_text, check=True, capture_output=True, text=True,
+        cwd=PYTHON_DIR).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def compare(results):
+    """Adds the number of commands agreeing with the reference.
+
+    The first command whose output differs is kept as well, it is where
+    to start looking for the difference.
+    """
+    reference = results[REFERENCE]["digests"]
+    for result in results.values():
+        agreeing = [a == b for a, b in zip(result.pop("digests"), reference)]
+        executed = result.pop("executed")
+        result["agreeing_commands"] = sum(agreeing)
+        result["commands"] = len(reference)
+        result["first_difference"] = next(
+            (command for command, same in zip(executed, agreeing)
+             if not same), None)
+
+
+def print_report(results, stream):
+    # Unanswered follow-up answers ("1", "no") are executed as commands
+    # too, they are left out of the per command rows.
+    names = sorted({name for result in results.values()
+                    for name in result["counts"] if name.isupper()})
+    print(f"{'':>22}" + "".join(f"{impl:>14}" for impl in results),
+          file=stream)
+
+    def row(label, values):
+        print(f"{label:>22}" + "".join(f"{value:>14}" for value in values),
+              file=stream)
+
+    row("load (ms)", [f"{r['load_seconds'] * 1000:,.1f}"
+                      for r in results.values()])
+    row("peak RSS (MiB)", [f"{r['peak_rss_bytes'] / 2**20:,.1f}"
+                           for r in results.values()])
+    row("commands/sec", [
+        f"{sum(r['counts'].values()) / sum(r['seconds'].values()):,.0f}"
+        for r in results.values()])
+    row("agreeing outputs", [f"{r['agreeing_commands']}/{r['commands']}"
+                             for r in results.values()])
+    for name, result in results.items():
+        if result["first_difference"] is not None:
+            print(f"{name} first differs on: {result['first_difference']}",
+                  file=stream)
+    print("ops/sec per command:", file=stream)
+    for name in names:
+        row(name, [f"{r['counts'][name] / r['seconds'][name]:,.0f}"
+                   if r["seconds"].get(name) else "-"
+                   for r in results.values()])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=10_000)
+    parser.add_argument("--commands", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", metavar="NAME",
+                        help="implementations to run, e.g. solution1")
+    parser.add_argument("--output", help="also write the results as JSON")
+    parser.add_argument("--child", metavar="PACKAGE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    found = implementations()
+    selected = {REFERENCE} | set(args.only or found)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = os.path.join(tmp, "videos.txt")
+        video_ids = generate_catalog(catalog, args.videos, tags=100,
+                                     seed=args.seed)
+        tags = [f"#tag{i}" for i in range(100)]
+        trace = make_trace(video_ids, tags, args.commands, args.seed)
+        trace_text = "\n".join(trace) + "\n"
+        for name, package_dir in found.items():
+            if name not in selected:
+                continue
+            workdir = os.path.join(tmp, name)
+            os.mkdir(workdir)
+            results[name] = run_implementation(package_dir, catalog,
+                                               trace_text, workdir)
+
+    compare(results)
+    print_report(results, sys.stdout)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
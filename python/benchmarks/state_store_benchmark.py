@@ -0,0 +1,101 @@
+"""Measures StateStore mutation throughput and recovery time.
+
+"mutations" runs playlist and flag commands through a journaled
+VideoPlayer with fsync after every record (group size 1) and with group
+commit. "recovery" writes logs of increasing length without a snapshot
+and times StateStore.recover, which replays all of them; the last row
+recovers from a compacted snapshot instead.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.state_store_benchmark --mutations 2000
+"""
+
+import argparse
+import tempfile
+import time
+
+from src.output_sink import OutputSink
+from src.state_store import StateStore
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+from src.video_session import VideoSession
+
+
+class _NullStream:
+    def write(self, text):
+        pass
+
+
+def open_player(directory, library, **kwargs):
+    store = StateStore(directory, **kwargs)
+    session = VideoSession()
+    store.recover(library, session)
+    player = VideoPlayer(library, session=session, journal=store,
+                         output=OutputSink(_NullStream()))
+    return player, store
+
+
+def mutate(player, library, count):
+    video_ids = [video.video_id for video in library.iter_videos()]
+    player.create_playlist("benchmark")
+    for i in range(count - 1):
+        video_id = video_ids[i % len(video_ids)]
+        if i % 2:
+            player.remove_from_playlist("benchmark", video_id)
+        else:
+            player.add_to_playlist("benchmark", video_id)
+
+
+def measure_mutations(count, group_size):
+    with tempfile.TemporaryDirectory() as directory:
+        library = VideoLibrary()
+        player, store = open_player(directory, library,
+                                    group_size=group_size,
+                                    snapshot_every=count + 1)
+        start = time.perf_counter()
+        mutate(player, library, count)
+        store.sync()
+        elapsed = time.perf_counter() - start
+        return store.lsn / elapsed
+
+
+def measure_recovery(length, compact):
+    library = VideoLibrary()
+    with tempfile.TemporaryDirectory() as directory:
+        player, store = open_player(directory, library, group_size=length,
+                                    snapshot_every=length + 1)
+        mutate(player, library, length)
+        if compact:
+            store.close()
+        else:
+            store.sync()
+        start = time.perf_counter()
+        _, store = open_player(directory, library)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mutations", type=int, default=2000)
+    parser.add_argument("--group-sizes", type=int, nargs="+",
+                        default=[1, 8, 64, 512])
+    parser.add_argument("--log-lengths", type=int, nargs="+",
+                        default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print("mutations:")
+    for group_size in args.group_sizes:
+        per_second = measure_mutations(args.mutations, group_size)
+        print(f"  group size {group_size:>5}: "
+              f"{per_second:12,.0f} mutations/sec")
+
+    print("recovery:")
+    for length in args.log_lengths:
+        elapsed = measure_recovery(length, compact=False)
+        print(f"  log of {length:>9,} records: {elapsed * 1000:10.2f} ms")
+    elapsed = measure_recovery(args.log_lengths[-1], compact=True)
+    print(f"  snapshot, empty log:     {elapsed * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
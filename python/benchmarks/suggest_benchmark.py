@@ -0,0 +1,90 @@
+"""Measures the build time and SUGGEST latency of the prefix index.
+
+Titles are drawn like benchmarks.catalog_generator's, so they share long
+prefixes ("Funny cats ...") and short prefixes match a large part of the
+catalog. The latency of the first 10 completions is reported by prefix
+length, next to a scan of the titles for the same prefix, which is what
+a frontend issuing SEARCH_VIDEOS on every keystroke costs. The scan stops
+at its first matches in catalog order, unsorted, which flatters it for
+short prefixes.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.suggest_benchmark --titles 1000000
+"""
+
+import argparse
+import random
+import resource
+import sys
+import time
+from itertools import islice
+
+from benchmarks.catalog_generator import WORDS
+from src.prefix_index import PrefixIndex, fold
+
+
+def make_titles(count, rng):
+    for i in range(count):
+        length = max(1, round(rng.gauss(4.0, 2.0)))
+        title = " ".join(rng.choices(WORDS, k=length)).capitalize()
+        yield f"video_{i:08d}", f"{title} {i}"
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def timed(function, queries):
+    """Returns the sorted latencies of function over queries, in us."""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter_ns()
+        function(query)
+        latencies.append((time.perf_counter_ns() - start) / 1e3)
+    latencies.sort()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    titles = list(make_titles(args.titles, rng))
+
+    index = PrefixIndex()
+    start = time.perf_counter()
+    for video_id, title in titles:
+        index.add(video_id, title)
+    build_seconds = time.perf_counter() - start
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    print(f"{args.titles:,} titles: built in {build_seconds:.1f}s, "
+          f"peak RSS {peak_rss / 2**20:,.0f} MiB")
+
+    folded = [fold(title) for _, title in titles]
+    samples = [rng.choice(titles)[1] for _ in range(args.queries)]
+    for length in (1, 3, 6, 12):
+        prefixes = [title[:length] for title in samples]
+        suggest = timed(
+            lambda prefix: list(islice(index.iter_video_ids(prefix),
+                                       args.limit)), prefixes)
+        # A scan is too slow to run for every query of a large catalog.
+        scan = timed(
+            lambda prefix: list(islice(
+                (title for title in folded if title.startswith(fold(prefix))),
+                args.limit)), prefixes[:20])
+        print(f"prefix of {length:2}: suggest p50 "
+              f"{percentile(suggest, 0.5):8,.1f}us  p99 "
+              f"{percentile(suggest, 0.99):8,.1f}us  |  scan p50 "
+              f"{percentile(scan, 0.5):12,.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Measures the memory used per Video on a synthetic catalog.
+
+"before" is the original Video class, with a per-instance __dict__ and one
+tag string per video; "after" is the slotted src.video.Video fed by the
+streaming loader, which interns tags and shares identical tag tuples.
+
+Usage (from the python/ directory):
+    python3 -m benchmarks.video_memory_benchmark --videos 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+from benchmarks.loader_benchmark import write_catalog
+from src.video import Video
+from src.video_loader import iter_video_rows
+
+
+class DictVideo:
+    """The Video class as it was before __slots__ and interning."""
+
+    def __init__(self, video_title, video_id, video_tags):
+        self._title = video_title
+        self._video_id = video_id
+        self._tags = tuple(video_tags)
+        self.flagged = False
+        self.flag_reason = "Not supplied"
+
+
+def build_before(path):
+    videos = {}
+    with open(path) as video_file:
+        for line in video_file:
+            title, url, tags = (item.strip() for item in line.split("|"))
+            videos[url] = DictVideo(
+                title, url,
+                [tag.strip() for tag in tags.split(",")] if tags else [])
+    return videos
+
+
+def build_after(path):
+    videos = {}
+    for title, url, tags in iter_video_rows(path):
+        videos[url] = Video(title, url, tags)
+    return videos
+
+
+def measure(build, path):
+    tracemalloc.start()
+    videos = build(path)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(videos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "videos.txt")
+        write_catalog(path, args.videos)
+        before = measure(build_before, path)
+        after = measure(build_after, path)
+
+    print(f"{args.videos:,} videos")
+    print(f"before: {before:7.1f} bytes/video")
+    print(f" after: {after:7.1f} bytes/video  ({1 - after / before:.0%} less)")
+
+
+if __name__ == "__main__":
+    main()
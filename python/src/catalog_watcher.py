@@ -0,0 +1,62 @@
+"""A catalog watcher class."""
+
+import threading
+
+from .video_library import catalog_stamp
+
+
+class CatalogWatcher:
+    """A class used to reload a VideoLibrary when its catalog file changes.
+
+    A daemon thread polls the file's size and modification time. A change
+    is only applied once the file has looked the same for a whole
+    interval, so a catalog that is still being written is not loaded
+    half-way, which would drop the missing videos from every playlist.
+    Polling an unchanged catalog costs one stat call per interval.
+    """
+
+    def __init__(self, video_library, interval=1.0, on_reload=None):
+        """The CatalogWatcher class is initialized.
+
+        Args:
+            video_library: The VideoLibrary to reload.
+            interval: Seconds between two polls of the file.
+            on_reload: Optional callable receiving the CatalogDiff of every
+                reload that changed something, on the watcher's thread.
+        """
+        self._video_library = video_library
+        self._interval = interval
+        self._on_reload = on_reload
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts polling the catalog file."""
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="catalog-watcher")
+        self._thread.start()
+
+    def stop(self):
+        """Stops polling and waits for the thread to end."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        seen = None
+        while not self._stopped.wait(self._interval):
+            try:
+                stamp = catalog_stamp(self._video_library.catalog_path)
+            except OSError:
+                # The file may be replaced right now, try again later.
+                seen = None
+                continue
+            if stamp != seen:
+                seen = stamp
+                continue
+            try:
+                diff = self._video_library.reload()
+            except (OSError, ValueError):
+                continue
+            if diff and self._on_reload is not None:
+                self._on_reload(diff)
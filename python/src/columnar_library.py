@@ -0,0 +1,401 @@
+"""A struct-of-arrays video library class."""
+
+from array import array
+from bisect import bisect_right
+from collections import Counter
+import heapq
+from itertools import compress
+import random
+
+from .video import DEFAULT_FLAG_REASON, format_line
+from .video_library import DEFAULT_CATALOG
+from .video_loader import iter_video_rows
+
+# Random rows tried before falling back to a scan of the flag column.
+_RANDOM_ATTEMPTS = 8
+
+# bytes.translate table swapping 0 and 1, turns the flag column into a
+# mask of playable rows.
+_INVERT = bytes([1, 0]) + bytes(range(2, 256))
+
+
+class VideoView:
+    """A class used to represent one row of a ColumnarVideoLibrary.
+
+    It exposes the same properties as Video, reading them from the
+    library's columns.
+    """
+
+    __slots__ = ("_library", "_row")
+
+    def __init__(self, library, row):
+        self._library = library
+        self._row = row
+
+    @property
+    def title(self) -> str:
+        """Returns the title of a video."""
+        return self._library._title(self._row)
+
+    @property
+    def video_id(self) -> str:
+        """Returns the video id of a video."""
+        return self._library._video_id(self._row)
+
+    @property
+    def tags(self):
+        """Returns the tags of a video."""
+        return self._library._tags(self._row)
+
+    def __eq__(self, other):
+        return (isinstance(other, VideoView)
+                and self._library is other._library
+                and self._row == other._row)
+
+    def __hash__(self):
+        return hash(self._row)
+
+    def __lt__(self, other):
+        return self._library._rank[self._row] < other._library._rank[other._row]
+
+    def __repr__(self):
+        # Views are created per access, so the line is not cached.
+        return format_line(self.title, self.video_id, self.tags)
+
+
+class ColumnarVideoLibrary:
+    """A class used to represent a Video Library stored column by column.
+
+    Instead of one Video object per video, the catalog is held in a few
+    flat buffers:
+        titles / video ids  utf-8 blobs with an array of end offsets
+        tags                integer tag codes, flattened, with end offsets
+        flags               one byte per video
+    get_video and get_all_videos hand out VideoView objects which read
+    from these columns, so the library can be used wherever a
+    VideoLibrary is expected for read-only catalogs. Counting, flag
+    filtering and tag membership run over whole columns at C speed
+    (bytes.count, bytes.find, itertools.compress) instead of Python loops.
+    """
+
+    def __init__(self, path=DEFAULT_CATALOG):
+        """The ColumnarVideoLibrary class is initialized.
+
+        Args:
+            path: The text catalog to load, videos.txt by default.
+        """
+        rows = {}
+        for title, video_id, tags in iter_video_rows(path):
+            # Later rows replace earlier ones with the same video_id,
+            # like VideoLibrary does.
+            rows.pop(video_id, None)
+            rows[video_id] = (title, tags)
+        self._build(rows)
+
+    def _build(self, rows):
+        titles = bytearray()
+        folded_titles = bytearray()
+        video_ids = bytearray()
+        self._title_ends = array("Q")
+        self._folded_ends = array("Q")
+        self._video_id_ends = array("Q")
+        self._tag_codes = array("I")
+        self._tag_ends = array("Q")
+        self._tag_names = []
+        tag_code_of = {}
+
+        for video_id, (title, tags) in rows.items():
+            titles += title.encode("utf-8")
+            self._title_ends.append(len(titles))
+            folded_titles += title.upper().encode("utf-8")
+            self._folded_ends.append(len(folded_titles))
+            video_ids += video_id.encode("utf-8")
+            self._video_id_ends.append(len(video_ids))
+            for tag in tags:
+                code = tag_code_of.get(tag)
+                if code is None:
+                    code = tag_code_of[tag] = len(self._tag_names)
+                    self._tag_names.append(tag)
+                self._tag_codes.append(code)
+            self._tag_ends.append(len(self._tag_codes))
+
+        self._titles = bytes(titles)
+        self._folded_titles = bytes(folded_titles)
+        self._video_ids = bytes(video_ids)
+        self._folded_tags = [tag.upper() for tag in self._tag_names]
+        # Row number of every tag occurrence, parallel to _tag_codes.
+        self._tag_rows = array("I")
+        start = 0
+        for row, end in enumerate(self._tag_ends):
+            self._tag_rows.extend([row] * (end - start))
+            start = end
+
+        count = len(rows)
+        self._flags = bytearray(count)
+        self._flag_reasons = {}
+        # Rows sorted by video_id for lookups, and by title for listings.
+        self._by_video_id = array("I", sorted(range(count),
+                                              key=self._video_id_bytes))
+        self._by_title = array("I", sorted(
+            range(count), key=lambda row: (self._title(row),
+                                           self._video_id(row))))
+        self._rank = array("I", [0]) * count
+        for rank, row in enumerate(self._by_title):
+            self._rank[row] = rank
+
+    @staticmethod
+    def _slice(blob, ends, row):
+        return blob[ends[row - 1] if row else 0:ends[row]]
+
+    def _title(self, row):
+        return self._slice(self._titles, self._title_ends, row).decode("utf-8")
+
+    def _video_id_bytes(self, row):
+        return self._slice(self._video_ids, self._video_id_ends, row)
+
+    def _video_id(self, row):
+        return self._video_id_bytes(row).decode("utf-8")
+
+    def _tags(self, row):
+        codes = self._slice(self._tag_codes, self._tag_ends, row)
+        return tuple(map(self._tag_names.__getitem__, codes))
+
+    def _find_row(self, video_id):
+        """Returns the row of video_id, or -1 (binary search)."""
+        key = video_id.encode("utf-8")
+        low, high = 0, len(self._by_video_id)
+        while low < high:
+            middle = (low + high) // 2
+            if self._video_id_bytes(self._by_video_id[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if (low < len(self._by_video_id)
+                and self._video_id_bytes(self._by_video_id[low]) == key):
+            return self._by_video_id[low]
+        return -1
+
+    def snapshot(self):
+        """Returns the library itself.
+
+        Columnar catalogs are read-only apart from the flag column, which
+        is not versioned, so they are meant for single-threaded use.
+        """
+        return self
+
+    def _views(self, rows):
+        return [VideoView(self, row) for row in rows]
+
+    def _in_title_order(self, rows):
+        return self._views(sorted(rows, key=self._rank.__getitem__))
+
+    def __len__(self):
+        return len(self._flags)
+
+    def get_all_videos(self):
+        """Returns all available video information from the video library."""
+        return self._views(range(len(self)))
+
+    def _title_position(self, after):
+        """Returns the title-order position of the first row after a key."""
+        low, high = 0, len(self._by_title)
+        while low < high:
+            middle = (low + high) // 2
+            row = self._by_title[middle]
+            if (self._title(row), self._video_id(row)) <= after:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _iter_in_title_order(self, rows, after):
+        if after is not None:
+            start = self._title_position(after)
+            rows = [row for row in rows if self._rank[row] >= start]
+        ranks = [self._rank[row] for row in rows]
+        heapq.heapify(ranks)
+        while ranks:
+            yield VideoView(self, self._by_title[heapq.heappop(ranks)])
+
+    def iter_videos(self, after=None):
+        """Iterates over all videos in title order.
+
+        Args:
+            after: Optional sort key; only videos listed after it are
+                returned.
+        """
+        start = 0 if after is None else self._title_position(after)
+        return (VideoView(self, self._by_title[position])
+                for position in range(start, len(self._by_title)))
+
+    def get_video(self, video_id):
+        """Returns the video view (title, url, tags) from the video library.
+
+        Args:
+            video_id: The video url.
+
+        Returns:
+            The VideoView for the requested video_id. None if the video
+            does not exist.
+        """
+        row = self._find_row(video_id)
+        return VideoView(self, row) if row >= 0 else None
+
+    def count_flagged(self):
+        """Returns the number of flagged videos."""
+        return self._flags.count(1)
+
+    def playable_rows(self):
+        """Returns the rows of all videos that are not flagged."""
+        return list(compress(range(len(self)), self._flags.translate(_INVERT)))
+
+    def is_flagged(self, video_id):
+        """Returns True if the video with the given video_id is flagged."""
+        row = self._find_row(video_id)
+        return row >= 0 and bool(self._flags[row])
+
+    def get_flag_reason(self, video_id):
+        """Returns the reason a video was flagged for, None if not flagged."""
+        row = self._find_row(video_id)
+        if row < 0 or not self._flags[row]:
+            return None
+        return self._flag_reasons[row]
+
+    def format_video(self, video):
+        """Returns the line a video is listed with, including its flag."""
+        if not self._flags[video._row]:
+            return repr(video)
+        return (f"{video!r} - FLAGGED "
+                f"(reason: {self._flag_reasons[video._row]})")
+
+    def flag_video(self, video_id, flag_reason=None):
+        """Marks a video as flagged, see VideoLibrary.flag_video."""
+        row = self._find_row(video_id)
+        if row < 0:
+            return None
+        self._flags[row] = 1
+        self._flag_reasons[row] = (
+            DEFAULT_FLAG_REASON if flag_reason is None else flag_reason)
+        return VideoView(self, row)
+
+    def allow_video(self, video_id):
+        """Removes the flag from a video, see VideoLibrary.allow_video."""
+        row = self._find_row(video_id)
+        if row < 0:
+            return None
+        self._flags[row] = 0
+        self._flag_reasons.pop(row, None)
+        return VideoView(self, row)
+
+    def get_random_video(self, rng=random):
+        """Returns a random video that is not flagged.
+
+        A few random rows are tried first, which is O(1) unless most of the
+        catalog is flagged; after that the playable rows are collected from
+        the flag column.
+
+        Args:
+            rng: The source of randomness, anything providing randrange.
+
+        Returns:
+            A VideoView. None if every video is flagged.
+        """
+        if not len(self):
+            return None
+        for _ in range(_RANDOM_ATTEMPTS):
+            row = rng.randrange(len(self))
+            if not self._flags[row]:
+                return VideoView(self, row)
+        rows = self.playable_rows()
+        if not rows:
+            return None
+        return VideoView(self, rows[rng.randrange(len(rows))])
+
+    def _tag_rows_for(self, video_tag):
+        folded = video_tag.upper()
+        codes = [code for code, tag in enumerate(self._folded_tags)
+                 if tag == folded]
+        if not codes:
+            return []
+        if len(codes) == 1:
+            mask = map(codes[0].__eq__, self._tag_codes)
+        else:
+            mask = map(set(codes).__contains__, self._tag_codes)
+        return sorted(set(compress(self._tag_rows, mask)))
+
+    def count_with_tag(self, video_tag):
+        """Returns the number of videos carrying video_tag.
+
+        Args:
+            video_tag: The video tag (case-insensitive).
+        """
+        return len(self._tag_rows_for(video_tag))
+
+    def tag_counts(self):
+        """Returns a Counter of how many videos carry each tag."""
+        counts = Counter(self._tag_codes)
+        return Counter({self._tag_names[code]: count
+                        for code, count in counts.items()})
+
+    def search_titles(self, search_term):
+        """Returns all videos whose title contains the search_term.
+
+        The case-folded title column is scanned with bytes.find.
+
+        Args:
+            search_term: The query to be used in search (case-insensitive).
+
+        Returns:
+            A list of matching VideoView objects, in title order.
+            Flagged videos are included.
+        """
+        return self._in_title_order(self._title_rows_for(search_term))
+
+    def _title_rows_for(self, search_term):
+        term = search_term.upper().encode("utf-8")
+        if not term:
+            return range(len(self))
+        rows = []
+        ends = self._folded_ends
+        position = self._folded_titles.find(term)
+        while position >= 0:
+            row = bisect_right(ends, position)
+            if position + len(term) <= ends[row]:
+                rows.append(row)
+                position = ends[row]
+            else:
+                position += 1
+            position = self._folded_titles.find(term, position)
+        return rows
+
+    def search_tag(self, video_tag):
+        """Returns all videos carrying the video_tag.
+
+        Args:
+            video_tag: The video tag to be used in search (case-insensitive).
+
+        Returns:
+            A list of matching VideoView objects, in title order.
+            Flagged videos are included.
+        """
+        return self._in_title_order(self._tag_rows_for(video_tag))
+
+    def iter_search_titles(self, search_term, after=None):
+        """Iterates over the videos whose title contains search_term.
+
+        The matching rows are put in title order as they are consumed.
+
+        Args:
+            search_term: The query to be used in search (case-insensitive).
+            after: Optional sort key; only videos listed after it are
+                returned.
+        """
+        return self._iter_in_title_order(self._title_rows_for(search_term),
+                                         after)
+
+    def iter_search_tag(self, video_tag, after=None):
+        """Iterates over the videos carrying video_tag.
+
+        See iter_search_titles.
+        """
+        return self._iter_in_title_order(self._tag_rows_for(video_tag), after)
@@ -0,0 +1,266 @@
+"""Latency metrics of commands and of the operations inside them.
+
+A CommandParser given a CommandMetrics records, per command, how often it
+ran, how many runs failed and a latency histogram. Histograms use
+HDR-style log-linear buckets: every power of two is split into
+2 ** SUB_BUCKET_BITS buckets, so recording is a few integer operations and
+any percentile is reported within 1 / 2 ** SUB_BUCKET_BITS of the true
+value, from nanoseconds to hours, in a few hundred counters.
+
+Hot operations inside a command are tracked as sub-spans when enabled:
+    with span("title_index.search"):
+        ...
+span() costs a thread-local lookup when no CommandMetrics with spans is
+recording on the current thread.
+"""
+
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+SUB_BUCKET_BITS = 3
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+# Upper bounds, in seconds, of the buckets of the Prometheus export.
+PROMETHEUS_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3,
+                      0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Commands that are not registered are counted under this name, so user
+# input cannot create new metric labels.
+UNKNOWN_COMMAND = "UNKNOWN"
+
+_NULL_SPAN = nullcontext()
+_recording = threading.local()
+
+
+def _bucket_index(value):
+    if value < _SUB_BUCKETS:
+        return value
+    exponent = value.bit_length() - SUB_BUCKET_BITS - 1
+    return (exponent + 1) * _SUB_BUCKETS + (value >> exponent) - _SUB_BUCKETS
+
+
+def _bucket_upper_bound(index):
+    """Returns the largest value counted in the bucket with this index."""
+    if index < _SUB_BUCKETS:
+        return index
+    exponent = index // _SUB_BUCKETS - 1
+    mantissa = index % _SUB_BUCKETS + _SUB_BUCKETS
+    return ((mantissa + 1) << exponent) - 1
+
+
+class LatencyHistogram:
+    """A class used to represent a histogram of latencies in nanoseconds."""
+
+    __slots__ = ("_counts", "count", "total", "max")
+
+    def __init__(self):
+        self._counts = []
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, nanoseconds):
+        """Counts one latency."""
+        index = _bucket_index(nanoseconds)
+        if index >= len(self._counts):
+            self._counts.extend([0] * (index + 1 - len(self._counts)))
+        self._counts[index] += 1
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def percentile(self, fraction):
+        """Returns the latency below which fraction of the values are.
+
+        The value is the upper bound of its bucket, capped at the maximum.
+        """
+        if not self.count:
+            return 0
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_upper_bound(index), self.max)
+        return self.max
+
+    def cumulative_counts(self, upper_bounds):
+        """Returns how many values are <= each of the sorted upper_bounds.
+
+        Values are attributed to a bound by their bucket's upper bound.
+        """
+        counts = []
+        seen = 0
+        index = 0
+        for bound in upper_bounds:
+            while (index < len(self._counts)
+                   and _bucket_upper_bound(index) <= bound):
+                seen += self._counts[index]
+                index += 1
+            counts.append(seen)
+        return counts
+
+
+def span(name):
+    """Returns a context manager timing an operation as a sub-span.
+
+    Args:
+        name: The name of the operation, e.g. "title_index.search".
+    """
+    metrics = getattr(_recording, "metrics", None)
+    if metrics is None:
+        return _NULL_SPAN
+    return _Span(metrics, name)
+
+
+class _Span:
+    __slots__ = ("_metrics", "_name", "_start")
+
+    def __init__(self, metrics, name):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info):
+        self._metrics.record_span(self._name,
+                                  time.perf_counter_ns() - self._start)
+
+
+def _format_duration(nanoseconds):
+    if nanoseconds < 1_000_000:
+        return f"{nanoseconds / 1000:.1f}us"
+    return f"{nanoseconds / 1_000_000:.1f}ms"
+
+
+class CommandMetrics:
+    """A class used to collect the latency metrics of a CommandParser."""
+
+    def __init__(self, spans=False):
+        """The CommandMetrics class is initialized.
+
+        Args:
+            spans: Whether operations wrapped in span() are recorded while
+                a command runs.
+        """
+        self._spans_enabled = spans
+        self._commands = {}
+        self._errors = {}
+        self._spans = {}
+
+    def start_command(self):
+        """Returns the start time of a command and starts its spans."""
+        if self._spans_enabled:
+            _recording.metrics = self
+        return time.perf_counter_ns()
+
+    def end_command(self, name, start, failed=False):
+        """Records a command that started at start.
+
+        Args:
+            name: The command name.
+            start: The value returned by start_command.
+            failed: Whether the command raised an exception.
+        """
+        elapsed = time.perf_counter_ns() - start
+        if self._spans_enabled:
+            _recording.metrics = None
+        histogram = self._commands.get(name)
+        if histogram is None:
+            histogram = self._commands[name] = LatencyHistogram()
+        histogram.record(elapsed)
+        if failed:
+            self._errors[name] = self._errors.get(name, 0) + 1
+
+    def record_span(self, name, nanoseconds):
+        """Records the duration of one sub-span."""
+        histogram = self._spans.get(name)
+        if histogram is None:
+            histogram = self._spans[name] = LatencyHistogram()
+        histogram.record(nanoseconds)
+
+    def command_histogram(self, name):
+        """Returns the LatencyHistogram of a command, None if it never ran."""
+        return self._commands.get(name)
+
+    def span_histogram(self, name):
+        """Returns the LatencyHistogram of a span, None if never recorded."""
+        return self._spans.get(name)
+
+    def error_count(self, name):
+        """Returns how many runs of a command failed."""
+        return self._errors.get(name, 0)
+
+    def format_stats(self):
+        """Returns the lines shown by the STATS command."""
+        lines = ["Command statistics:"]
+        if not self._commands:
+            lines.append("    No commands recorded yet")
+        for name in sorted(self._commands):
+            lines.append(self._format_histogram(
+                name, self._commands[name], self.error_count(name)))
+        if self._spans:
+            lines.append("Span statistics:")
+            for name in sorted(self._spans):
+                lines.append(self._format_histogram(name, self._spans[name]))
+        return lines
+
+    @staticmethod
+    def _format_histogram(name, histogram, errors=None):
+        line = f"    {name}: count {histogram.count}"
+        if errors is not None:
+            line += f", errors {errors}"
+        return (f"{line}, p50 {_format_duration(histogram.percentile(0.5))}"
+                f", p99 {_format_duration(histogram.percentile(0.99))}"
+                f", max {_format_duration(histogram.max)}")
+
+    def to_prometheus(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = []
+        self._append_histograms(
+            lines, "youtube_command_duration_seconds", "command",
+            self._commands, "Time taken to execute a command.")
+        lines.append("# HELP youtube_command_errors_total "
+                     "Commands that failed.")
+        lines.append("# TYPE youtube_command_errors_total counter")
+        for name in sorted(self._commands):
+            lines.append(f'youtube_command_errors_total{{command="{name}"}} '
+                         f"{self.error_count(name)}")
+        if self._spans:
+            self._append_histograms(
+                lines, "youtube_span_duration_seconds", "span", self._spans,
+                "Time taken by an operation inside a command.")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _append_histograms(lines, metric, label, histograms, help_text):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        bounds = [round(bound * 1e9) for bound in PROMETHEUS_BUCKETS]
+        for name in sorted(histograms):
+            histogram = histograms[name]
+            counts = histogram.cumulative_counts(bounds)
+            for bound, count in zip(PROMETHEUS_BUCKETS, counts):
+                lines.append(f'{metric}_bucket{{{label}="{name}",'
+                             f'le="{bound}"}} {count}')
+            lines.append(f'{metric}_bucket{{{label}="{name}",le="+Inf"}} '
+                         f"{histogram.count}")
+            lines.append(f'{metric}_sum{{{label}="{name}"}} '
+                         f"{histogram.total / 1e9}")
+            lines.append(f'{metric}_count{{{label}="{name}"}} '
+                         f"{histogram.count}")
+
+    def write_prometheus(self, path):
+        """Writes to_prometheus() to a file, replacing it atomically.
+
+        Collectors reading the file, like node_exporter's textfile
+        collector, never see a partly written dump.
+        """
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as metrics_file:
+            metrics_file.write(self.to_prometheus())
+        os.replace(temporary_path, path)
@@ -1,7 +1,8 @@
 """A command parser class."""
 
-import textwrap
-from typing import Sequence
+from typing import Callable, Optional, Sequence
+
+from .command_metrics import UNKNOWN_COMMAND
 
 
 class CommandException(Exception):
@@ -9,155 +10,249 @@ class CommandException(Exception):
     pass
 
 
+class CommandSpec:
+    """A class used to describe how a command is executed.
+
+    Attributes:
+        handler: Called with the command's arguments.
+        arity: The number of required arguments.
+        optional: The number of optional arguments after the required ones.
+        error_message: The CommandException message raised when the number
+            of arguments is wrong. If None, arguments are not checked and
+            the handler is called without any.
+        help_text: The line shown for the command by HELP.
+    """
+
+    __slots__ = ("handler", "arity", "optional", "error_message", "help_text")
+
+    def __init__(self, handler: Callable, arity: int = 0, optional: int = 0,
+                 error_message: Optional[str] = None, help_text: str = ""):
+        self.handler = handler
+        self.arity = arity
+        self.optional = optional
+        self.error_message = error_message
+        self.help_text = help_text
+
+
 class CommandParser:
     """A class used to parse and execute a user Command."""
 
-    def __init__(self, video_player):
+    def __init__(self, video_player, output=None, metrics=None):
+        """The CommandParser class is initialized.
+
+        Args:
+            video_player: The VideoPlayer commands are executed on.
+            output: The OutputSink to write to, the player's by default.
+                Each command's output is flushed when the command ends.
+            metrics: Optional CommandMetrics recording the latency of
+                every command. The STATS command is only available with it.
+        """
         self._player = video_player
+        self._output = video_player.output if output is None else output
+        self._metrics = metrics
+        self._commands = {}
+        self._register_default_commands()
+
+    def _register_default_commands(self):
+        player = self._player
+        self.register_command(
+            "NUMBER_OF_VIDEOS", player.number_of_videos,
+            help_text="Shows how many videos are in the library.")
+        self.register_command(
+            "SHOW_ALL_VIDEOS", player.show_all_videos, optional=2,
+            error_message="Please enter SHOW_ALL_VIDEOS command followed by "
+                          "an optional page size and cursor.",
+            help_text="[page_size] [cursor] - Lists all videos from the "
+                      "library, page_size at a time.")
+        self.register_command(
+            "PLAY", player.play_video, arity=1,
+            error_message="Please enter PLAY command followed by video_id.",
+            help_text="<video_id> - Plays specified video.")
+        self.register_command(
+            "PLAY_RANDOM", player.play_random_video,
+            help_text="Plays a random video from the library.")
+        self.register_command(
+            "STOP", player.stop_video,
+            help_text="Stop the current video.")
+        self.register_command(
+            "PAUSE", player.pause_video,
+            help_text="Pause the current video.")
+        self.register_command(
+            "CONTINUE", player.continue_video,
+            help_text="Resume the current paused video.")
+        self.register_command(
+            "SHOW_PLAYING", player.show_playing,
+            help_text="Displays the title, url and paused status of the "
+                      "video that is currently playing (or paused).")
+        self.register_command(
+            "CREATE_PLAYLIST", player.create_playlist, arity=1,
+            error_message="Please enter CREATE_PLAYLIST command followed by "
+                          "a playlist name.",
+            help_text="<playlist_name> - Creates a new (empty) playlist with "
+                      "the provided name.")
+        self.register_command(
+            "ADD_TO_PLAYLIST", player.add_to_playlist, arity=2,
+            error_message="Please enter ADD_TO_PLAYLIST command followed by "
+                          "a playlist name and video_id to add.",
+            help_text="<playlist_name> <video_id> - Adds the requested video "
+                      "to the playlist.")
+        self.register_command(
+            "REMOVE_FROM_PLAYLIST", player.remove_from_playlist, arity=2,
+            error_message="Please enter REMOVE_FROM_PLAYLIST command followed "
+                          "by a playlist name and video_id to remove.",
+            help_text="<playlist_name> <video_id> - Removes the specified "
+                      "video from the specified playlist")
+        self.register_command(
+            "CLEAR_PLAYLIST", player.clear_playlist, arity=1,
+            error_message="Please enter CLEAR_PLAYLIST command followed by a "
+                          "playlist name.",
+            help_text="<playlist_name> - Removes all the videos from the "
+                      "playlist.")
+        self.register_command(
+            "DELETE_PLAYLIST", player.delete_playlist, arity=1,
+            error_message="Please enter DELETE_PLAYLIST command followed by a "
+                          "playlist name.",
+            help_text="<playlist_name> - Deletes the playlist.")
+        self.register_command(
+            "SHOW_PLAYLIST", player.show_playlist, arity=1,
+            error_message="Please enter SHOW_PLAYLIST command followed by a "
+                          "playlist name.",
+            help_text="<playlist_name> - List all the videos in this "
+                      "playlist.")
+        self.register_command(
+            "SHOW_ALL_PLAYLISTS", player.show_all_playlists,
+            help_text="Display all the available playlists.")
+        self.register_command(
+            "SEARCH_VIDEOS", player.search_videos, arity=1, optional=2,
+            error_message="Please enter SEARCH_VIDEOS command followed by a "
+                          "search term and an optional page size and "
+                          "cursor.",
+            help_text="<search_term> [page_size] [cursor] - Display all the "
+                      "videos whose titles contain the search_term.")
+        self.register_command(
+            "SEARCH_VIDEOS_WITH_TAG", player.search_videos_tag, arity=1,
+            optional=2,
+            error_message="Please enter SEARCH_VIDEOS_WITH_TAG command "
+                          "followed by a video tag and an optional page size "
+                          "and cursor.",
+            help_text="<tag_name> [page_size] [cursor] -Display all videos "
+                      "whose tags contains the provided tag.")
+        self.register_command(
+            "FUZZY_SEARCH_VIDEOS", player.fuzzy_search_videos, arity=1,
+            error_message="Please enter FUZZY_SEARCH_VIDEOS command followed "
+                          "by a search term.",
+            help_text="<search_term> - Display the videos whose titles best "
+                      "match the search_term, tolerating typos.")
+        self.register_command(
+            "SUGGEST", player.suggest, arity=1, optional=1,
+            error_message="Please enter SUGGEST command followed by a "
+                          "prefix and an optional count.",
+            help_text="<prefix> [count] - Display the videos whose title or "
+                      "video_id starts with the prefix.")
+        self.register_command(
+            "FLAG_VIDEO", player.flag_video, arity=1, optional=1,
+            error_message="Please enter FLAG_VIDEO command followed by a "
+                          "video_id and an optional flag reason.",
+            help_text="<video_id> <flag_reason> - Mark a video as flagged.")
+        self.register_command(
+            "ALLOW_VIDEO", player.allow_video, arity=1,
+            error_message="Please enter ALLOW_VIDEO command followed by a "
+                          "video_id.",
+            help_text="<video_id> - Removes a flag from a video.")
+        self.register_command(
+            "RELOAD_LIBRARY", player.reload_library,
+            help_text="Reloads the video catalog file, applying only the "
+                      "videos that were added, removed or changed.")
+        if self._metrics is not None:
+            self.register_command(
+                "STATS", self._show_stats, optional=1,
+                error_message="Please enter STATS command followed by an "
+                              "optional file name.",
+                help_text="[file_name] - Shows the latency of every command "
+                          "or writes it to a file in the Prometheus format.")
+        self.register_command(
+            "HELP", self._get_help, help_text="Displays help.")
+
+    def register_command(self, name: str, handler: Callable, arity: int = 0,
+                         optional: int = 0,
+                         error_message: Optional[str] = None,
+                         help_text: str = ""):
+        """Registers a command, replacing any command with the same name.
+
+        Args:
+            name: The command name, matched case-insensitively.
+            handler: Called with the command's arguments.
+            arity: The number of required arguments.
+            optional: The number of optional arguments.
+            error_message: Raised as a CommandException when the number of
+                arguments is wrong. If None, arguments are ignored.
+            help_text: The description shown by HELP. It may start with the
+                argument names, e.g. "<video_id> - Plays specified video.".
+        """
+        self._commands[name.upper()] = CommandSpec(
+            handler, arity, optional, error_message, help_text)
+
+    def command_names(self):
+        """Returns the names of the registered commands, in HELP order."""
+        return list(self._commands)
 
     def execute_command(self, command: Sequence[str]):
         """Executes the user command. Expects the command to be upper case.
            Raises CommandException if a command cannot be parsed.
         """
+        if self._metrics is None:
+            self._execute(command)
+            return
+        name = command[0].upper() if command else UNKNOWN_COMMAND
+        if name not in self._commands:
+            name = UNKNOWN_COMMAND
+        start = self._metrics.start_command()
+        try:
+            self._execute(command)
+        except BaseException:
+            self._metrics.end_command(name, start, failed=True)
+            raise
+        self._metrics.end_command(name, start)
+
+    def _execute(self, command):
         if not command:
             raise CommandException(
                 "Please enter a valid command, "
                 "type HELP for a list of available commands.")
 
-        if command[0].upper() == "NUMBER_OF_VIDEOS":
-            self._player.number_of_videos()
-
-        elif command[0].upper() == "SHOW_ALL_VIDEOS":
-            self._player.show_all_videos()
-
-        elif command[0].upper() == "PLAY":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter PLAY command followed by video_id.")
-            self._player.play_video(command[1])
-
-        elif command[0].upper() == "PLAY_RANDOM":
-            self._player.play_random_video()
-
-        elif command[0].upper() == "STOP":
-            self._player.stop_video()
-
-        elif command[0].upper() == "PAUSE":
-            self._player.pause_video()
-
-        elif command[0].upper() == "CONTINUE":
-            self._player.continue_video()
-
-        elif command[0].upper() == "SHOW_PLAYING":
-            self._player.show_playing()
-
-        elif command[0].upper() == "CREATE_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter CREATE_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.create_playlist(command[1])
-
-        elif command[0].upper() == "ADD_TO_PLAYLIST":
-            if len(command) != 3:
-                raise CommandException(
-                    "Please enter ADD_TO_PLAYLIST command followed by a "
-                    "playlist name and video_id to add.")
-            self._player.add_to_playlist(command[1], command[2])
-
-        elif command[0].upper() == "REMOVE_FROM_PLAYLIST":
-            if len(command) != 3:
-                raise CommandException(
-                    "Please enter REMOVE_FROM_PLAYLIST command followed by a "
-                    "playlist name and video_id to remove.")
-            self._player.remove_from_playlist(command[1], command[2])
-
-        elif command[0].upper() == "CLEAR_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter CLEAR_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.clear_playlist(command[1])
-
-        elif command[0].upper() == "DELETE_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter DELETE_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.delete_playlist(command[1])
-
-        elif command[0].upper() == "SHOW_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SHOW_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.show_playlist(command[1])
-
-        elif command[0].upper() == "SHOW_ALL_PLAYLISTS":
-            self._player.show_all_playlists()
-
-        elif command[0].upper() == "SEARCH_VIDEOS":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SEARCH_VIDEOS command followed by a "
-                    "search term.")
-            self._player.search_videos(command[1])
-
-        elif command[0].upper() == "SEARCH_VIDEOS_WITH_TAG":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a "
-                    "video tag.")
-            self._player.search_videos_tag(command[1])
-
-        elif command[0].upper() == "FLAG_VIDEO":
-            if len(command) == 3:
-                self._player.flag_video(command[1], command[2])
-            elif len(command) == 2:
-                self._player.flag_video(command[1])
-            else:
-                raise CommandException(
-                    "Please enter FLAG_VIDEO command followed by a "
-                    "video_id and an optional flag reason.")
-
-        elif command[0].upper() == "ALLOW_VIDEO":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter ALLOW_VIDEO command followed by a "
-                    "video_id.")
-            self._player.allow_video(command[1])
-
-        elif command[0].upper() == "HELP":
-            self._get_help()
-        else:
-            print(
+        spec = self._commands.get(command[0].upper())
+        if spec is None:
+            self._output.write_line(
                 "Please enter a valid command, type HELP for a list of "
                 "available commands.")
+            return
+
+        if spec.error_message is None:
+            with self._output.command():
+                spec.handler()
+            return
+
+        num_args = len(command) - 1
+        if not spec.arity <= num_args <= spec.arity + spec.optional:
+            raise CommandException(spec.error_message)
+        with self._output.command():
+            spec.handler(*command[1:])
+
+    def _show_stats(self, file_name=None):
+        """Displays the command metrics or writes them to file_name."""
+        if file_name is None:
+            self._output.write_line("\n".join(self._metrics.format_stats()))
+            return
+        self._metrics.write_prometheus(file_name)
+        self._output.write_line(f"Wrote metrics to {file_name}")
 
     def _get_help(self):
         """Displays all available commands to the user."""
-        help_text = textwrap.dedent("""
-        Available commands:
-            NUMBER_OF_VIDEOS - Shows how many videos are in the library.
-            SHOW_ALL_VIDEOS - Lists all videos from the library.
-            PLAY <video_id> - Plays specified video.
-            PLAY_RANDOM - Plays a random video from the library.
-            STOP - Stop the current video.
-            PAUSE - Pause the current video.
-            CONTINUE - Resume the current paused video.
-            SHOW_PLAYING - Displays the title, url and paused status of the video that is currently playing (or paused).
-            CREATE_PLAYLIST <playlist_name> - Creates a new (empty) playlist with the provided name.
-            ADD_TO_PLAYLIST <playlist_name> <video_id> - Adds the requested video to the playlist.
-            REMOVE_FROM_PLAYLIST <playlist_name> <video_id> - Removes the specified video from the specified playlist
-            CLEAR_PLAYLIST <playlist_name> - Removes all the videos from the playlist.
-            DELETE_PLAYLIST <playlist_name> - Deletes the playlist.
-            SHOW_PLAYLIST <playlist_name> - List all the videos in this playlist.
-            SHOW_ALL_PLAYLISTS - Display all the available playlists.
-            SEARCH_VIDEOS <search_term> - Display all the videos whose titles contain the search_term.
-            SEARCH_VIDEOS_WITH_TAG <tag_name> -Display all videos whose tags contains the provided tag.
-            FLAG_VIDEO <video_id> <flag_reason> - Mark a video as flagged.
-            ALLOW_VIDEO <video_id> - Removes a flag from a video.
-            HELP - Displays help.
-            EXIT - Terminates the program execution.
-        """)
-        print(help_text)
+        lines = ["", "Available commands:"]
+        for name, spec in self._commands.items():
+            takes_arguments = spec.help_text.startswith(("<", "["))
+            separator = " " if takes_arguments else " - "
+            lines.append(f"    {name}{separator}{spec.help_text}")
+        lines.append("    EXIT - Terminates the program execution.")
+        lines.append("")
+        self._output.write_line("\n".join(lines))
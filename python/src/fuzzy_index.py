@@ -0,0 +1,262 @@
+"""A typo-tolerant title word index class."""
+
+import heapq
+import re
+
+from .shared_map import SharedMap
+
+# Case-folded title words: runs of letters and digits.
+_WORD = re.compile(r"[^\W_]+")
+
+# Edit distance allowed for a word: none up to 2 characters, 1 up to 5,
+# then MAX_DISTANCE.
+MAX_DISTANCE = 2
+
+
+def allowed_distance(word):
+    """Returns the number of typos tolerated in a folded word."""
+    if len(word) <= 2:
+        return 0
+    if len(word) <= 5:
+        return 1
+    return MAX_DISTANCE
+
+
+def title_words(title):
+    """Returns the folded words of a title the index matches against.
+
+    Only words containing a letter are kept, numbers like episode
+    numbers are not worth correcting and would bloat the index.
+    """
+    return tuple(word for word in _WORD.findall(title.upper())
+                 if not word.isdigit())
+
+
+def _deletes(word, distance):
+    """Returns word and all strings made by deleting up to distance chars."""
+    deletes = {word}
+    layer = {word}
+    for _ in range(distance):
+        layer = {variant[:i] + variant[i + 1:]
+                 for variant in layer for i in range(len(variant))}
+        deletes |= layer
+    return deletes
+
+
+def edit_distance(a, b, limit):
+    """Returns the optimal string alignment distance of a and b.
+
+    Adjacent transpositions count as one edit. Only the cells within
+    limit of the diagonal are computed, and the computation stops as soon
+    as the distance is known to exceed limit; limit + 1 is returned then.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > limit:
+        return limit + 1
+    # A common prefix or suffix does not change the distance.
+    start = 0
+    while start < len(a) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a = a[start:end_a]
+    b = b[start:end_b]
+    if not a:
+        return min(len(b), limit + 1)
+
+    too_far = limit + 1
+    previous2 = None
+    previous = [min(j, too_far) for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [too_far] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        row_min = current[0]
+        char = a[i - 1]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cost = previous[j - 1] + (char != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            if (i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1]
+                    and previous2[j - 2] + 1 < cost):
+                cost = previous2[j - 2] + 1
+            current[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > limit:
+            return too_far
+        previous2, previous = previous, current
+    return min(previous[-1], too_far)
+
+
+class FuzzyIndex:
+    """A class used to represent a typo-tolerant index of title words.
+
+    It follows SymSpell: every distinct title word is stored under all
+    the strings made by deleting up to allowed_distance(word) characters
+    from it. Two words within edit distance d of each other always share
+    such a delete, so the words similar to a query word are found with a
+    few dict lookups over the query's own deletes, whatever the size of
+    the catalog, and only those candidates are compared with
+    edit_distance.
+    """
+
+    def __init__(self):
+        # Videos carrying each word.
+        self._postings = SharedMap()
+        # Words stored under each delete.
+        self._deletes = SharedMap()
+        # The folded words of every video, by video_id.
+        self._words = SharedMap()
+        # Keys whose set belongs to this index, None if all do. Sets of
+        # other keys may be shared with the index this one was copied from.
+        self._owned_postings = None
+        self._owned_deletes = None
+
+    def copy(self):
+        """Returns a copy sharing the posting and delete sets with this one.
+
+        A shared set is only copied when the copy modifies it, and the
+        maps holding them are SharedMaps.
+        """
+        index = FuzzyIndex()
+        index._postings = self._postings.copy()
+        index._deletes = self._deletes.copy()
+        index._words = self._words.copy()
+        index._owned_postings = set()
+        index._owned_deletes = set()
+        self._owned_postings = set()
+        self._owned_deletes = set()
+        return index
+
+    @staticmethod
+    def _own(sets, owned, key):
+        """Returns the set of key, owned by the index, creating it."""
+        value = sets.get(key)
+        if value is None:
+            value = sets[key] = set()
+        elif owned is not None and key not in owned:
+            value = sets[key] = set(value)
+        if owned is not None:
+            owned.add(key)
+        return value
+
+    def add(self, video_id, title):
+        """Indexes the words of a title under the given video_id.
+
+        Args:
+            video_id: The video url.
+            title: The video title.
+        """
+        if video_id in self._words:
+            self.remove(video_id)
+        words = self._words[video_id] = title_words(title)
+        for word in set(words):
+            if word not in self._postings:
+                for delete in _deletes(word, allowed_distance(word)):
+                    self._own(self._deletes, self._owned_deletes,
+                              delete).add(word)
+            self._own(self._postings, self._owned_postings, word).add(
+                video_id)
+
+    def remove(self, video_id):
+        """Removes a video_id from the index, if present.
+
+        Args:
+            video_id: The video url.
+        """
+        words = self._words.pop(video_id, None)
+        if words is None:
+            return
+        for word in set(words):
+            posting = self._own(self._postings, self._owned_postings, word)
+            posting.discard(video_id)
+            if posting:
+                continue
+            del self._postings[word]
+            for delete in _deletes(word, allowed_distance(word)):
+                stored = self._own(self._deletes, self._owned_deletes, delete)
+                stored.discard(word)
+                if not stored:
+                    del self._deletes[delete]
+
+    def similar_words(self, word):
+        """Returns {indexed word: edit distance} of the words close to word.
+
+        A pair of words matches when its distance is within the allowed
+        distance of both words.
+
+        Args:
+            word: A folded query word.
+        """
+        distance = allowed_distance(word)
+        matches = {}
+        for delete in _deletes(word, distance):
+            for candidate in self._deletes.get(delete, ()):
+                if candidate in matches:
+                    continue
+                limit = min(distance, allowed_distance(candidate))
+                matches[candidate] = edit_distance(word, candidate, limit)
+                if matches[candidate] > limit:
+                    matches[candidate] = None
+        return {candidate: found for candidate, found in matches.items()
+                if found is not None}
+
+    def search(self, search_term):
+        """Iterates over the ids of the matching videos, best first.
+
+        A video matches when each word of search_term is close to one of
+        its title words, see similar_words. Videos are ranked by the
+        total edit distance, then by how few other words their title
+        has, then by their folded title and video_id. The ranking is a
+        heap, so the first results are found in time linear in the
+        number of matches.
+
+        Args:
+            search_term: The query, words are separated by spaces or
+                underscores.
+        """
+        query = title_words(search_term)
+        similar = []
+        for word in query:
+            matches = self.similar_words(word)
+            if not matches:
+                return iter(())
+            similar.append(matches)
+        if not similar:
+            return iter(())
+        # Start from the query word with the fewest candidate videos.
+        similar.sort(key=lambda matches: sum(
+            len(self._postings[word]) for word in matches))
+
+        first, others = similar[0], similar[1:]
+        distances = {}
+        for word, distance in first.items():
+            for video_id in self._postings[word]:
+                if distances.get(video_id, distance + 1) > distance:
+                    distances[video_id] = distance
+        ranked = []
+        for video_id, distance in distances.items():
+            words = self._words[video_id]
+            for matches in others:
+                best = min((matches[word] for word in words
+                            if word in matches), default=None)
+                if best is None:
+                    break
+                distance += best
+            else:
+                ranked.append((distance, len(words) - len(query), words,
+                               video_id))
+        heapq.heapify(ranked)
+        return _pop_all(ranked)
+
+
+def _pop_all(heap):
+    """Yields the video ids of a heap of ranked entries in order."""
+    while heap:
+        yield heapq.heappop(heap)[3]
@@ -0,0 +1,336 @@
+"""A library snapshot class."""
+
+from itertools import islice
+from operator import attrgetter
+
+from .command_metrics import span
+from .fuzzy_index import FuzzyIndex
+from .video import DEFAULT_FLAG_REASON
+from .video_catalog import MappedCatalog
+from .ngram_index import NgramIndex
+from .prefix_index import PrefixIndex
+from .shared_map import SharedMap
+from .tag_index import TagIndex
+from .sorted_index import SortedVideoIndex, iter_in_order, sort_key
+
+
+class LibrarySnapshot:
+    """A class used to represent one version of a VideoLibrary's state.
+
+    A snapshot bundles the catalog, the flags and the indexes. Once a
+    VideoLibrary has published a snapshot it is never modified again, so
+    any number of threads can read it without locks while a writer
+    prepares the next version. Versions share whatever did not change:
+    the catalog and the flags are SharedMaps and the title order a chunked
+    SortedVideoIndex, so a write copies only the chunks it touches, and
+    the indexes copy only the posting lists it touches.
+    """
+
+    def __init__(self, version, videos, flag_reasons, title_index=None,
+                 tag_index=None, sorted_videos=None):
+        self._version = version
+        # Incremented by every write adding, replacing or removing videos.
+        self._catalog_version = 0
+        self._videos = videos
+        # Reasons of the flagged videos, by video_id.
+        self._flag_reasons = flag_reasons
+        self._title_index = title_index
+        self._tag_index = tag_index
+        # None while the videos are a MappedCatalog, which is title-ordered.
+        self._sorted_videos = sorted_videos
+        # Built by the first fuzzy search, then kept up to date by writers.
+        self._fuzzy_index = None
+        # Built by the first suggestion, then kept up to date by writers.
+        self._prefix_index = None
+
+    @property
+    def version(self):
+        """Returns the version number, incremented by every write."""
+        return self._version
+
+    @property
+    def catalog_version(self):
+        """Returns the number of writes that changed the catalog so far.
+
+        Sessions holding videos compare it to know when to refresh them.
+        """
+        return self._catalog_version
+
+    def _search_indexes(self):
+        """Returns the title and tag indexes, building them if needed.
+
+        Only snapshots of a memory-mapped catalog build them lazily. Two
+        readers may race to build them; both build the same indexes.
+        """
+        if self._tag_index is None:
+            # In video_id order the tag posting lists come out sorted,
+            # whatever order the catalog map iterates in.
+            videos = sorted(self._videos.values(),
+                            key=attrgetter("video_id"))
+            title_index = NgramIndex()
+            for video in videos:
+                title_index.add(video.video_id, video.title)
+            tag_index = TagIndex(videos)
+            self._title_index = title_index
+            self._tag_index = tag_index
+        return self._title_index, self._tag_index
+
+    def _fuzzy(self):
+        """Returns the fuzzy title index, building it if needed.
+
+        Two readers may race to build it; both build the same index.
+        """
+        if self._fuzzy_index is None:
+            fuzzy_index = FuzzyIndex()
+            for video in self._videos.values():
+                fuzzy_index.add(video.video_id, video.title)
+            self._fuzzy_index = fuzzy_index
+        return self._fuzzy_index
+
+    def _prefixes(self):
+        """Returns the title and video_id prefix index, building it if needed.
+
+        Two readers may race to build it; both build the same index.
+        """
+        if self._prefix_index is None:
+            prefix_index = PrefixIndex()
+            for video in self._videos.values():
+                prefix_index.add(video.video_id, video.title)
+            self._prefix_index = prefix_index
+        return self._prefix_index
+
+    def _draft(self, catalog=False):
+        """Returns an unpublished copy of this snapshot for a writer.
+
+        Args:
+            catalog: Whether the writer will add or remove videos. If not,
+                the draft shares the catalog and indexes with this snapshot.
+        """
+        if not catalog:
+            draft = LibrarySnapshot(
+                self._version + 1, self._videos, self._flag_reasons.copy(),
+                self._title_index, self._tag_index, self._sorted_videos)
+            draft._catalog_version = self._catalog_version
+            draft._fuzzy_index = self._fuzzy_index
+            draft._prefix_index = self._prefix_index
+            return draft
+        if isinstance(self._videos, MappedCatalog):
+            videos = SharedMap(self._videos)
+            draft = LibrarySnapshot(self._version + 1, videos,
+                                    self._flag_reasons.copy())
+            draft._search_indexes()
+            draft._sorted_videos = SortedVideoIndex(videos.values())
+        else:
+            title_index, tag_index = self._search_indexes()
+            draft = LibrarySnapshot(
+                self._version + 1, self._videos.copy(),
+                self._flag_reasons.copy(), title_index.copy(),
+                tag_index.copy(), self._sorted_videos.copy())
+        draft._catalog_version = self._catalog_version + 1
+        if self._fuzzy_index is not None:
+            draft._fuzzy_index = self._fuzzy_index.copy()
+        if self._prefix_index is not None:
+            draft._prefix_index = self._prefix_index.copy()
+        return draft
+
+    def _add(self, video):
+        """Adds a video to a draft, replacing one with the same video_id."""
+        self._remove(video.video_id)
+        self._videos[video.video_id] = video
+        self._title_index.add(video.video_id, video.title)
+        self._tag_index.add(video.video_id, video.tags)
+        self._sorted_videos.insert(video)
+        if self._fuzzy_index is not None:
+            self._fuzzy_index.add(video.video_id, video.title)
+        if self._prefix_index is not None:
+            self._prefix_index.add(video.video_id, video.title)
+
+    def _remove(self, video_id):
+        """Removes a video from a draft, returns it or None."""
+        video = self._videos.pop(video_id, None)
+        if video is not None:
+            self._title_index.remove(video_id)
+            self._tag_index.remove(video_id, video.tags)
+            self._sorted_videos.remove(video)
+            self._flag_reasons.pop(video_id, None)
+            if self._fuzzy_index is not None:
+                self._fuzzy_index.remove(video_id)
+            if self._prefix_index is not None:
+                self._prefix_index.remove(video_id, video.title)
+        return video
+
+    def _flag(self, video_id, flag_reason):
+        """Flags a video in a draft."""
+        self._flag_reasons[video_id] = (
+            DEFAULT_FLAG_REASON if flag_reason is None else flag_reason)
+
+    def _allow(self, video_id):
+        """Removes the flag of a video in a draft."""
+        self._flag_reasons.pop(video_id, None)
+
+    def _replace_flags(self, flag_reasons):
+        """Replaces every flag of a draft, ignoring unknown video ids."""
+        self._flag_reasons = SharedMap(
+            (video_id, reason) for video_id, reason in flag_reasons.items()
+            if video_id in self._videos)
+
+    def _video_ids(self):
+        """Iterates over the video_ids of all videos, in no particular order."""
+        return iter(self._videos)
+
+    def __len__(self):
+        return len(self._videos)
+
+    def get_all_videos(self):
+        """Returns all videos, in no particular order."""
+        return list(self._videos.values())
+
+    def iter_videos(self, after=None):
+        """Iterates over all videos in title order without copying them.
+
+        Ties between equal titles are broken by video_id.
+
+        Args:
+            after: Optional sort key, see sorted_index.decode_cursor. Only
+                videos listed after it are returned, the first of them
+                found in O(log n).
+        """
+        if self._sorted_videos is None:
+            return self._videos.iter_sorted(after)
+        return self._sorted_videos.iter_after(after)
+
+    def get_video(self, video_id):
+        """Returns the Video for video_id, None if it does not exist."""
+        return self._videos.get(video_id, None)
+
+    def is_flagged(self, video_id):
+        """Returns True if the video with the given video_id is flagged."""
+        return video_id in self._flag_reasons
+
+    def get_flag_reason(self, video_id):
+        """Returns the reason a video was flagged for, None if not flagged."""
+        return self._flag_reasons.get(video_id)
+
+    def iter_flags(self):
+        """Iterates over (video_id, flag_reason) of all flagged videos."""
+        return iter(self._flag_reasons.items())
+
+    def format_video(self, video):
+        """Returns the line a video is listed with, including its flag.
+
+        Args:
+            video: A Video object of this snapshot.
+        """
+        flag_reason = self._flag_reasons.get(video.video_id)
+        if flag_reason is None:
+            return repr(video)
+        return f"{video!r} - FLAGGED (reason: {flag_reason})"
+
+    def search_titles(self, search_term):
+        """Returns all videos whose title contains the search_term.
+
+        The lookup goes through the title n-gram index, so only candidate
+        titles are compared against the search_term.
+
+        Args:
+            search_term: The query to be used in search (case-insensitive).
+
+        Returns:
+            A list of matching Video objects, in title order.
+            Flagged videos are included.
+        """
+        title_index, _ = self._search_indexes()
+        with span("title_index.search"):
+            video_ids = title_index.search(search_term)
+        videos = [self._videos[video_id] for video_id in video_ids]
+        with span("search.sort"):
+            videos.sort(key=sort_key)
+        return videos
+
+    def search_tag(self, video_tag):
+        """Returns all videos carrying the video_tag.
+
+        Args:
+            video_tag: The video tag to be used in search (case-insensitive).
+
+        Returns:
+            A list of matching Video objects, in title order.
+            Flagged videos are included.
+        """
+        _, tag_index = self._search_indexes()
+        with span("tag_index.get"):
+            video_ids = tag_index.get(video_tag)
+        videos = [self._videos[video_id] for video_id in video_ids]
+        with span("search.sort"):
+            videos.sort(key=sort_key)
+        return videos
+
+    def iter_search_titles(self, search_term, after=None):
+        """Iterates lazily over the videos whose title contains search_term.
+
+        Like search_titles, but the matches are put in title order as they
+        are consumed, so reading one page of a large result set does not
+        sort all of it.
+
+        Args:
+            search_term: The query to be used in search (case-insensitive).
+            after: Optional sort key; only videos listed after it are
+                returned.
+        """
+        title_index, _ = self._search_indexes()
+        return iter_in_order(
+            (self._videos[video_id]
+             for video_id in title_index.search(search_term)), after)
+
+    def iter_search_tag(self, video_tag, after=None):
+        """Iterates lazily over the videos carrying video_tag.
+
+        See iter_search_titles.
+        """
+        _, tag_index = self._search_indexes()
+        return iter_in_order(
+            (self._videos[video_id] for video_id in tag_index.get(video_tag)),
+            after)
+
+    def fuzzy_search_titles(self, search_term):
+        """Iterates over the videos matching search_term with typos.
+
+        The most relevant videos come first.
+
+        See FuzzyIndex.search. The index is built by the first call.
+
+        Args:
+            search_term: The query, words separated by spaces or
+                underscores (case-insensitive).
+
+        Returns:
+            An iterator of Video objects. Flagged videos are included.
+        """
+        fuzzy_index = self._fuzzy()
+        with span("fuzzy_index.search"):
+            video_ids = fuzzy_index.search(search_term)
+        return map(self._videos.__getitem__, video_ids)
+
+    def suggest(self, prefix, limit):
+        """Returns the first unflagged videos completing a typed prefix.
+
+        A video completes prefix when its title or video_id starts with
+        it, see PrefixIndex. The index is built by the first call, then a
+        call takes time proportional to the length of prefix plus limit
+        (plus the flagged videos skipped).
+
+        Args:
+            prefix: The typed prefix (case-insensitive, underscores match
+                spaces).
+            limit: The maximum number of videos to return.
+
+        Returns:
+            A list of at most limit Video objects, in the order of the
+            title or video_id they complete.
+        """
+        prefix_index = self._prefixes()
+        with span("prefix_index.suggest"):
+            video_ids = islice(
+                (video_id for video_id in prefix_index.iter_video_ids(prefix)
+                 if video_id not in self._flag_reasons), limit)
+            return [self._videos[video_id] for video_id in video_ids]
@@ -0,0 +1,114 @@
+"""A title n-gram index class."""
+
+from .shared_map import SharedMap
+
+
+class NgramIndex:
+    """A class used to represent an inverted index of title n-grams.
+
+    Every title is case-folded with upper() (the same folding the search
+    commands use) and split into overlapping n-grams. A substring query is
+    answered by intersecting the posting sets of the query's own n-grams
+    and then checking only the surviving candidates.
+    """
+
+    def __init__(self, n=3):
+        self._n = n
+        self._postings = {}
+        # The folded title of every video, by video_id.
+        self._folded = SharedMap()
+        # Grams whose posting set belongs to this index. Sets of other
+        # grams may be shared with the index this one was copied from.
+        self._owned = None
+
+    def copy(self):
+        """Returns a copy sharing the posting sets with this index.
+
+        From then on, both indexes copy a shared set before modifying it,
+        so neither sees the other's later changes. Only the gram dict, whose
+        size is bounded by the number of distinct n-grams, is copied
+        whole; the folded titles are a SharedMap.
+        """
+        index = NgramIndex(self._n)
+        index._postings = dict(self._postings)
+        index._folded = self._folded.copy()
+        index._owned = set()
+        self._owned = set()
+        return index
+
+    def _posting(self, gram):
+        """Returns the posting set of gram, owned by this index."""
+        posting = self._postings.get(gram)
+        if posting is None:
+            posting = self._postings[gram] = set()
+        elif self._owned is not None and gram not in self._owned:
+            posting = self._postings[gram] = set(posting)
+        if self._owned is not None:
+            self._owned.add(gram)
+        return posting
+
+    def _grams(self, text):
+        """Returns the set of n-grams of an already folded string."""
+        return {text[i:i + self._n] for i in range(len(text) - self._n + 1)}
+
+    def add(self, video_id, title):
+        """Indexes a title under the given video_id.
+
+        Args:
+            video_id: The video url.
+            title: The video title.
+        """
+        if video_id in self._folded:
+            self.remove(video_id)
+        folded = title.upper()
+        self._folded[video_id] = folded
+        for gram in self._grams(folded):
+            self._posting(gram).add(video_id)
+
+    def remove(self, video_id):
+        """Removes a video_id from the index, if present.
+
+        Args:
+            video_id: The video url.
+        """
+        folded = self._folded.pop(video_id, None)
+        if folded is None:
+            return
+        for gram in self._grams(folded):
+            posting = self._posting(gram)
+            posting.discard(video_id)
+            if not posting:
+                del self._postings[gram]
+
+    def search(self, search_term):
+        """Returns the ids of all videos whose title contains search_term.
+
+        Matching is case-insensitive, exactly like
+        `search_term.upper() in title.upper()`.
+
+        Args:
+            search_term: The query to be used in search.
+
+        Returns:
+            A list of matching video ids, in no particular order.
+        """
+        term = search_term.upper()
+        grams = self._grams(term)
+
+        # Terms shorter than n have no n-grams, so every title is a
+        # candidate. The folded titles are still reused from the index.
+        if not grams:
+            return [video_id for video_id, folded in self._folded.items()
+                    if term in folded]
+
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = postings[0].intersection(*postings[1:])
+        return [video_id for video_id in candidates
+                if term in self._folded[video_id]]
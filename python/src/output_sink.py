@@ -0,0 +1,68 @@
+"""An output sink class."""
+
+import sys
+
+# Buffered lines are written out once this many have accumulated, which
+# bounds the buffer during very long listings.
+MAX_BUFFERED_LINES = 4096
+
+
+class OutputSink:
+    """A class used to collect the lines written by the player and parser.
+
+    Outside a command() block every line is written straight away, like
+    print(). Inside one, lines are buffered and written with a single call
+    when the outermost block ends.
+    """
+
+    def __init__(self, stream=None):
+        """The OutputSink class is initialized.
+
+        Args:
+            stream: The text stream to write to. If None, the current
+                sys.stdout is used at the time of writing, as print() does.
+        """
+        self._stream = stream
+        self._buffer = []
+        self._depth = 0
+
+    @property
+    def stream(self):
+        """Returns the stream the lines are written to."""
+        return sys.stdout if self._stream is None else self._stream
+
+    def write_line(self, line=""):
+        """Writes one line of output.
+
+        Args:
+            line: The text of the line, without a line terminator. Other
+                objects are converted with str(), as print() does.
+        """
+        if not self._depth:
+            self.stream.write(f"{line}\n")
+            return
+        self._buffer.append(str(line))
+        if len(self._buffer) >= MAX_BUFFERED_LINES:
+            self.flush()
+
+    def flush(self):
+        """Writes out all buffered lines."""
+        if self._buffer:
+            self._buffer.append("")
+            self.stream.write("\n".join(self._buffer))
+            self._buffer.clear()
+
+    def command(self):
+        """Returns a context manager buffering all lines until it exits."""
+        return self
+
+    # The sink is its own context manager, which is much cheaper per
+    # command than a contextlib generator.
+    def __enter__(self):
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if not self._depth:
+            self.flush()
@@ -0,0 +1,46 @@
+"""A playable video set class."""
+
+
+class PlayableSet:
+    """A class used to represent the set of videos that may be played.
+
+    The ids are kept in a dense list together with a map from id to list
+    position. Removing an id swaps the last id into its slot, so adding,
+    removing and picking a random id are all O(1).
+    """
+
+    def __init__(self, video_ids=()):
+        self._ids = list(dict.fromkeys(video_ids))
+        self._positions = {video_id: i for i, video_id in enumerate(self._ids)}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, video_id):
+        return video_id in self._positions
+
+    def add(self, video_id):
+        """Adds a video_id, if not present yet."""
+        if video_id not in self._positions:
+            self._positions[video_id] = len(self._ids)
+            self._ids.append(video_id)
+
+    def discard(self, video_id):
+        """Removes a video_id, if present."""
+        i = self._positions.pop(video_id, None)
+        if i is None:
+            return
+        last = self._ids.pop()
+        if i < len(self._ids):
+            self._ids[i] = last
+            self._positions[last] = i
+
+    def choice(self, rng):
+        """Returns a uniformly chosen video_id, or None if the set is empty.
+
+        Args:
+            rng: A random.Random compatible object providing randrange.
+        """
+        if not self._ids:
+            return None
+        return self._ids[rng.randrange(len(self._ids))]
@@ -0,0 +1,223 @@
+"""A title and video id prefix index class."""
+
+from bisect import bisect_left
+
+
+def fold(text):
+    """Returns text case-folded, with underscores read as spaces.
+
+    Commands are split on whitespace, so "amazing_ca" has to complete
+    the title "Amazing Cats" as well as the id "amazing_cats_video_id".
+    """
+    return text.upper().replace("_", " ")
+
+
+class _Node:
+    """A node of the radix tree.
+
+    Attributes:
+        edge: The label of the edge from the parent, "" for the root.
+        children: The child nodes by the first character of their edge,
+            None for a leaf.
+        video_ids: The sorted ids of the videos having a key ending here.
+        owner: The token of the index allowed to modify the node in place.
+    """
+
+    __slots__ = ("edge", "children", "video_ids", "owner")
+
+    def __init__(self, edge, owner, children=None, video_ids=()):
+        self.edge = edge
+        self.children = children
+        self.video_ids = video_ids
+        self.owner = owner
+
+
+def _common_length(key, start, edge):
+    """Returns the length of the common prefix of key[start:] and edge."""
+    if key.startswith(edge, start):
+        return len(edge)
+    end = min(len(edge), len(key) - start)
+    length = 0
+    while length < end and key[start + length] == edge[length]:
+        length += 1
+    return length
+
+
+class PrefixIndex:
+    """A class used to represent a radix tree of folded titles and ids.
+
+    Every video is stored under two keys, its folded title and its folded
+    video_id. Chains of nodes with a single child are merged into one
+    edge, so the tree has fewer than two nodes per key, and the node of a
+    prefix is reached in time proportional to the prefix length.
+
+    Nodes are copied on write: a copy shares the whole tree with the index
+    it was made from, and each write copies only the nodes on the path to
+    the key it changes.
+    """
+
+    def __init__(self):
+        # Nodes whose owner is this token may be modified in place.
+        self._token = object()
+        self._root = _Node("", self._token)
+
+    def copy(self):
+        """Returns a copy sharing all the nodes with this index.
+
+        From then on, both indexes copy a shared node before modifying
+        it, so neither sees the other's changes.
+        """
+        index = PrefixIndex()
+        index._root = self._root
+        # The nodes this index owned are now shared.
+        self._token = object()
+        return index
+
+    def _own(self, node):
+        """Returns node, or a copy of it this index may modify."""
+        if node.owner is self._token:
+            return node
+        children = None if node.children is None else dict(node.children)
+        return _Node(node.edge, self._token, children, node.video_ids)
+
+    def add(self, video_id, title):
+        """Indexes a video under its folded title and video_id.
+
+        Args:
+            video_id: The video url.
+            title: The video title.
+        """
+        for key in {fold(title), fold(video_id)}:
+            self._insert(key, video_id)
+
+    def remove(self, video_id, title):
+        """Removes a video from the index, if present.
+
+        Args:
+            video_id: The video url.
+            title: The title the video was indexed with.
+        """
+        for key in {fold(title), fold(video_id)}:
+            self._delete(key, video_id)
+
+    def _insert(self, key, video_id):
+        node = self._root = self._own(self._root)
+        i = 0
+        while i < len(key):
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(key[i])
+            if child is None:
+                node.children[key[i]] = _Node(
+                    key[i:], self._token, video_ids=(video_id,))
+                return
+            child = node.children[key[i]] = self._own(child)
+            length = _common_length(key, i, child.edge)
+            if length < len(child.edge):
+                # The key leaves the edge half-way, split it there.
+                edge = child.edge
+                child.edge = edge[length:]
+                child = node.children[key[i]] = _Node(
+                    edge[:length], self._token, {edge[length]: child})
+            node = child
+            i += length
+        ids = node.video_ids
+        j = bisect_left(ids, video_id)
+        if j == len(ids) or ids[j] != video_id:
+            node.video_ids = ids[:j] + (video_id,) + ids[j:]
+
+    def _delete(self, key, video_id):
+        node = self._find(key, exact=True)
+        if node is None or video_id not in node.video_ids:
+            return
+        # Copy the path to the key, then remove the id at its end.
+        path = [self._own(self._root)]
+        self._root = path[0]
+        i = 0
+        while i < len(key):
+            child = self._own(path[-1].children[key[i]])
+            path[-1].children[key[i]] = child
+            path.append(child)
+            i += len(child.edge)
+        node = path[-1]
+        node.video_ids = tuple(
+            other for other in node.video_ids if other != video_id)
+        if node.video_ids or len(path) == 1:
+            return
+        if node.children is None:
+            parent = path[-2]
+            del parent.children[node.edge[0]]
+            if not parent.children:
+                parent.children = None
+            node = parent
+        if node is not self._root and not node.video_ids:
+            self._merge(node)
+
+    @staticmethod
+    def _merge(node):
+        """Merges a node without videos into its child, if it has one."""
+        if node.children is None or len(node.children) != 1:
+            return
+        (child,) = node.children.values()
+        node.edge += child.edge
+        # The child may be shared, the node must own its children dict.
+        node.children = (None if child.children is None
+                         else dict(child.children))
+        node.video_ids = child.video_ids
+
+    def _find(self, prefix, exact=False):
+        """Returns the highest node whose keys all start with prefix.
+
+        Args:
+            prefix: A folded prefix.
+            exact: Whether the node has to spell prefix itself.
+
+        Returns:
+            The node, None if no key starts with prefix.
+        """
+        node = self._root
+        i = 0
+        while i < len(prefix):
+            child = None if node.children is None else node.children.get(
+                prefix[i])
+            if child is None:
+                return None
+            if prefix.startswith(child.edge, i):
+                node = child
+                i += len(child.edge)
+            elif not exact and child.edge.startswith(prefix[i:]):
+                return child
+            else:
+                return None
+        return node
+
+    def iter_video_ids(self, prefix):
+        """Iterates over the videos having a key starting with prefix.
+
+        Videos come once each, in the order of their first matching key,
+        so shorter completions come before their own extensions. Each id
+        costs O(1) amortized on top of finding the prefix's node.
+
+        Args:
+            prefix: The typed prefix, see fold (case-insensitive).
+        """
+        node = self._find(fold(prefix))
+        if node is None:
+            return iter(())
+        return _walk(node)
+
+
+def _walk(node):
+    """Yields the ids below node once each, in key order."""
+    seen = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        for video_id in node.video_ids:
+            if video_id not in seen:
+                seen.add(video_id)
+                yield video_id
+        if node.children is not None:
+            children = node.children
+            stack.extend(children[label]
+                         for label in sorted(children, reverse=True))
@@ -1,14 +1,35 @@
 """A youtube terminal simulator."""
+import argparse
+import io
+import sys
+import time
+
+from .video_library import VideoLibrary
 from .video_player import VideoPlayer
+from .video_session import VideoSession
+from .state_store import StateStore
+from .catalog_watcher import CatalogWatcher
+from .command_metrics import CommandMetrics
 from .command_parser import CommandException
 from .command_parser import CommandParser
 
+# Size of the output buffer used in batch mode.
+BATCH_BUFFER_SIZE = 1 << 16
 
-if __name__ == "__main__":
+
+def run_interactive(video_player=None, metrics=None):
+    """Reads commands from the terminal until EXIT.
+
+    Args:
+        video_player: The player to run the commands on. A new VideoPlayer
+            is created if none is given.
+        metrics: Optional CommandMetrics recording every command.
+    """
     print("""Hello and welcome to YouTube, what would you like to do?
     Enter HELP for list of available commands or EXIT to terminate.""")
-    video_player = VideoPlayer()
-    parser = CommandParser(video_player)
+    if video_player is None:
+        video_player = VideoPlayer()
+    parser = CommandParser(video_player, metrics=metrics)
     while True:
         command = input("YT> ")
         if command.upper() == "EXIT":
@@ -19,3 +40,133 @@ if __name__ == "__main__":
             print(e)
     print("YouTube has now terminated its execution. "
           "Thank you and goodbye!")
+
+
+def run_batch(stream, video_player=None, metrics=None):
+    """Executes the commands read from stream, one per line, until EXIT.
+
+    No prompts are printed. Questions asked by a command, such as the
+    SEARCH_VIDEOS follow-up, are answered by the next line of the stream.
+
+    Args:
+        stream: A text stream of commands.
+        video_player: The player to run the commands on. A new VideoPlayer
+            is created if none is given.
+        metrics: Optional CommandMetrics recording every command.
+
+    Returns:
+        The number of commands executed.
+    """
+    if video_player is None:
+        video_player = VideoPlayer(read_line=stream.readline)
+    parser = CommandParser(video_player, metrics=metrics)
+    count = 0
+    while True:
+        command = stream.readline()
+        if not command or command.strip().upper() == "EXIT":
+            break
+        count += 1
+        try:
+            parser.execute_command(command.split())
+        except CommandException as e:
+            print(e)
+    return count
+
+
+def run_timed_batch(stream, video_player=None, metrics=None):
+    """Runs run_batch with buffered stdout, reports commands/sec on stderr."""
+    output = io.TextIOWrapper(
+        io.BufferedWriter(io.FileIO(sys.stdout.fileno(), "w", closefd=False),
+                          BATCH_BUFFER_SIZE))
+    previous_stdout, sys.stdout = sys.stdout, output
+    try:
+        start = time.perf_counter()
+        count = run_batch(stream, video_player, metrics)
+        elapsed = time.perf_counter() - start
+    finally:
+        sys.stdout = previous_stdout
+        output.flush()
+        output.detach()
+        if stream is not sys.stdin:
+            stream.close()
+    print(f"Executed {count} commands in {elapsed:.3f}s "
+          f"({count / elapsed if elapsed else 0:,.0f} commands/sec)",
+          file=sys.stderr)
+
+
+def open_persistent_player(state_dir, group_size=1, read_line=None):
+    """Returns a VideoPlayer restored from state_dir and its StateStore.
+
+    The caller closes the store when done, which compacts its log.
+    """
+    store = StateStore(state_dir, group_size=group_size)
+    video_library = VideoLibrary()
+    session = VideoSession()
+    store.recover(video_library, session)
+    video_player = VideoPlayer(video_library, read_line=read_line,
+                               session=session, journal=store)
+    return video_player, store
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument(
+        "--batch", metavar="FILE",
+        help="execute the commands in FILE ('-' for stdin) without prompts "
+             "and report commands/sec on stderr")
+    arg_parser.add_argument(
+        "--state", metavar="DIR",
+        help="persist playlists and flags in DIR and restore them on start")
+    arg_parser.add_argument(
+        "--group-commit", metavar="N", type=int, default=1,
+        help="with --state, fsync the log once per N mutations instead of "
+             "after every one")
+    arg_parser.add_argument(
+        "--metrics", metavar="FILE",
+        help="record the latency of every command, enable the STATS command "
+             "and write the metrics to FILE in the Prometheus text format "
+             "on exit")
+    arg_parser.add_argument(
+        "--spans", action="store_true",
+        help="with --metrics, also time index lookups, sorting and fsync "
+             "inside commands")
+    arg_parser.add_argument(
+        "--watch", metavar="SECONDS", type=float,
+        help="reload videos.txt when it changes, checking it every SECONDS; "
+             "playlists drop the videos removed from it")
+    args = arg_parser.parse_args(argv)
+
+    stream = None
+    if args.batch is not None:
+        stream = sys.stdin if args.batch == "-" else open(args.batch)
+    video_player = store = None
+    if args.state is not None:
+        video_player, store = open_persistent_player(
+            args.state, args.group_commit,
+            None if stream is None else stream.readline)
+    metrics = None
+    if args.metrics is not None:
+        metrics = CommandMetrics(spans=args.spans)
+    watcher = None
+    if args.watch is not None:
+        if video_player is None:
+            video_player = VideoPlayer(
+                read_line=None if stream is None else stream.readline)
+        watcher = CatalogWatcher(video_player.video_library, args.watch)
+        watcher.start()
+    try:
+        if stream is None:
+            run_interactive(video_player, metrics)
+        else:
+            run_timed_batch(stream, video_player, metrics)
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        if store is not None:
+            store.close()
+        if metrics is not None:
+            metrics.write_prometheus(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""An asyncio TCP server exposing the command protocol.
+
+Every connection gets its own VideoPlayer session (playback state and
+playlists) on top of one VideoLibrary shared by all connections. The
+protocol is the one of the interactive terminal: the server sends the
+"YT> " prompt, the client sends one command per line and receives the
+command's output followed by the next prompt. EXIT closes the connection.
+
+Commands are plain synchronous VideoPlayer calls, so they run on a thread
+pool. They do not need a lock: the shared library is read-only, and
+everything else a command touches belongs to its own connection. Commands
+that would change the library for every client (FLAG_VIDEO, ALLOW_VIDEO
+and RELOAD_LIBRARY) are refused.
+
+A worker never waits for a client to type: the search follow-up question
+ends the command, the answer is read on the event loop and only playing
+the chosen video goes back to the pool. Output is sent in chunks of at
+most output_sink.MAX_BUFFERED_LINES lines, each drained before the next
+one is produced, so a slow client holds at most one chunk in memory. A
+client that does not read a chunk within SEND_TIMEOUT seconds is
+disconnected, which frees its worker.
+
+Usage (from the python/ directory):
+    python3 -m src.server --port 8765
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+from functools import partial
+
+from .command_parser import CommandException, CommandParser
+from .output_sink import OutputSink
+from .video_library import VideoLibrary
+from .video_player import VideoPlayer
+
+PROMPT = "YT> "
+
+# Seconds a worker waits for a client to read a chunk of output.
+SEND_TIMEOUT = 30.0
+
+# What each refused command would have done, for its error message.
+SHARED_STATE_COMMANDS = {
+    "FLAG_VIDEO": "flag video",
+    "ALLOW_VIDEO": "remove flag from video",
+    "RELOAD_LIBRARY": "reload library",
+}
+
+
+class _TransportStream:
+    """A text stream writing to an asyncio StreamWriter from a worker.
+
+    Each write is handed to the event loop and waits until the client has
+    drained it, so the output of one command is never held whole.
+    """
+
+    def __init__(self, loop, writer):
+        self._loop = loop
+        self._writer = writer
+
+    def write(self, text):
+        future = asyncio.run_coroutine_threadsafe(
+            self._send(text.encode("utf-8")), self._loop)
+        try:
+            future.result(SEND_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            # Later writes of the command then fail without waiting.
+            self._loop.call_soon_threadsafe(self._writer.close)
+            raise ConnectionError("Client stopped reading") from None
+
+    async def _send(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+
+class VideoServer:
+    """A class used to serve the command protocol to many clients."""
+
+    def __init__(self, video_library=None, max_workers=None):
+        """The VideoServer class is initialized.
+
+        Args:
+            video_library: The library shared by every session. A
+                VideoLibrary over videos.txt is created if none is given.
+            max_workers: The size of the thread pool commands run on.
+        """
+        self._video_library = (VideoLibrary() if video_library is None
+                               else video_library)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers)
+        self._server = None
+        # The task serving each open connection, by its writer.
+        self._connections = {}
+
+    async def start(self, host="127.0.0.1", port=8765, backlog=4096):
+        """Starts listening and returns the asyncio Server.
+
+        Args:
+            host: The interface to listen on.
+            port: The port to listen on, 0 picks a free one.
+            backlog: The number of pending connections the OS may queue,
+                large enough for thousands of clients connecting at once.
+        """
+        self._server = await asyncio.start_server(
+            self._serve, host, port, backlog=backlog)
+        return self._server
+
+    async def close(self):
+        """Stops listening, closes every connection and the thread pool."""
+        if self._server is not None:
+            self._server.close()
+        # Closing a connection also ends a worker waiting to send to it,
+        # so the tasks serving them end promptly.
+        for writer in self._connections:
+            writer.close()
+        await asyncio.gather(*self._connections.values(),
+                             return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+    async def _serve(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        output = OutputSink(_TransportStream(loop, writer))
+        player = VideoPlayer(self._video_library, output=output,
+                             defer_answers=True)
+        parser = CommandParser(player)
+        for name, action in SHARED_STATE_COMMANDS.items():
+            parser.register_command(
+                name, partial(output.write_line,
+                              f"Cannot {action}: The video library is "
+                              f"read-only on this server"),
+                help_text="Not available on this server.")
+
+        def execute(command):
+            try:
+                parser.execute_command(command)
+            except CommandException as e:
+                output.write_line(e)
+
+        def answer(line):
+            with output.command():
+                player.answer(line)
+
+        self._connections[writer] = asyncio.current_task()
+        try:
+            writer.write(PROMPT.encode("utf-8"))
+            while True:
+                await writer.drain()
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("utf-8").split()
+                if len(command) == 1 and command[0].upper() == "EXIT":
+                    writer.write(b"YouTube has now terminated its execution. "
+                                 b"Thank you and goodbye!\n")
+                    break
+                await loop.run_in_executor(self._executor, execute, command)
+                if player.awaiting_answer:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    await loop.run_in_executor(
+                        self._executor, answer, line.decode("utf-8"))
+                # Workers wait for their output to be sent, so the prompt
+                # comes after it.
+                writer.write(PROMPT.encode("utf-8"))
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[writer]
+            writer.close()
+
+
+async def _main(host, port, workers):
+    server = VideoServer(max_workers=workers)
+    await server.start(host, port)
+    print(f"Serving on {host}:{port}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--workers", type=int,
+                            help="size of the thread pool commands run on")
+    args = arg_parser.parse_args()
+    try:
+        asyncio.run(_main(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,128 @@
+"""A copy-on-write map class."""
+
+# Number of chunks of an empty map.
+_MIN_CHUNKS = 8
+
+
+class SharedMap:
+    """A class used to represent a dict whose copies share structure.
+
+    The entries are spread over chunks, plain dicts picked by the hash of
+    the key. A copy only copies the list of chunks; a chunk still shared
+    with another map is copied the first time the map modifies it. The
+    number of chunks is kept around the square root of the number of
+    entries, so a copy followed by a few writes costs O(sqrt(n)) instead
+    of the O(n) of copying a dict.
+    """
+
+    __slots__ = ("_chunks", "_mask", "_len", "_owned")
+
+    def __init__(self, items=()):
+        """Builds the map from a mapping or an iterable of (key, value)."""
+        size = len(items) if hasattr(items, "__len__") else 0
+        if hasattr(items, "items"):
+            items = items.items()
+        chunk_count = _MIN_CHUNKS
+        while size > chunk_count ** 2:
+            chunk_count *= 2
+        chunks = [{} for _ in range(chunk_count)]
+        mask = chunk_count - 1
+        for key, value in items:
+            chunks[hash(key) & mask][key] = value
+        self._chunks = chunks
+        self._mask = mask
+        self._len = sum(map(len, chunks))
+        # Indexes of the chunks belonging to this map, None if all do.
+        self._owned = None
+        while self._len > len(self._chunks) ** 2:
+            self._grow()
+
+    def copy(self):
+        """Returns a copy sharing every chunk with this map.
+
+        From then on, both maps copy a shared chunk before modifying it,
+        so neither sees the other's changes.
+        """
+        other = SharedMap.__new__(SharedMap)
+        other._chunks = list(self._chunks)
+        other._mask = self._mask
+        other._len = self._len
+        other._owned = set()
+        self._owned = set()
+        return other
+
+    def _chunk(self, key):
+        """Returns the chunk of key, owned by this map."""
+        i = hash(key) & self._mask
+        chunk = self._chunks[i]
+        if self._owned is not None and i not in self._owned:
+            self._owned.add(i)
+            chunk = self._chunks[i] = dict(chunk)
+        return chunk
+
+    def _grow(self):
+        """Doubles the number of chunks, copying every entry once."""
+        size = len(self._chunks)
+        # The entries of chunk i move to chunks i and i + size.
+        low_chunks = []
+        high_chunks = []
+        for chunk in self._chunks:
+            low = {}
+            high = {}
+            for key, value in chunk.items():
+                if hash(key) & size:
+                    high[key] = value
+                else:
+                    low[key] = value
+            low_chunks.append(low)
+            high_chunks.append(high)
+        self._chunks = low_chunks + high_chunks
+        self._mask = 2 * size - 1
+        self._owned = None
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, key):
+        return key in self._chunks[hash(key) & self._mask]
+
+    def __getitem__(self, key):
+        return self._chunks[hash(key) & self._mask][key]
+
+    def get(self, key, default=None):
+        return self._chunks[hash(key) & self._mask].get(key, default)
+
+    def __setitem__(self, key, value):
+        chunk = self._chunk(key)
+        if key not in chunk:
+            self._len += 1
+            if self._len > len(self._chunks) ** 2:
+                self._grow()
+                chunk = self._chunk(key)
+        chunk[key] = value
+
+    def __delitem__(self, key):
+        del self._chunk(key)[key]
+        self._len -= 1
+
+    def pop(self, key, default=None):
+        """Removes key and returns its value, default if it is missing."""
+        if key not in self:
+            return default
+        self._len -= 1
+        return self._chunk(key).pop(key)
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        for chunk in self._chunks:
+            yield from chunk.values()
+
+    def items(self):
+        for chunk in self._chunks:
+            yield from chunk.items()
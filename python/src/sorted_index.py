@@ -0,0 +1,201 @@
+"""A title-sorted video index class."""
+
+import base64
+import binascii
+from bisect import bisect_left, bisect_right
+import heapq
+from itertools import chain, islice
+import json
+from math import isqrt
+
+# Smallest chunk size of a SortedVideoIndex, see _load.
+_MIN_LOAD = 64
+
+
+def sort_key(video):
+    """Returns the key videos are listed by: title, then video_id."""
+    return video.title, video.video_id
+
+
+def encode_cursor(video):
+    """Returns the cursor of the page following video.
+
+    The cursor is the sort key of the last video shown, so it stays valid
+    when videos are added or removed between two pages. It is encoded as
+    one URL-safe word, so it can be typed back as a command argument.
+    """
+    data = json.dumps(sort_key(video), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Returns the sort key encoded by encode_cursor.
+
+    Raises:
+        ValueError: If cursor was not made by encode_cursor.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        title, video_id = json.loads(data.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+    if not isinstance(title, str) or not isinstance(video_id, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return title, video_id
+
+
+def iter_in_order(videos, after=None):
+    """Iterates over videos in title order, starting after a sort key.
+
+    The videos are heapified rather than sorted, so the first results of
+    a long list are produced in O(n) and each further one in O(log n).
+
+    Args:
+        videos: An iterable of videos with distinct video_ids.
+        after: Only videos whose sort key is greater are returned.
+    """
+    entries = [(sort_key(video), video) for video in videos]
+    if after is not None:
+        entries = [entry for entry in entries if entry[0] > after]
+    heapq.heapify(entries)
+    while entries:
+        yield heapq.heappop(entries)[1]
+
+
+class SortedVideoIndex:
+    """A class used to keep videos ordered by title.
+
+    The videos are kept in sorted chunks of about sqrt(n) videos, each
+    with a parallel list of sort keys, and the last key of every chunk is
+    kept in a list searched with bisect, so listing the library never has
+    to sort it again. A copy only copies the lists of chunks; a chunk
+    still shared with the index it was copied from is copied the first
+    time it is modified, so a copy followed by a few writes costs
+    O(sqrt(n)) rather than O(n).
+    """
+
+    def __init__(self, videos=()):
+        """Builds the index from an initial iterable of videos.
+
+        The initial videos are sorted once rather than inserted one by one.
+        """
+        videos = sorted(videos, key=sort_key)
+        load = _load(len(videos))
+        self._video_chunks = [videos[i:i + load]
+                              for i in range(0, len(videos), load)]
+        self._key_chunks = [[sort_key(video) for video in chunk]
+                            for chunk in self._video_chunks]
+        # The last key of each chunk.
+        self._maxes = [keys[-1] for keys in self._key_chunks]
+        self._len = len(videos)
+        # Ids of the video chunks belonging to this index, None if all do.
+        # A key chunk is owned along with its video chunk.
+        self._owned = None
+
+    def copy(self):
+        """Returns a copy sharing every chunk with this index.
+
+        From then on, both indexes copy a shared chunk before modifying
+        it, so neither sees the other's changes.
+        """
+        index = SortedVideoIndex()
+        index._video_chunks = list(self._video_chunks)
+        index._key_chunks = list(self._key_chunks)
+        index._maxes = list(self._maxes)
+        index._len = self._len
+        index._owned = set()
+        self._owned = set()
+        return index
+
+    def _own(self, i):
+        """Returns the keys and videos of chunk i, owned by this index."""
+        videos = self._video_chunks[i]
+        if self._owned is not None and id(videos) not in self._owned:
+            videos = self._video_chunks[i] = list(videos)
+            self._key_chunks[i] = list(self._key_chunks[i])
+            self._owned.add(id(videos))
+        return self._key_chunks[i], videos
+
+    def _insert_chunk(self, i, keys, videos):
+        self._key_chunks.insert(i, keys)
+        self._video_chunks.insert(i, videos)
+        self._maxes.insert(i, keys[-1])
+        if self._owned is not None:
+            self._owned.add(id(videos))
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        """Iterates over the videos in title order, without copying."""
+        return chain.from_iterable(self._video_chunks)
+
+    def iter_after(self, after=None):
+        """Iterates over the videos whose sort key is greater than after.
+
+        The start is found by bisection, so a page of k videos costs
+        O(log n + k). The index must not change while iterating.
+        """
+        if after is None:
+            return iter(self)
+        i = bisect_right(self._maxes, after)
+        if i == len(self._maxes):
+            return iter(())
+        start = bisect_right(self._key_chunks[i], after)
+        return chain(islice(self._video_chunks[i], start, None),
+                     chain.from_iterable(self._video_chunks[i + 1:]))
+
+    def insert(self, video):
+        """Inserts a video at its sorted position.
+
+        Args:
+            video: The Video object to be inserted.
+        """
+        key = sort_key(video)
+        self._len += 1
+        if not self._maxes:
+            self._insert_chunk(0, [key], [video])
+            return
+        i = min(bisect_left(self._maxes, key), len(self._maxes) - 1)
+        keys, videos = self._own(i)
+        j = bisect_left(keys, key)
+        keys.insert(j, key)
+        videos.insert(j, video)
+        self._maxes[i] = keys[-1]
+        if len(keys) > 2 * _load(self._len):
+            half = len(keys) // 2
+            self._insert_chunk(i + 1, keys[half:], videos[half:])
+            del keys[half:]
+            del videos[half:]
+            self._maxes[i] = keys[-1]
+
+    def remove(self, video):
+        """Removes a video, if present.
+
+        Args:
+            video: The Video object to be removed.
+        """
+        key = sort_key(video)
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return
+        j = bisect_left(self._key_chunks[i], key)
+        if self._key_chunks[i][j] != key:
+            return
+        keys, videos = self._own(i)
+        del keys[j]
+        del videos[j]
+        self._len -= 1
+        if keys:
+            self._maxes[i] = keys[-1]
+            return
+        del self._key_chunks[i]
+        del self._video_chunks[i]
+        del self._maxes[i]
+        if self._owned is not None:
+            self._owned.discard(id(videos))
+
+
+def _load(size):
+    """Returns the usual number of videos per chunk of a size-video index."""
+    return max(_MIN_LOAD, isqrt(size))
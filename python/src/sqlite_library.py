@@ -0,0 +1,568 @@
+"""A video library and playlist store kept in a SQLite database.
+
+The catalog lives on disk and only the rows a command touches are read,
+so catalogs larger than RAM can be served:
+    videos         one row per video, the flag reason is NULL unless
+                   flagged; indexed by video_id and by (title, video_id)
+                   for listings
+    video_tags     (upper-cased tag, video_id) pairs for tag search
+    video_titles   an FTS5 trigram index over the titles, kept in sync
+                   with videos by triggers, for substring search
+    playlists,
+    playlist_videos  the playlists, see SqlitePlaylists
+
+Every query is one of the constant SQL strings below. The sqlite3 module
+keeps a per-connection cache of compiled statements keyed by their SQL,
+so each statement is prepared once and reused by later calls.
+
+Usage (from the python/ directory):
+    python3 -m src.sqlite_library src/videos.txt videos.db
+"""
+
+from collections.abc import MutableMapping
+import random
+import sqlite3
+import sys
+import threading
+
+from .command_metrics import span
+from .video import DEFAULT_FLAG_REASON, Video
+from .video_catalog import TAG_SEPARATOR
+from .video_library import DEFAULT_CATALOG
+from .video_loader import iter_video_rows
+
+# Rows inserted per transaction by import_catalog.
+DEFAULT_BATCH_SIZE = 10_000
+
+# Rows fetched from a cursor at a time while iterating.
+_FETCH_SIZE = 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    flag_reason TEXT
+);
+CREATE INDEX IF NOT EXISTS videos_by_title ON videos (title, video_id);
+-- Created by earlier versions, but no query used it.
+DROP INDEX IF EXISTS videos_by_lower_title;
+CREATE INDEX IF NOT EXISTS videos_playable ON videos (video_id)
+    WHERE flag_reason IS NULL;
+CREATE TABLE IF NOT EXISTS video_tags (
+    tag TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    PRIMARY KEY (tag, video_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS video_tags_by_video_id ON video_tags (video_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS video_titles USING fts5 (
+    title, content='videos', content_rowid='rowid', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS videos_insert AFTER INSERT ON videos BEGIN
+    INSERT INTO video_titles (rowid, title) VALUES (new.rowid, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS videos_delete AFTER DELETE ON videos BEGIN
+    INSERT INTO video_titles (video_titles, rowid, title)
+        VALUES ('delete', old.rowid, old.title);
+END;
+CREATE TABLE IF NOT EXISTS playlists (
+    playlist TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS playlist_videos (
+    playlist TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    video_id TEXT NOT NULL,
+    PRIMARY KEY (playlist, video_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS playlist_videos_by_position
+    ON playlist_videos (playlist, position);
+"""
+
+_VIDEO_COLUMNS = "videos.title, videos.video_id, videos.tags"
+
+_COUNT = "SELECT count(*) FROM videos"
+_SELECT_ALL = f"SELECT {_VIDEO_COLUMNS} FROM videos"
+_SELECT_IN_TITLE_ORDER = (f"SELECT {_VIDEO_COLUMNS} FROM videos "
+                          "ORDER BY title, video_id")
+_SELECT_VIDEO = f"SELECT {_VIDEO_COLUMNS} FROM videos WHERE video_id = ?"
+_SELECT_FLAG = "SELECT flag_reason FROM videos WHERE video_id = ?"
+_SELECT_FLAGS = ("SELECT video_id, flag_reason FROM videos "
+                 "WHERE flag_reason IS NOT NULL")
+_UPDATE_FLAG = "UPDATE videos SET flag_reason = ? WHERE video_id = ?"
+_CLEAR_FLAGS = ("UPDATE videos SET flag_reason = NULL "
+                "WHERE flag_reason IS NOT NULL")
+_COUNT_PLAYABLE = "SELECT count(*) FROM videos WHERE flag_reason IS NULL"
+_SELECT_PLAYABLE = (f"SELECT {_VIDEO_COLUMNS} FROM videos "
+                    "WHERE flag_reason IS NULL ORDER BY video_id "
+                    "LIMIT 1 OFFSET ?")
+_SEARCH_TITLES = (f"SELECT {_VIDEO_COLUMNS} FROM video_titles "
+                  "JOIN videos ON videos.rowid = video_titles.rowid "
+                  "WHERE video_titles MATCH ? "
+                  "ORDER BY videos.title, videos.video_id")
+_SEARCH_TAG = (f"SELECT {_VIDEO_COLUMNS} FROM video_tags "
+               "JOIN videos ON videos.video_id = video_tags.video_id "
+               "WHERE video_tags.tag = ? "
+               "ORDER BY videos.title, videos.video_id")
+# The same queries starting after a (title, video_id) sort key. The row
+# value comparison is a range scan of the videos_by_title index.
+_AFTER = "(videos.title, videos.video_id) > (?, ?)"
+_SELECT_IN_TITLE_ORDER_AFTER = (f"SELECT {_VIDEO_COLUMNS} FROM videos "
+                                f"WHERE {_AFTER} ORDER BY title, video_id")
+_SEARCH_TITLES_AFTER = (f"SELECT {_VIDEO_COLUMNS} FROM video_titles "
+                        "JOIN videos ON videos.rowid = video_titles.rowid "
+                        f"WHERE video_titles MATCH ? AND {_AFTER} "
+                        "ORDER BY videos.title, videos.video_id")
+_SEARCH_TAG_AFTER = (f"SELECT {_VIDEO_COLUMNS} FROM video_tags "
+                     "JOIN videos ON videos.video_id = video_tags.video_id "
+                     f"WHERE video_tags.tag = ? AND {_AFTER} "
+                     "ORDER BY videos.title, videos.video_id")
+_INSERT_VIDEO = ("INSERT INTO videos (video_id, title, tags) "
+                 "VALUES (?, ?, ?)")
+_INSERT_TAG = "INSERT OR IGNORE INTO video_tags (tag, video_id) VALUES (?, ?)"
+_DELETE_VIDEO = "DELETE FROM videos WHERE video_id = ?"
+_DELETE_TAGS = "DELETE FROM video_tags WHERE video_id = ?"
+
+_COUNT_PLAYLISTS = "SELECT count(*) FROM playlists"
+_SELECT_PLAYLISTS = "SELECT playlist FROM playlists"
+_SELECT_PLAYLIST = "SELECT name FROM playlists WHERE playlist = ?"
+_INSERT_PLAYLIST = "INSERT INTO playlists (playlist, name) VALUES (?, ?)"
+_DELETE_PLAYLIST = "DELETE FROM playlists WHERE playlist = ?"
+_COUNT_PLAYLIST_VIDEOS = ("SELECT count(*) FROM playlist_videos "
+                          "WHERE playlist = ?")
+_SELECT_PLAYLIST_VIDEOS = (f"SELECT {_VIDEO_COLUMNS} FROM playlist_videos "
+                           "JOIN videos "
+                           "ON videos.video_id = playlist_videos.video_id "
+                           "WHERE playlist = ? ORDER BY position")
+_SELECT_PLAYLIST_VIDEO = ("SELECT 1 FROM playlist_videos "
+                          "WHERE playlist = ? AND video_id = ?")
+_INSERT_PLAYLIST_VIDEO = (
+    "INSERT OR IGNORE INTO playlist_videos (playlist, position, video_id) "
+    "SELECT ?, coalesce(max(position), 0) + 1, ? FROM playlist_videos "
+    "WHERE playlist = ?")
+_DELETE_PLAYLIST_VIDEO = ("DELETE FROM playlist_videos "
+                          "WHERE playlist = ? AND video_id = ?")
+_CLEAR_PLAYLIST = "DELETE FROM playlist_videos WHERE playlist = ?"
+
+
+class StoredVideo(Video):
+    """A Video read from the database.
+
+    Each query builds new objects, so stored videos compare equal by
+    video_id rather than by identity.
+    """
+
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return isinstance(other, Video) and self.video_id == other.video_id
+
+    def __hash__(self):
+        return hash(self.video_id)
+
+
+def _video(row):
+    title, video_id, tags = row
+    return StoredVideo(title, video_id, tags.split(TAG_SEPARATOR) if tags
+                       else ())
+
+
+def connect(database):
+    """Opens a database and creates the tables that do not exist yet."""
+    connection = sqlite3.connect(database, check_same_thread=False)
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _insert_video(connection, title, video_id, tags):
+    connection.execute(_INSERT_VIDEO,
+                       (video_id, title, TAG_SEPARATOR.join(tags)))
+    connection.executemany(_INSERT_TAG, [(tag.upper(), video_id)
+                                         for tag in tags])
+
+
+def _delete_video(connection, video_id):
+    connection.execute(_DELETE_TAGS, (video_id,))
+    return connection.execute(_DELETE_VIDEO, (video_id,)).rowcount
+
+
+def import_catalog(connection, path=DEFAULT_CATALOG,
+                   batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Imports a text catalog, committing every batch_size videos.
+
+    Videos already stored under the same video_id are replaced.
+
+    Args:
+        connection: A connection returned by connect.
+        path: The text catalog to import.
+        batch_size: The number of videos inserted per transaction.
+        progress: Optional callable receiving the loader's progress,
+            see video_loader.iter_video_rows.
+
+    Returns:
+        The number of rows imported.
+    """
+    count = 0
+    # Rows by video_id, a later row replaces an earlier one.
+    batch = {}
+
+    def insert_batch():
+        video_ids = [(video_id,) for video_id in batch]
+        with connection:
+            connection.executemany(_DELETE_TAGS, video_ids)
+            connection.executemany(_DELETE_VIDEO, video_ids)
+            connection.executemany(_INSERT_VIDEO, [
+                (video_id, title, TAG_SEPARATOR.join(tags))
+                for video_id, (title, tags) in batch.items()])
+            connection.executemany(_INSERT_TAG, [
+                (tag.upper(), video_id)
+                for video_id, (title, tags) in batch.items() for tag in tags])
+        batch.clear()
+
+    for title, video_id, tags in iter_video_rows(path, progress=progress):
+        batch[video_id] = (title, tags)
+        count += 1
+        if len(batch) >= batch_size:
+            insert_batch()
+    insert_batch()
+    return count
+
+
+class SqliteVideoLibrary:
+    """A class used to represent a Video Library stored in SQLite.
+
+    It offers the same methods as VideoLibrary. Reads and writes go to
+    the database, serialised by a lock so the library can be shared by
+    the server's worker threads.
+    """
+
+    def __init__(self, database=":memory:", path=DEFAULT_CATALOG):
+        """The SqliteVideoLibrary class is initialized.
+
+        Args:
+            database: The database file, created if it does not exist.
+                An in-memory database by default.
+            path: A text catalog imported if the database has no videos
+                yet, videos.txt by default. None never imports.
+        """
+        self._lock = threading.RLock()
+        self._connection = connect(database)
+        if path is not None and not len(self):
+            import_catalog(self._connection, path)
+
+    def _fetch_one(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchone()
+
+    def _fetch_videos(self, sql, parameters=()):
+        with self._lock, span("sqlite.query"):
+            rows = self._connection.execute(sql, parameters).fetchall()
+        return [_video(row) for row in rows]
+
+    def _iter_videos(self, sql, parameters=()):
+        with self._lock:
+            cursor = self._connection.execute(sql, parameters)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(_FETCH_SIZE)
+            if not rows:
+                return
+            for row in rows:
+                yield _video(row)
+
+    def close(self):
+        """Closes the database connection."""
+        self._connection.close()
+
+    def snapshot(self):
+        """Returns the library itself, every read sees the latest write."""
+        return self
+
+    def playlists(self):
+        """Returns the playlist store of this database, see SqlitePlaylists."""
+        return SqlitePlaylists(self)
+
+    def __len__(self):
+        return self._fetch_one(_COUNT)[0]
+
+    def get_all_videos(self):
+        """Returns all available video information from the video library."""
+        return self._fetch_videos(_SELECT_ALL)
+
+    def iter_videos(self, after=None):
+        """Iterates over all videos in title order, reading them in batches.
+
+        Ties between equal titles are broken by video_id.
+
+        Args:
+            after: Optional sort key; only videos listed after it are
+                returned.
+        """
+        if after is None:
+            return self._iter_videos(_SELECT_IN_TITLE_ORDER)
+        return self._iter_videos(_SELECT_IN_TITLE_ORDER_AFTER, after)
+
+    def get_video(self, video_id):
+        """Returns the video object (title, url, tags) from the video library.
+
+        Args:
+            video_id: The video url.
+
+        Returns:
+            The Video object for the requested video_id. None if the video
+            does not exist.
+        """
+        row = self._fetch_one(_SELECT_VIDEO, (video_id,))
+        return None if row is None else _video(row)
+
+    def add_video(self, video):
+        """Adds a video, replacing one stored under the same video_id.
+
+        Args:
+            video: The Video object to be added.
+        """
+        with self._lock, self._connection:
+            _delete_video(self._connection, video.video_id)
+            _insert_video(self._connection, video.title, video.video_id,
+                          video.tags)
+
+    def remove_video(self, video_id):
+        """Removes a video from the library.
+
+        Args:
+            video_id: The video url.
+
+        Returns:
+            The removed Video object. None if the video does not exist.
+        """
+        with self._lock, self._connection:
+            video = self.get_video(video_id)
+            if video is not None:
+                _delete_video(self._connection, video_id)
+        return video
+
+    def is_flagged(self, video_id):
+        """Returns True if the video with the given video_id is flagged."""
+        return self.get_flag_reason(video_id) is not None
+
+    def get_flag_reason(self, video_id):
+        """Returns the reason a video was flagged for, None if not flagged."""
+        row = self._fetch_one(_SELECT_FLAG, (video_id,))
+        return None if row is None else row[0]
+
+    def iter_flags(self):
+        """Iterates over (video_id, flag_reason) of all flagged videos."""
+        with self._lock:
+            return iter(self._connection.execute(_SELECT_FLAGS).fetchall())
+
+    def format_video(self, video):
+        """Returns the line a video is listed with, including its flag.
+
+        Args:
+            video: A Video object of this library.
+        """
+        flag_reason = self.get_flag_reason(video.video_id)
+        if flag_reason is None:
+            return repr(video)
+        return f"{video!r} - FLAGGED (reason: {flag_reason})"
+
+    def flag_video(self, video_id, flag_reason=None):
+        """Marks a video as flagged, see VideoLibrary.flag_video."""
+        with self._lock, self._connection:
+            self._connection.execute(_UPDATE_FLAG, (
+                DEFAULT_FLAG_REASON if flag_reason is None else flag_reason,
+                video_id))
+        return self.get_video(video_id)
+
+    def allow_video(self, video_id):
+        """Removes the flag from a video, see VideoLibrary.allow_video."""
+        with self._lock, self._connection:
+            self._connection.execute(_UPDATE_FLAG, (None, video_id))
+        return self.get_video(video_id)
+
+    def restore_flags(self, flag_reasons):
+        """Replaces all flags in one transaction, see VideoLibrary."""
+        with self._lock, self._connection:
+            self._connection.execute(_CLEAR_FLAGS)
+            self._connection.executemany(
+                _UPDATE_FLAG, [(reason, video_id)
+                               for video_id, reason in flag_reasons.items()])
+
+    def get_random_video(self, rng=random):
+        """Returns a random video that is not flagged.
+
+        The video is read at a random offset of the partial index over
+        the unflagged videos.
+
+        Args:
+            rng: The source of randomness, anything providing randrange.
+
+        Returns:
+            A Video object. None if every video is flagged.
+        """
+        with self._lock:
+            count = self._fetch_one(_COUNT_PLAYABLE)[0]
+            if not count:
+                return None
+            return _video(self._fetch_one(_SELECT_PLAYABLE,
+                                          (rng.randrange(count),)))
+
+    def search_titles(self, search_term):
+        """Returns all videos whose title contains the search_term.
+
+        Terms of three or more characters are looked up in the trigram
+        index, shorter ones scan the titles. Candidates are checked with
+        upper() like VideoLibrary does.
+
+        Args:
+            search_term: The query to be used in search (case-insensitive).
+
+        Returns:
+            A list of matching Video objects, in title order.
+            Flagged videos are included.
+        """
+        return list(self.iter_search_titles(search_term))
+
+    def iter_search_titles(self, search_term, after=None):
+        """Iterates over the videos whose title contains search_term.
+
+        The matches are read from the database in batches, in title order.
+
+        Args:
+            search_term: The query to be used in search (case-insensitive).
+            after: Optional sort key; only videos listed after it are
+                returned.
+        """
+        term = search_term.upper()
+        if len(search_term) >= 3:
+            query = '"' + search_term.replace('"', '""') + '"'
+            if after is None:
+                candidates = self._iter_videos(_SEARCH_TITLES, (query,))
+            else:
+                candidates = self._iter_videos(_SEARCH_TITLES_AFTER,
+                                               (query, *after))
+        else:
+            candidates = self.iter_videos(after)
+        return (video for video in candidates if term in video.title.upper())
+
+    def search_tag(self, video_tag):
+        """Returns all videos carrying the video_tag.
+
+        Args:
+            video_tag: The video tag to be used in search (case-insensitive).
+
+        Returns:
+            A list of matching Video objects, in title order.
+            Flagged videos are included.
+        """
+        return self._fetch_videos(_SEARCH_TAG, (video_tag.upper(),))
+
+    def iter_search_tag(self, video_tag, after=None):
+        """Iterates over the videos carrying video_tag, in batches.
+
+        See iter_search_titles.
+        """
+        if after is None:
+            return self._iter_videos(_SEARCH_TAG, (video_tag.upper(),))
+        return self._iter_videos(_SEARCH_TAG_AFTER,
+                                 (video_tag.upper(), *after))
+
+
+class SqlitePlaylist:
+    """A class used to represent a Playlist stored in SQLite.
+
+    It offers the same methods as Playlist.
+    """
+
+    def __init__(self, library, key, name):
+        self._library = library
+        self._key = key
+        self.name = name
+
+    def _execute(self, sql, parameters):
+        library = self._library
+        with library._lock, library._connection:
+            library._connection.execute(sql, parameters)
+
+    def __len__(self):
+        return self._library._fetch_one(_COUNT_PLAYLIST_VIDEOS,
+                                        (self._key,))[0]
+
+    def __iter__(self):
+        """Iterates over the videos in the order they were added."""
+        return iter(self._library._fetch_videos(_SELECT_PLAYLIST_VIDEOS,
+                                                (self._key,)))
+
+    def __contains__(self, video):
+        return self._library._fetch_one(
+            _SELECT_PLAYLIST_VIDEO, (self._key, video.video_id)) is not None
+
+    def add(self, video):
+        """Appends a video to the playlist, if not already in it."""
+        self._execute(_INSERT_PLAYLIST_VIDEO,
+                      (self._key, video.video_id, self._key))
+
+    def remove(self, video):
+        """Removes a video from the playlist, if it is in it."""
+        self._execute(_DELETE_PLAYLIST_VIDEO, (self._key, video.video_id))
+
+    def clear(self):
+        """Removes all videos from the playlist."""
+        self._execute(_CLEAR_PLAYLIST, (self._key,))
+
+
+class SqlitePlaylists(MutableMapping):
+    """A class used to represent the playlists stored in SQLite.
+
+    It is a mapping from upper-cased playlist name to SqlitePlaylist, so
+    it can replace VideoSession.playlists:
+        session.playlists = library.playlists()
+    Assigning a Playlist stores its name and videos.
+    """
+
+    def __init__(self, library):
+        self._library = library
+
+    def __getitem__(self, key):
+        row = self._library._fetch_one(_SELECT_PLAYLIST, (key,))
+        if row is None:
+            raise KeyError(key)
+        return SqlitePlaylist(self._library, key, row[0])
+
+    def __setitem__(self, key, playlist):
+        library = self._library
+        with library._lock, library._connection:
+            library._connection.execute(_CLEAR_PLAYLIST, (key,))
+            library._connection.execute(_DELETE_PLAYLIST, (key,))
+            library._connection.execute(_INSERT_PLAYLIST,
+                                        (key, playlist.name))
+            for video in playlist:
+                library._connection.execute(_INSERT_PLAYLIST_VIDEO,
+                                            (key, video.video_id, key))
+
+    def __delitem__(self, key):
+        library = self._library
+        with library._lock, library._connection:
+            if not library._connection.execute(_DELETE_PLAYLIST,
+                                               (key,)).rowcount:
+                raise KeyError(key)
+            library._connection.execute(_CLEAR_PLAYLIST, (key,))
+
+    def __iter__(self):
+        with self._library._lock:
+            rows = self._library._connection.execute(
+                _SELECT_PLAYLISTS).fetchall()
+        return (key for key, in rows)
+
+    def __len__(self):
+        return self._library._fetch_one(_COUNT_PLAYLISTS)[0]
+
+    def __contains__(self, key):
+        return self._library._fetch_one(_SELECT_PLAYLIST, (key,)) is not None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python3 -m src.sqlite_library "
+                 "<videos.txt> <database>")
+    imported = import_catalog(connect(sys.argv[2]), sys.argv[1])
+    print(f"Imported {imported} videos into {sys.argv[2]}")
@@ -0,0 +1,213 @@
+"""A durable store for playlists and flags.
+
+The state a user builds up (playlists and flagged videos) is kept in a
+directory holding two files:
+    snapshot.json  the whole state as of log sequence number "lsn"
+    wal.log        one JSON record per mutation made after the snapshot
+
+Every successful mutating command appends a record [lsn, op, *args] to
+the write-ahead log. Recovery loads the snapshot and replays only the log
+records with a larger lsn. Every snapshot_every records the state is
+written to a new snapshot and the log is emptied, so the log tail (and
+recovery time) stays bounded.
+
+fsync is what makes a record durable and also what makes appending
+slow, so records can be committed in groups: with group_size=N the log
+is fsynced once per N records, and by sync() and close(). Records of an
+unfinished group are lost on a crash, the state stays consistent.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from .command_metrics import span
+from .video_playlist import Playlist
+
+SNAPSHOT_FILE = "snapshot.json"
+LOG_FILE = "wal.log"
+
+DEFAULT_SNAPSHOT_EVERY = 10_000
+
+
+def _fsync_directory(directory):
+    """Makes a rename inside directory durable."""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class StateStore:
+    """A class used to persist the playlists of a session and the flags."""
+
+    def __init__(self, directory, group_size=1,
+                 snapshot_every=DEFAULT_SNAPSHOT_EVERY):
+        """The StateStore class is initialized.
+
+        Args:
+            directory: The directory holding the snapshot and the log.
+                It is created if it does not exist.
+            group_size: The number of records committed by one fsync, 1
+                fsyncs every record.
+            snapshot_every: The number of records after which the state
+                is compacted into a new snapshot.
+        """
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._group_size = group_size
+        self._snapshot_every = snapshot_every
+        self._video_library = None
+        self._session = None
+        self._log = None
+        self._lsn = 0
+        self._snapshot_lsn = 0
+        self._pending = 0
+
+    @property
+    def lsn(self):
+        """Returns the sequence number of the last record."""
+        return self._lsn
+
+    def recover(self, video_library, session):
+        """Restores the persisted state and starts logging.
+
+        The snapshot is loaded and the log records after it are replayed
+        into video_library and session, which are then the state that
+        later checkpoints write out. A record torn by a crash at the end
+        of the log is dropped.
+
+        Args:
+            video_library: The VideoLibrary the flags are restored into.
+            session: The VideoSession the playlists are restored into.
+
+        Returns:
+            The number of log records replayed.
+        """
+        self._video_library = video_library
+        self._session = session
+        flag_reasons = {}
+        snapshot_path = self._directory / SNAPSHOT_FILE
+        if snapshot_path.exists():
+            with open(snapshot_path, encoding="utf-8") as snapshot:
+                state = json.load(snapshot)
+            self._snapshot_lsn = self._lsn = state["lsn"]
+            flag_reasons.update(state["flags"])
+            for name, video_ids in state["playlists"]:
+                playlist = session.playlists[name.upper()] = Playlist(name)
+                for video_id in video_ids:
+                    self._add_to_playlist(playlist, video_id)
+
+        replayed = 0
+        log_path = self._directory / LOG_FILE
+        valid_size = 0
+        if log_path.exists():
+            with open(log_path, "rb") as log:
+                for line in log:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        lsn, op, *args = json.loads(line)
+                    except ValueError:
+                        break
+                    valid_size += len(line)
+                    if lsn <= self._lsn:
+                        # Already contained in the snapshot.
+                        continue
+                    self._replay(op, args, flag_reasons)
+                    self._lsn = lsn
+                    replayed += 1
+        # Flags are restored in one write rather than once per record.
+        video_library.restore_flags(flag_reasons)
+
+        self._log = open(log_path, "ab")
+        self._log.truncate(valid_size)
+        return replayed
+
+    def _add_to_playlist(self, playlist, video_id):
+        video = self._video_library.get_video(video_id)
+        # Videos removed from the catalog since are skipped.
+        if video is not None:
+            playlist.add(video)
+
+    def _replay(self, op, args, flag_reasons):
+        """Applies one log record to the session or to flag_reasons."""
+        playlists = self._session.playlists
+        if op == "FLAG_VIDEO":
+            video_id, flag_reason = args
+            flag_reasons[video_id] = flag_reason
+        elif op == "ALLOW_VIDEO":
+            flag_reasons.pop(args[0], None)
+        elif op == "CREATE_PLAYLIST":
+            playlists[args[0].upper()] = Playlist(args[0])
+        elif op == "DELETE_PLAYLIST":
+            playlists.pop(args[0].upper(), None)
+        elif op == "CLEAR_PLAYLIST":
+            playlists[args[0].upper()].clear()
+        elif op == "ADD_TO_PLAYLIST":
+            self._add_to_playlist(playlists[args[0].upper()], args[1])
+        elif op == "REMOVE_FROM_PLAYLIST":
+            video = self._video_library.get_video(args[1])
+            if video is not None:
+                playlists[args[0].upper()].remove(video)
+        else:
+            raise ValueError(f"Unknown log record: {op}")
+
+    def record(self, op, *args):
+        """Appends a mutation to the log.
+
+        Args:
+            op: The name of the mutating command, e.g. "ADD_TO_PLAYLIST".
+            args: Its arguments as applied, e.g. the playlist name and
+                the video_id.
+        """
+        self._lsn += 1
+        line = json.dumps([self._lsn, op, *args], separators=(",", ":"))
+        self._log.write(line.encode("utf-8") + b"\n")
+        self._pending += 1
+        if self._pending >= self._group_size:
+            self.sync()
+        if self._lsn - self._snapshot_lsn >= self._snapshot_every:
+            self.checkpoint()
+
+    def sync(self):
+        """Makes every record appended so far durable."""
+        if self._pending:
+            with span("state_store.fsync"):
+                self._log.flush()
+                os.fsync(self._log.fileno())
+            self._pending = 0
+
+    def checkpoint(self):
+        """Writes the current state to a new snapshot and empties the log."""
+        self.sync()
+        state = {
+            "lsn": self._lsn,
+            "flags": dict(self._video_library.iter_flags()),
+            "playlists": [[playlist.name,
+                           [video.video_id for video in playlist]]
+                          for playlist in self._session.playlists.values()],
+        }
+        snapshot_path = self._directory / SNAPSHOT_FILE
+        temporary_path = snapshot_path.with_suffix(".tmp")
+        with open(temporary_path, "w", encoding="utf-8") as snapshot:
+            json.dump(state, snapshot, separators=(",", ":"))
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temporary_path, snapshot_path)
+        _fsync_directory(self._directory)
+        # A crash before the log is emptied is harmless: its records are
+        # not newer than the snapshot and are skipped on recovery.
+        self._log.truncate(0)
+        os.fsync(self._log.fileno())
+        self._snapshot_lsn = self._lsn
+
+    def close(self):
+        """Commits the pending records, compacts the log and closes it."""
+        if self._log is None:
+            return
+        if self._lsn != self._snapshot_lsn:
+            self.checkpoint()
+        self._log.close()
+        self._log = None
@@ -0,0 +1,101 @@
+"""A video tag index class."""
+
+from bisect import bisect_left
+
+
+class TagIndex:
+    """A class used to represent an inverted index of video tags.
+
+    Tags are case-folded with upper() so that a lookup is a single dict hit.
+    Each posting list holds the tagged video ids in sorted order.
+    """
+
+    def __init__(self, videos=()):
+        """Builds the index of videos.
+
+        The posting lists are appended to and sorted once each, instead
+        of inserting every video at its place, which is quadratic in the
+        length of a list.
+
+        Args:
+            videos: The videos to index, with distinct video ids.
+        """
+        postings = {}
+        for video in videos:
+            for tag in {tag.upper() for tag in video.tags}:
+                posting = postings.get(tag)
+                if posting is None:
+                    postings[tag] = [video.video_id]
+                else:
+                    posting.append(video.video_id)
+        for posting in postings.values():
+            posting.sort()
+        self._postings = postings
+        # Tags whose posting list belongs to this index, None if all do.
+        self._owned = None
+
+    def copy(self):
+        """Returns a copy sharing the posting lists with this index.
+
+        From then on, both indexes copy a shared list before modifying it,
+        so neither sees the other's changes.
+        """
+        index = TagIndex()
+        index._postings = dict(self._postings)
+        index._owned = set()
+        self._owned = set()
+        return index
+
+    def _posting(self, tag):
+        """Returns the posting list of tag, owned by this index, or None."""
+        posting = self._postings.get(tag)
+        if self._owned is None or posting is None or tag in self._owned:
+            return posting
+        self._owned.add(tag)
+        posting = self._postings[tag] = list(posting)
+        return posting
+
+    def add(self, video_id, tags):
+        """Indexes a video under each of its tags.
+
+        Args:
+            video_id: The video url.
+            tags: The tags of the video.
+        """
+        for tag in {tag.upper() for tag in tags}:
+            posting = self._posting(tag)
+            if posting is None:
+                posting = self._postings[tag] = []
+                if self._owned is not None:
+                    self._owned.add(tag)
+            i = bisect_left(posting, video_id)
+            if i == len(posting) or posting[i] != video_id:
+                posting.insert(i, video_id)
+
+    def remove(self, video_id, tags):
+        """Removes a video from the posting list of each of its tags.
+
+        Args:
+            video_id: The video url.
+            tags: The tags the video was indexed with.
+        """
+        for tag in {tag.upper() for tag in tags}:
+            posting = self._posting(tag)
+            if posting is None:
+                continue
+            i = bisect_left(posting, video_id)
+            if i < len(posting) and posting[i] == video_id:
+                del posting[i]
+            if not posting:
+                del self._postings[tag]
+
+    def get(self, video_tag):
+        """Returns the sorted ids of all videos carrying video_tag.
+
+        Args:
+            video_tag: The video tag (case-insensitive).
+
+        Returns:
+            A sorted sequence of video ids. Empty if no video has the tag.
+        """
+        return self._postings.get(video_tag.upper(), ())
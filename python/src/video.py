@@ -2,9 +2,19 @@
 
 from typing import Sequence
 
+# The reason shown for videos flagged without one.
+DEFAULT_FLAG_REASON = "Not supplied"
+
 
 class Video:
-    """A class used to represent a Video."""
+    """A class used to represent a Video.
+
+    Videos are immutable catalog entries and can be shared by any number of
+    players. Whether a video is flagged is tracked by the VideoLibrary.
+    """
+
+    # No per-instance __dict__, catalogs hold millions of videos.
+    __slots__ = ("_title", "_video_id", "_tags", "_line")
 
     def __init__(self, video_title: str, video_id: str, video_tags: Sequence[str]):
         """Video constructor."""
@@ -15,8 +25,8 @@ class Video:
         # in case the caller changes the 'video_tags' they passed to us
         self._tags = tuple(video_tags)
 
-        self.flagged = False
-        self.flag_reason = "Not supplied"
+        # The rendered line, built on first use (see __repr__).
+        self._line = None
 
     @property
     def title(self) -> str:
@@ -33,15 +43,22 @@ class Video:
         """Returns the list of tags of a video."""
         return self._tags
 
-    # created so can sort videos in alphabetical order
+    # created so can sort videos in alphabetical order,
+    # ties are broken by video_id
     def __lt__(self, other):
-        return self._title < other.title
+        return (self._title, self._video_id) < (other.title, other.video_id)
 
     def __repr__(self):
-        # tags = ""
-        # for tag in video.tags:
-        #     tags += f"{tag} "
-        tags = (" ".join([tag for tag in self.tags]))
-        if self.flagged:
-            return f"{self.title} ({self.video_id}) [{tags}] - FLAGGED (reason: {self.flag_reason})"
-        return f"{self.title} ({self.video_id}) [{tags}]"
+        # Videos never change, so the line is rendered once and reused by
+        # every listing. The flag is not part of it, the library appends
+        # that while formatting.
+        line = self._line
+        if line is None:
+            line = self._line = format_line(self._title, self._video_id,
+                                            self._tags)
+        return line
+
+
+def format_line(title, video_id, tags):
+    """Returns the line a video is listed with, without its flag."""
+    return f"{title} ({video_id}) [{' '.join(tags)}]"
@@ -0,0 +1,245 @@
+"""A compact binary catalog format that is read through mmap.
+
+Layout (all integers little endian):
+    header   magic, video count and the offsets of the sections below
+    records  one fixed-width record per video, sorted by video_id:
+             title offset/length, video_id offset/length, tags offset/length
+    order    one u32 record number per video, in title order
+    strings  utf-8 string table; a video's tags are stored as one string
+             joined with TAG_SEPARATOR and shared between videos
+
+Opening a catalog only reads the header, so it takes the same time for
+any catalog size, and processes mapping the same file share its pages.
+
+Usage (from the python/ directory):
+    python3 -m src.video_catalog src/videos.txt videos.ytcat
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from .video import Video
+from .video_loader import iter_video_rows
+
+MAGIC = b"YTCAT\x00\x01\x00"
+TAG_SEPARATOR = "\x1f"
+
+_HEADER = struct.Struct("<8sQQQQ")
+_RECORD = struct.Struct("<QIQIQI")
+_ORDER = struct.Struct("<I")
+
+
+def is_compiled_catalog(path):
+    """Returns True if the file at path starts with the catalog magic."""
+    with open(path, "rb") as catalog_file:
+        return catalog_file.read(len(MAGIC)) == MAGIC
+
+
+def compile_catalog(source_path, target_path):
+    """Compiles a videos.txt file into the binary catalog format.
+
+    The catalog is written to a temporary file next to target_path, which
+    then replaces it. A MappedCatalog still open on the old file keeps
+    reading the old data instead of a file rewritten under it.
+
+    Args:
+        source_path: The videos.txt file to read.
+        target_path: The binary catalog file to write.
+
+    Returns:
+        The number of videos written.
+    """
+    directory = os.path.dirname(os.path.abspath(target_path))
+    fd, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as target:
+            count = _write_catalog(source_path, target)
+            target.flush()
+            os.fsync(target.fileno())
+        os.chmod(temporary_path, 0o644)
+        os.replace(temporary_path, target_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    return count
+
+
+def _write_catalog(source_path, target):
+    """Writes the catalog of source_path to the binary file target."""
+    rows = {}
+    strings = {}
+
+    target.write(b"\x00" * _HEADER.size)
+    strings_offset = target.tell()
+
+    def intern(text):
+        # Returns the (offset, length) of text in the string table,
+        # writing it only the first time it is seen.
+        if text not in strings:
+            data = text.encode("utf-8")
+            strings[text] = (target.tell() - strings_offset, len(data))
+            target.write(data)
+        return strings[text]
+
+    for title, video_id, tags in iter_video_rows(source_path):
+        rows[video_id.encode("utf-8")] = (
+            title, video_id,
+            intern(title) + intern(video_id)
+            + intern(TAG_SEPARATOR.join(tags)))
+    strings.clear()
+
+    records_offset = target.tell()
+    by_id = sorted(rows)
+    for video_id in by_id:
+        target.write(_RECORD.pack(*rows[video_id][2]))
+
+    order_offset = target.tell()
+    by_title = sorted(range(len(by_id)),
+                      key=lambda i: rows[by_id[i]][:2])
+    for record in by_title:
+        target.write(_ORDER.pack(record))
+
+    target.seek(0)
+    target.write(_HEADER.pack(MAGIC, len(by_id), records_offset,
+                              order_offset, strings_offset))
+    return len(rows)
+
+
+class MappedCatalog:
+    """A class used to represent a read-only, memory-mapped catalog.
+
+    It behaves like the read-only part of a dict from video_id to Video.
+    Video objects are materialised on first access and cached, so the same
+    video_id always returns the same Video object.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as catalog_file:
+            self._map = mmap.mmap(catalog_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+            self._path = path
+            self._stat = os.fstat(catalog_file.fileno())
+        (magic, self._count, self._records_offset, self._order_offset,
+         self._strings_offset) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled video catalog")
+        self._cache = {}
+
+    def rewritten_in_place(self):
+        """Returns True if the mapped file was modified since it was opened.
+
+        The mapping then shows the new bytes of the file, or faults past
+        its new end, instead of the catalog that was opened. A file that
+        was replaced, like compile_catalog does, is still mapped whole.
+        """
+        try:
+            stat = os.stat(self._path)
+        except OSError:
+            return False
+        return ((stat.st_dev, stat.st_ino)
+                == (self._stat.st_dev, self._stat.st_ino)
+                and (stat.st_size, stat.st_mtime_ns)
+                != (self._stat.st_size, self._stat.st_mtime_ns))
+
+    def __len__(self):
+        return self._count
+
+    def _record(self, i):
+        return _RECORD.unpack_from(
+            self._map, self._records_offset + i * _RECORD.size)
+
+    def _string(self, offset, length):
+        start = self._strings_offset + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def _video_id_bytes(self, i):
+        _, _, offset, length, _, _ = self._record(i)
+        start = self._strings_offset + offset
+        return self._map[start:start + length]
+
+    def _video(self, i):
+        video_id = self._video_id_bytes(i).decode("utf-8")
+        video = self._cache.get(video_id)
+        if video is None:
+            (title_offset, title_length, _, _,
+             tags_offset, tags_length) = self._record(i)
+            tags = self._string(tags_offset, tags_length)
+            tags = tags.split(TAG_SEPARATOR) if tags else ()
+            video = Video(self._string(title_offset, title_length), video_id,
+                          [sys.intern(tag) for tag in tags])
+            self._cache[video_id] = video
+        return video
+
+    def _find(self, video_id):
+        """Returns the record number of video_id, or -1 (binary search)."""
+        key = video_id.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._video_id_bytes(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._video_id_bytes(low) == key:
+            return low
+        return -1
+
+    def get(self, video_id, default=None):
+        video = self._cache.get(video_id)
+        if video is not None:
+            return video
+        i = self._find(video_id)
+        return self._video(i) if i >= 0 else default
+
+    def __getitem__(self, video_id):
+        video = self.get(video_id)
+        if video is None:
+            raise KeyError(video_id)
+        return video
+
+    def __contains__(self, video_id):
+        return self.get(video_id) is not None
+
+    def __iter__(self):
+        return (self._video_id_bytes(i).decode("utf-8")
+                for i in range(self._count))
+
+    def values(self):
+        """Iterates over all videos in video_id order."""
+        return (self._video(i) for i in range(self._count))
+
+    def items(self):
+        return ((video.video_id, video) for video in self.values())
+
+    def _sorted_video(self, position):
+        (record,) = _ORDER.unpack_from(
+            self._map, self._order_offset + position * _ORDER.size)
+        return self._video(record)
+
+    def iter_sorted(self, after=None):
+        """Iterates over all videos in title order.
+
+        Args:
+            after: Only videos whose (title, video_id) is greater are
+                returned; the start is found by binary search.
+        """
+        low, high = 0, self._count
+        while after is not None and low < high:
+            middle = (low + high) // 2
+            video = self._sorted_video(middle)
+            if (video.title, video.video_id) <= after:
+                low = middle + 1
+            else:
+                high = middle
+        for position in range(low, self._count):
+            yield self._sorted_video(position)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python3 -m src.video_catalog <videos.txt> <output>")
+    count = compile_catalog(sys.argv[1], sys.argv[2])
+    print(f"Compiled {count} videos into {sys.argv[2]}")
@@ -1,36 +1,165 @@
 """A video library class."""
 
 from .video import Video
+from .video_catalog import MappedCatalog, is_compiled_catalog
+from .video_loader import iter_video_rows
+from .sorted_index import SortedVideoIndex
+from .playable_set import PlayableSet
+from .library_snapshot import LibrarySnapshot
+from .shared_map import SharedMap
+from contextlib import contextmanager
 from pathlib import Path
-import csv
+import os
+import random
+import threading
 
+DEFAULT_CATALOG = Path(__file__).parent / "videos.txt"
 
-# Helper Wrapper around CSV reader to strip whitespace from around
-# each item.
-def _csv_reader_with_strip(reader):
-    yield from ((item.strip() for item in line) for line in reader)
+# Random picks checked against the snapshot before falling back to a scan.
+_RANDOM_ATTEMPTS = 8
+
+
+def catalog_stamp(path):
+    """Returns the (size, modification time) of a catalog file.
+
+    Raises:
+        OSError: If the file cannot be accessed.
+    """
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _iter_catalog_rows(path, progress=None):
+    """Yields (title, video_id, tags) rows of a text or compiled catalog."""
+    if is_compiled_catalog(path):
+        return ((video.title, video.video_id, video.tags)
+                for video in MappedCatalog(path).values())
+    return iter_video_rows(path, progress=progress)
+
+
+class CatalogDiff:
+    """A class used to describe what reloading a catalog changed.
+
+    Attributes:
+        added: The video_ids of the new videos.
+        removed: The video_ids of the videos no longer in the catalog.
+        changed: The video_ids of the videos whose title or tags changed.
+    """
+
+    __slots__ = ("added", "removed", "changed")
+
+    def __init__(self, added=(), removed=(), changed=()):
+        self.added = list(added)
+        self.removed = list(removed)
+        self.changed = list(changed)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
 
 
 class VideoLibrary:
-    """A class used to represent a Video Library."""
-
-    def __init__(self):
-        """The VideoLibrary class is initialized."""
-        self._videos = {}
-        with open(Path(__file__).parent / "videos.txt") as video_file:
-            reader = _csv_reader_with_strip(
-                csv.reader(video_file, delimiter="|"))
-            for video_info in reader:
-                title, url, tags = video_info
-                self._videos[url] = Video(
-                    title,
-                    url,
-                    [tag.strip() for tag in tags.split(",")] if tags else [],
-                )
+    """A class used to represent a Video Library.
+
+    The state lives in an immutable LibrarySnapshot. Reads go to the
+    current snapshot without taking a lock; writes are serialised by a
+    lock, prepare the next snapshot and publish it with a single
+    assignment. Use snapshot() to run several reads against one version.
+    """
+
+    def __init__(self, path=DEFAULT_CATALOG, progress=None):
+        """The VideoLibrary class is initialized.
+
+        Args:
+            path: The catalog to load, videos.txt by default. Either a text
+                catalog or one compiled with video_catalog.compile_catalog.
+            progress: Optional callable receiving the loader's progress,
+                see video_loader.iter_video_rows.
+        """
+        self._write_lock = threading.Lock()
+        self._playable = None
+        self._path = path
+        self._stamp = catalog_stamp(path)
+
+        if is_compiled_catalog(path):
+            # Compiled catalogs are memory-mapped and already title-ordered,
+            # the search indexes are only built when first needed.
+            self._snapshot = LibrarySnapshot(0, MappedCatalog(path),
+                                             SharedMap())
+            return
+
+        videos = {}
+        for title, url, tags in iter_video_rows(path, progress=progress):
+            videos[url] = Video(title, url, tags)
+        snapshot = LibrarySnapshot(0, SharedMap(videos), SharedMap())
+        snapshot._search_indexes()
+        snapshot._sorted_videos = SortedVideoIndex(videos.values())
+        self._snapshot = snapshot
+        self._playable_videos()
+
+    def snapshot(self):
+        """Returns the current LibrarySnapshot.
+
+        The snapshot does not change when the library is written to, so
+        a listing can be rendered from it while videos are being flagged,
+        added or removed.
+        """
+        return self._snapshot
+
+    @property
+    def catalog_path(self):
+        """Returns the path of the catalog file reload() reads."""
+        return self._path
+
+    @property
+    def catalog_version(self):
+        """Returns how many writes changed the catalog, see reload()."""
+        return self._snapshot.catalog_version
+
+    @contextmanager
+    def _writing(self, catalog=False):
+        """Yields a draft of the next snapshot and publishes it.
+
+        Writers are serialised; readers keep using the previous snapshot
+        until the draft is published at the end of the block.
+
+        Args:
+            catalog: Whether videos will be added or removed, which needs
+                copies of the catalog and indexes.
+        """
+        with self._write_lock:
+            draft = self._snapshot._draft(catalog)
+            yield draft
+            self._snapshot = draft
+
+    def _playable_videos(self):
+        """Returns the set of unflagged video ids, building it if needed.
+
+        The set is only modified by writers. Readers validate what they
+        pick from it against their own snapshot.
+        """
+        if self._playable is None:
+            snapshot = self._snapshot
+            self._playable = PlayableSet(
+                video.video_id for video in snapshot.get_all_videos()
+                if not snapshot.is_flagged(video.video_id))
+        return self._playable
+
+    def __len__(self):
+        return len(self._snapshot)
 
     def get_all_videos(self):
         """Returns all available video information from the video library."""
-        return list(self._videos.values())
+        return self._snapshot.get_all_videos()
+
+    def iter_videos(self, after=None):
+        """Iterates over all videos in title order without copying them.
+
+        See LibrarySnapshot.iter_videos.
+        """
+        return self._snapshot.iter_videos(after)
 
     def get_video(self, video_id):
         """Returns the video object (title, url, tags) from the video library.
@@ -42,4 +171,256 @@ class VideoLibrary:
             The Video object for the requested video_id. None if the video
             does not exist.
         """
-        return self._videos.get(video_id, None)
+        return self._snapshot.get_video(video_id)
+
+    def add_video(self, video):
+        """Adds a video to the library and to every index.
+
+        A video already stored under the same video_id is replaced, and is
+        no longer flagged.
+
+        Args:
+            video: The Video object to be added.
+        """
+        with self._writing(catalog=True) as draft:
+            draft._add(video)
+            self._playable_videos().add(video.video_id)
+
+    def remove_video(self, video_id):
+        """Removes a video from the library and from every index.
+
+        Args:
+            video_id: The video url.
+
+        Returns:
+            The removed Video object. None if the video does not exist.
+        """
+        if self._snapshot.get_video(video_id) is None:
+            return None
+        with self._writing(catalog=True) as draft:
+            video = draft._remove(video_id)
+            self._playable_videos().discard(video_id)
+        return video
+
+    def is_flagged(self, video_id):
+        """Returns True if the video with the given video_id is flagged."""
+        return self._snapshot.is_flagged(video_id)
+
+    def get_flag_reason(self, video_id):
+        """Returns the reason a video was flagged for, None if not flagged."""
+        return self._snapshot.get_flag_reason(video_id)
+
+    def iter_flags(self):
+        """Iterates over (video_id, flag_reason) of all flagged videos."""
+        return self._snapshot.iter_flags()
+
+    def format_video(self, video):
+        """Returns the line a video is listed with, including its flag.
+
+        Args:
+            video: A Video object of this library.
+        """
+        return self._snapshot.format_video(video)
+
+    def flag_video(self, video_id, flag_reason=None):
+        """Marks a video as flagged so it can no longer be played.
+
+        Args:
+            video_id: The video url.
+            flag_reason: Reason for flagging the video, "Not supplied" if
+                None.
+
+        Returns:
+            The flagged Video object. None if the video does not exist.
+        """
+        video = self._snapshot.get_video(video_id)
+        if video is not None:
+            with self._writing() as draft:
+                draft._flag(video_id, flag_reason)
+                self._playable_videos().discard(video_id)
+        return video
+
+    def allow_video(self, video_id):
+        """Removes the flag from a video.
+
+        Args:
+            video_id: The video url.
+
+        Returns:
+            The allowed Video object. None if the video does not exist.
+        """
+        video = self._snapshot.get_video(video_id)
+        if video is not None:
+            with self._writing() as draft:
+                draft._allow(video_id)
+                self._playable_videos().add(video_id)
+        return video
+
+    def restore_flags(self, flag_reasons):
+        """Replaces all flags at once, publishing a single new version.
+
+        Used to restore persisted state; ids that are no longer in the
+        catalog are ignored.
+
+        Args:
+            flag_reasons: A dict of flag reasons by video_id.
+        """
+        with self._writing() as draft:
+            draft._replace_flags(flag_reasons)
+            self._playable = PlayableSet(
+                video.video_id for video in draft.get_all_videos()
+                if not draft.is_flagged(video.video_id))
+
+    def get_random_video(self, rng=random):
+        """Returns a random video that is not flagged, in O(1).
+
+        The pick comes from the writer-maintained playable set without
+        locking. It is checked against the current snapshot, and after a
+        few misses (only possible while writers are busy) the snapshot
+        itself is scanned.
+
+        Args:
+            rng: The source of randomness, anything providing randrange
+                like the random module or a random.Random instance.
+
+        Returns:
+            A Video object. None if every video is flagged.
+        """
+        snapshot = self._snapshot
+        playable = self._playable_videos()
+        for _ in range(_RANDOM_ATTEMPTS):
+            try:
+                video_id = playable.choice(rng)
+            except IndexError:
+                # The set shrank between choosing an index and reading it.
+                continue
+            if video_id is None:
+                break
+            video = snapshot.get_video(video_id)
+            if video is not None and not snapshot.is_flagged(video_id):
+                return video
+        videos = [video for video in snapshot.get_all_videos()
+                  if not snapshot.is_flagged(video.video_id)]
+        if not videos:
+            return None
+        return videos[rng.randrange(len(videos))]
+
+    def search_titles(self, search_term):
+        """Returns all videos whose title contains the search_term.
+
+        See LibrarySnapshot.search_titles.
+        """
+        return self._snapshot.search_titles(search_term)
+
+    def search_tag(self, video_tag):
+        """Returns all videos carrying the video_tag.
+
+        See LibrarySnapshot.search_tag.
+        """
+        return self._snapshot.search_tag(video_tag)
+
+    def fuzzy_search_titles(self, search_term):
+        """Iterates over the videos matching search_term with typos.
+
+        See LibrarySnapshot.fuzzy_search_titles.
+        """
+        return self._snapshot.fuzzy_search_titles(search_term)
+
+    def suggest(self, prefix, limit):
+        """Returns the first unflagged videos completing a typed prefix.
+
+        See LibrarySnapshot.suggest.
+        """
+        return self._snapshot.suggest(prefix, limit)
+
+    def iter_search_titles(self, search_term, after=None):
+        """Iterates lazily over the videos whose title contains search_term.
+
+        See LibrarySnapshot.iter_search_titles.
+        """
+        return self._snapshot.iter_search_titles(search_term, after)
+
+    def iter_search_tag(self, video_tag, after=None):
+        """Iterates lazily over the videos carrying video_tag.
+
+        See LibrarySnapshot.iter_search_tag.
+        """
+        return self._snapshot.iter_search_tag(video_tag, after)
+
+    def reload(self, path=None):
+        """Applies the changes of a catalog file to the library.
+
+        The file is read and compared with the loaded catalog, and only
+        the rows that were added, removed or whose title or tags changed
+        are applied, in one write. Changed videos keep their flag. Nothing
+        is read when the file's size and modification time did not change
+        since it was last loaded.
+
+        Sessions drop the removed videos from their playlists when they
+        next use them, see VideoSession.refresh.
+
+        Args:
+            path: The catalog file to read, the one loaded last by default.
+                Either a text catalog or a compiled one.
+
+        Returns:
+            A CatalogDiff, false if nothing changed.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If a row of the file cannot be parsed, or the
+                loaded compiled catalog was rewritten in place instead of
+                replaced, so there is nothing left to compare with.
+        """
+        path = self._path if path is None else path
+        stamp = catalog_stamp(path)
+        if path == self._path and stamp == self._stamp:
+            return CatalogDiff()
+        rows = {}
+        for title, video_id, tags in _iter_catalog_rows(path):
+            # Later rows replace earlier ones, like when loading.
+            rows[video_id] = (title, tags)
+
+        with self._write_lock:
+            snapshot = self._snapshot
+            if (isinstance(snapshot._videos, MappedCatalog)
+                    and snapshot._videos.rewritten_in_place()):
+                # The loaded catalog is gone, diffing against it would
+                # report every video as added and garbage as removed.
+                raise ValueError(
+                    f"{self._path} was rewritten in place, "
+                    f"compile catalogs with compile_catalog")
+            added = []
+            changed = []
+            for video_id, (title, tags) in rows.items():
+                video = snapshot.get_video(video_id)
+                if video is None:
+                    added.append(Video(title, video_id, tags))
+                elif video.title != title or video.tags != tuple(tags):
+                    changed.append(Video(title, video_id, tags))
+            # Only look for removed videos when some loaded one is missing
+            # from the file.
+            removed = []
+            if len(rows) - len(added) < len(snapshot):
+                removed = [video_id for video_id in snapshot._video_ids()
+                           if video_id not in rows]
+            diff = CatalogDiff((video.video_id for video in added), removed,
+                               (video.video_id for video in changed))
+            if diff:
+                playable = self._playable_videos()
+                draft = snapshot._draft(catalog=True)
+                for video_id in removed:
+                    draft._remove(video_id)
+                    playable.discard(video_id)
+                for video in changed:
+                    flag_reason = draft.get_flag_reason(video.video_id)
+                    draft._add(video)
+                    if flag_reason is not None:
+                        draft._flag(video.video_id, flag_reason)
+                for video in added:
+                    draft._add(video)
+                    playable.add(video.video_id)
+                self._snapshot = draft
+            self._path = path
+            self._stamp = stamp
+        return diff
@@ -0,0 +1,82 @@
+"""A streaming loader for the videos.txt catalog format."""
+
+import os
+import sys
+
+# Size of the blocks read from the catalog file. Only one block plus one
+# partial line is held in memory at a time.
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def parse_video_line(line):
+    """Parses one `title | video_id | tag, tag` catalog line.
+
+    Args:
+        line: A decoded catalog line without its line terminator.
+
+    Returns:
+        A (title, video_id, tags) tuple where tags is a tuple of interned
+        strings, so every video carrying a tag shares one string object.
+
+    Raises:
+        ValueError: If the line does not have exactly three fields.
+    """
+    fields = line.split("|")
+    if len(fields) != 3:
+        raise ValueError(f"Invalid catalog line: {line!r}")
+    title, video_id, tags = fields
+    tags = tags.strip()
+    return (
+        title.strip(),
+        video_id.strip(),
+        tuple([sys.intern(tag.strip()) for tag in tags.split(",")])
+        if tags else (),
+    )
+
+
+def iter_video_rows(path, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Yields the parsed rows of a catalog file, reading it in chunks.
+
+    Args:
+        path: The path of the catalog file.
+        chunk_size: The number of bytes read from the file at a time.
+        progress: Optional callable invoked after every chunk as
+            progress(bytes_read, total_bytes, rows_read).
+
+    Yields:
+        (title, video_id, tags) tuples, see parse_video_line. Rows with the
+        same tags share one tags tuple.
+
+    Raises:
+        ValueError: If a line is not a valid catalog row.
+    """
+    shared_tags = {}
+    total_bytes = os.path.getsize(path)
+    bytes_read = 0
+    rows_read = 0
+    pending = b""
+    with open(path, "rb") as video_file:
+        while True:
+            chunk = video_file.read(chunk_size)
+            if not chunk:
+                break
+            bytes_read += len(chunk)
+            chunk = pending + chunk
+            end = chunk.rfind(b"\n") + 1
+            pending = chunk[end:]
+            # Decoding only up to the last complete line keeps multi-byte
+            # characters split across chunks intact.
+            for line in chunk[:end].decode("utf-8").split("\n"):
+                if line and not line.isspace():
+                    rows_read += 1
+                    title, video_id, tags = parse_video_line(line)
+                    yield title, video_id, shared_tags.setdefault(tags, tags)
+            if progress is not None:
+                progress(bytes_read, total_bytes, rows_read)
+    line = pending.decode("utf-8")
+    if line and not line.isspace():
+        rows_read += 1
+        title, video_id, tags = parse_video_line(line)
+        yield title, video_id, shared_tags.setdefault(tags, tags)
+        if progress is not None:
+            progress(bytes_read, total_bytes, rows_read)
@@ -1,34 +1,218 @@
 """A video player class."""
 
 from .video_library import VideoLibrary
+from itertools import islice
 import random
+from .sorted_index import decode_cursor, encode_cursor
 from .video_playlist import Playlist
+from .output_sink import OutputSink
+from .video_session import VideoSession
+
+# Results shown by FUZZY_SEARCH_VIDEOS, the best ranked ones.
+FUZZY_SEARCH_RESULTS = 10
+# Completions shown by SUGGEST when no count is given.
+SUGGESTIONS = 10
 
 
 class VideoPlayer:
-    """A class used to represent a Video Player."""
+    """A class used to represent a Video Player.
 
-    def __init__(self):
-        self._video_library = VideoLibrary()
-        self.current_playing = None
-        self.paused = False
-        self.playlists = {}
+    To serve many users, load one VideoLibrary and create a VideoPlayer
+    per user on top of it; each player keeps its own VideoSession.
+    """
+
+    def __init__(self, video_library=None, rng=random, read_line=None,
+                 output=None, session=None, journal=None,
+                 defer_answers=False):
+        """The VideoPlayer class is initialized.
+
+        Args:
+            video_library: The library to play from, shared with other
+                players. A VideoLibrary over videos.txt is loaded if none
+                is given.
+            rng: The source of randomness for PLAY_RANDOM, e.g. a seeded
+                random.Random instance in tests.
+            read_line: Called without arguments to read the answer to the
+                search follow-up question. Defaults to input().
+            output: The OutputSink all output is written to. Defaults to a
+                sink writing to sys.stdout.
+            session: The VideoSession holding playback state and playlists.
+                A new, empty session is created if none is given.
+            journal: Optional StateStore every successful playlist or
+                flag mutation is recorded to.
+            defer_answers: If True, read_line is never called. A command
+                asking the search follow-up question returns right after
+                it, with awaiting_answer set, and the answer is passed to
+                answer() later. A server uses this so that no thread waits
+                for a client to type.
+        """
+        if video_library is None:
+            video_library = VideoLibrary()
+        self._video_library = video_library
+        self._rng = rng
+        self._read_line = read_line
+        self._output = OutputSink() if output is None else output
+        self._session = VideoSession() if session is None else session
+        self._journal = journal
+        self._defer_answers = defer_answers
+        # The videos offered by an unanswered follow-up question.
+        self._choices = None
+
+    @property
+    def session(self):
+        """Returns the VideoSession of this player."""
+        return self._session
+
+    @property
+    def video_library(self):
+        """Returns the library this player plays from."""
+        return self._video_library
+
+    def _sync_session(self):
+        """Refreshes the session's videos if the catalog changed since."""
+        # Only a VideoLibrary replaces or removes videos under a session;
+        # the other libraries have no catalog_version.
+        version = getattr(self._video_library, "catalog_version", 0)
+        if self._session.catalog_version != version:
+            self._session.refresh(self._video_library)
+
+    @property
+    def current_playing(self):
+        self._sync_session()
+        return self._session.current_playing
+
+    @current_playing.setter
+    def current_playing(self, video):
+        self._session.current_playing = video
+
+    @property
+    def paused(self):
+        return self._session.paused
+
+    @paused.setter
+    def paused(self, paused):
+        self._session.paused = paused
+
+    @property
+    def playlists(self):
+        self._sync_session()
+        return self._session.playlists
+
+    @property
+    def output(self):
+        """Returns the OutputSink the player writes to."""
+        return self._output
+
+    def _is_flagged(self, video):
+        """Returns True if the video is flagged in the library."""
+        return self._video_library.is_flagged(video.video_id)
+
+    def _record(self, op, *args):
+        """Records a mutation to the journal, if there is one."""
+        if self._journal is not None:
+            self._journal.record(op, *args)
+
+    @property
+    def awaiting_answer(self):
+        """Returns True if a deferred follow-up question awaits its answer."""
+        return self._choices is not None
+
+    def answer(self, answer):
+        """Answers the deferred follow-up question, see defer_answers.
+
+        Args:
+            answer: The line the user typed.
+        """
+        choices, self._choices = self._choices, None
+        if choices is not None:
+            self._play_choice(choices, lambda: answer)
+
+    def _read_answer(self):
+        """Reads the user's answer to a follow-up question."""
+        # The question has to be visible before waiting for the answer.
+        self._output.flush()
+        if self._read_line is None:
+            return input()
+        return self._read_line()
 
     def number_of_videos(self):
-        num_videos = len(self._video_library.get_all_videos())
-        print(f"{num_videos} videos in the library")
+        num_videos = len(self._video_library)
+        self._output.write_line(f"{num_videos} videos in the library")
+
+    def _read_page(self, action, page_size, cursor):
+        """Parses the paging arguments of a listing command.
 
-    def show_all_videos(self):
-        """Returns all videos."""
-        print("Here's a list of all available videos:")
-        list_videos = self._video_library.get_all_videos()
-        list_videos.sort()  # uses new Video class method
+        Args:
+            action: What the command does, for error messages.
+            page_size: The page_size argument, None to list everything.
+            cursor: The cursor argument, None for the first page.
+
+        Returns:
+            A (page_size, after) tuple, where page_size is an int or None
+            and after a sort key or None. None if an argument is invalid,
+            after writing why.
+        """
+        try:
+            if page_size is not None:
+                page_size = int(page_size)
+        except ValueError:
+            page_size = 0
+        if page_size is not None and page_size < 1:
+            self._output.write_line(
+                f"Cannot {action}: Page size must be a positive number")
+            return None
+        try:
+            after = None if cursor is None else decode_cursor(cursor)
+        except ValueError:
+            self._output.write_line(f"Cannot {action}: Invalid cursor")
+            return None
+        return page_size, after
+
+    def show_all_videos(self, page_size=None, cursor=None):
+        """Returns all videos, or one page of them.
 
-        for video in list_videos:
+        Args:
+            page_size: Optional number of videos to show. When more follow,
+                the command showing the next page is printed after them.
+            cursor: The cursor of the page to show, from that command.
+        """
+        page = self._read_page("show videos", page_size, cursor)
+        if page is None:
+            return
+        page_size, after = page
+        self._output.write_line("Here's a list of all available videos:")
+        # One snapshot, so the listing is consistent while others write.
+        library = self._video_library.snapshot()
+        videos = library.iter_videos(after)
+        video = None
+        for video in islice(videos, page_size):
             # Created class function to print out video class in the correct form
             # tags = (" ".join([tag for tag in video.tags]))
-            # print(f"{video.title} ({video.video_id}) [{tags}]")
-            print(video)
+            # self._output.write_line(f"{video.title} ({video.video_id}) [{tags}]")
+            self._output.write_line(library.format_video(video))
+        if page_size is not None and next(videos, None) is not None:
+            self._output.write_line(
+                f"Next page: SHOW_ALL_VIDEOS {page_size} "
+                f"{encode_cursor(video)}")
+
+    def reload_library(self):
+        """Reloads the catalog file, applying only the videos that changed."""
+        reload = getattr(self._video_library, "reload", None)
+        if reload is None:
+            self._output.write_line(
+                "Cannot reload library: This library cannot be reloaded")
+            return
+        try:
+            diff = reload()
+        except (OSError, ValueError) as e:
+            self._output.write_line(f"Cannot reload library: {e}")
+            return
+        if not diff:
+            self._output.write_line("Library is up to date")
+            return
+        self._output.write_line(
+            f"Reloaded library: {len(diff.added)} added, "
+            f"{len(diff.removed)} removed, {len(diff.changed)} changed")
 
     def play_video(self, video_id):
         """Plays the respective video.
@@ -39,20 +223,20 @@ class VideoPlayer:
 
         video = self._video_library.get_video(video_id)
 
-        if self.current_playing == None and video != None and not video.flagged:
-            print(f"Playing video: {video.title}")
+        if self.current_playing == None and video != None and not self._is_flagged(video):
+            self._output.write_line(f"Playing video: {video.title}")
             self.current_playing = video
 
-        elif self.current_playing != None and video != None and not video.flagged:
-            print(f"Stopping video: {self.current_playing.title}")
-            print(f"Playing video: {video.title}")
+        elif self.current_playing != None and video != None and not self._is_flagged(video):
+            self._output.write_line(f"Stopping video: {self.current_playing.title}")
+            self._output.write_line(f"Playing video: {video.title}")
             self.current_playing = video
 
-        elif video != None and video.flagged == True:
-            print(f"Cannot play video: Video is currently flagged (reason: {video.flag_reason})")
+        elif video != None and self._is_flagged(video):
+            self._output.write_line(f"Cannot play video: Video is currently flagged (reason: {self._video_library.get_flag_reason(video.video_id)})")
 
         elif video == None:
-            print("Cannot play video: Video does not exist")
+            self._output.write_line("Cannot play video: Video does not exist")
 
         self.paused = False
 
@@ -60,65 +244,62 @@ class VideoPlayer:
         """Stops the current video."""
 
         if self.current_playing != None:
-            print(f"Stopping video: {self.current_playing.title}")
+            self._output.write_line(f"Stopping video: {self.current_playing.title}")
             self.current_playing = None
         else:
-            print("Cannot stop video: No video is currently playing")
+            self._output.write_line("Cannot stop video: No video is currently playing")
 
     def play_random_video(self):
         """Plays a random video from the video library."""
 
-        list_videos = self._video_library.get_all_videos()
-        list_videos = [video for video in list_videos if not video.flagged]
+        random_vid = self._video_library.get_random_video(self._rng)
 
-        if len(list_videos) != 0:
-            random_vid = list_videos[random.randint(0, len(list_videos) - 1)]
-            if random_vid != None:
-                self.play_video(random_vid._video_id)
+        if random_vid != None:
+            self.play_video(random_vid.video_id)
 
         else:
-            print("No videos available")
+            self._output.write_line("No videos available")
 
     def pause_video(self):
         """Pauses the current video."""
 
         if not self.paused and self.current_playing != None:
-            print(f"Pausing video: {self.current_playing.title}")
+            self._output.write_line(f"Pausing video: {self.current_playing.title}")
             self.paused = True
 
         elif self.paused == True and self.current_playing != None:
-            print(f"Video already paused: {self.current_playing.title}")
+            self._output.write_line(f"Video already paused: {self.current_playing.title}")
 
         elif self.current_playing == None:
-            print("Cannot pause video: No video is currently playing")
+            self._output.write_line("Cannot pause video: No video is currently playing")
 
     def continue_video(self):
         """Resumes playing the current video."""
 
         if self.paused and self.current_playing != None:
-            print(f"Continuing video: {self.current_playing.title}")
+            self._output.write_line(f"Continuing video: {self.current_playing.title}")
             self.paused = False
 
         elif not self.paused and self.current_playing != None:
-            print("Cannot continue video: Video is not paused")
+            self._output.write_line("Cannot continue video: Video is not paused")
 
         elif self.current_playing == None:
-            print("Cannot continue video: No video is currently playing")
+            self._output.write_line("Cannot continue video: No video is currently playing")
 
     def show_playing(self):
         """Displays video currently playing."""
 
         if self.current_playing != None and not self.paused:
             # tags = (" ".join([tag for tag in self.current_playing.tags]))
-            # print(f"Currently playing: {self.current_playing.title} ({self.current_playing.video_id}) [{tags}]")
-            print(f"Currently playing: {self.current_playing}")
+            # self._output.write_line(f"Currently playing: {self.current_playing.title} ({self.current_playing.video_id}) [{tags}]")
+            self._output.write_line(f"Currently playing: {self._video_library.format_video(self.current_playing)}")
 
         elif self.current_playing != None and self.paused:
-            print(f"Currently playing: {self.current_playing} - PAUSED")
+            self._output.write_line(f"Currently playing: {self._video_library.format_video(self.current_playing)} - PAUSED")
 
 
         elif self.current_playing == None:
-            print("No video is currently playing")
+            self._output.write_line("No video is currently playing")
 
     def create_playlist(self, playlist_name):
         """Creates a playlist with a given name.
@@ -129,10 +310,11 @@ class VideoPlayer:
 
         if playlist_name.upper() not in self.playlists:
             self.playlists[playlist_name.upper()] = Playlist(playlist_name)
-            print(f"Successfully created new playlist: {playlist_name}")
+            self._record("CREATE_PLAYLIST", playlist_name)
+            self._output.write_line(f"Successfully created new playlist: {playlist_name}")
 
         else:
-            print("Cannot create playlist: A playlist with the same name already exists")
+            self._output.write_line("Cannot create playlist: A playlist with the same name already exists")
 
     def add_to_playlist(self, playlist_name, video_id):
         """Adds a video to a playlist with a given name.
@@ -145,44 +327,45 @@ class VideoPlayer:
 
         # If playlist not found
         if playlist_name.upper() not in self.playlists:
-            print(f"Cannot add video to {playlist_name}: Playlist does not exist")
+            self._output.write_line(f"Cannot add video to {playlist_name}: Playlist does not exist")
 
         # If playlist found
         elif playlist_name.upper() in self.playlists:
 
             # If video doesn't exists
-            if video not in self._video_library.get_all_videos():
-                print(f"Cannot add video to {playlist_name}: Video does not exist")
+            if video is None:
+                self._output.write_line(f"Cannot add video to {playlist_name}: Video does not exist")
 
             # If video exist
             else:
 
                 # If video is not in playlist
-                if video not in self.playlists[playlist_name.upper()].videos and not video.flagged:
-                    self.playlists[playlist_name.upper()].videos.append(video)
-                    print(f"Added video to {playlist_name}: {video.title}")
+                if video not in self.playlists[playlist_name.upper()] and not self._is_flagged(video):
+                    self.playlists[playlist_name.upper()].add(video)
+                    self._record("ADD_TO_PLAYLIST", playlist_name, video_id)
+                    self._output.write_line(f"Added video to {playlist_name}: {video.title}")
 
-                elif video.flagged:
-                    print(
-                        f"Cannot add video to {playlist_name}: Video is currently flagged (reason: {video.flag_reason})")
+                elif self._is_flagged(video):
+                    self._output.write_line(
+                        f"Cannot add video to {playlist_name}: Video is currently flagged (reason: {self._video_library.get_flag_reason(video.video_id)})")
 
                 # If video is already in the playlist
                 else:
-                    print(f"Cannot add video to {playlist_name}: Video already added")
+                    self._output.write_line(f"Cannot add video to {playlist_name}: Video already added")
 
     def show_all_playlists(self):
         """Display all playlists."""
 
         if len(self.playlists) == 0:
-            print("No playlists exist yet")
+            self._output.write_line("No playlists exist yet")
             return
 
         playlists_names = [self.playlists[playlist].name for playlist in self.playlists]
         playlists_names.sort()
 
-        print("Showing all playlists:")
+        self._output.write_line("Showing all playlists:")
         for playlist in playlists_names:
-            print(playlist)
+            self._output.write_line(playlist)
 
     def show_playlist(self, playlist_name):
         """Display all videos in a playlist with a given name.
@@ -192,16 +375,16 @@ class VideoPlayer:
         """
 
         if playlist_name.upper() not in self.playlists:
-            print(f"Cannot show playlist {playlist_name}: Playlist does not exist")
+            self._output.write_line(f"Cannot show playlist {playlist_name}: Playlist does not exist")
 
         else:
-            print(f"Showing playlist: {playlist_name}")
+            self._output.write_line(f"Showing playlist: {playlist_name}")
 
-            if len(self.playlists[playlist_name.upper()].videos) != 0:
-                for video in self.playlists[playlist_name.upper()].videos:
-                    print(video)
+            if len(self.playlists[playlist_name.upper()]) != 0:
+                for video in self.playlists[playlist_name.upper()]:
+                    self._output.write_line(self._video_library.format_video(video))
             else:
-                print("No videos here yet")
+                self._output.write_line("No videos here yet")
 
     def remove_from_playlist(self, playlist_name, video_id):
         """Removes a video to a playlist with a given name.
@@ -214,26 +397,27 @@ class VideoPlayer:
 
         # If playlist not found
         if playlist_name.upper() not in self.playlists:
-            print(f"Cannot remove video from {playlist_name}: Playlist does not exist")
+            self._output.write_line(f"Cannot remove video from {playlist_name}: Playlist does not exist")
 
         # If playlist found
         elif playlist_name.upper() in self.playlists:
 
             # If video doesn't exists
-            if video not in self._video_library.get_all_videos():
-                print(f"Cannot remove video from {playlist_name}: Video does not exist")
+            if video is None:
+                self._output.write_line(f"Cannot remove video from {playlist_name}: Video does not exist")
 
             # If video exist
             else:
 
                 # If video is not in playlist
-                if video not in self.playlists[playlist_name.upper()].videos:
-                    print(f"Cannot remove video from {playlist_name}: Video is not in playlist")
+                if video not in self.playlists[playlist_name.upper()]:
+                    self._output.write_line(f"Cannot remove video from {playlist_name}: Video is not in playlist")
 
                 # If video is already in the playlist
                 else:
-                    self.playlists[playlist_name.upper()].videos.remove(video)
-                    print(f"Removed video from {playlist_name}: {video.title}")
+                    self.playlists[playlist_name.upper()].remove(video)
+                    self._record("REMOVE_FROM_PLAYLIST", playlist_name, video_id)
+                    self._output.write_line(f"Removed video from {playlist_name}: {video.title}")
 
     def clear_playlist(self, playlist_name):
         """Removes all videos from a playlist with a given name.
@@ -243,11 +427,12 @@ class VideoPlayer:
         """
         # If playlist not found
         if playlist_name.upper() not in self.playlists:
-            print(f"Cannot clear playlist {playlist_name}: Playlist does not exist")
+            self._output.write_line(f"Cannot clear playlist {playlist_name}: Playlist does not exist")
 
         else:
-            self.playlists[playlist_name.upper()].videos.clear()
-            print(f"Successfully removed all videos from {playlist_name}")
+            self.playlists[playlist_name.upper()].clear()
+            self._record("CLEAR_PLAYLIST", playlist_name)
+            self._output.write_line(f"Successfully removed all videos from {playlist_name}")
 
     def delete_playlist(self, playlist_name):
         """Deletes a playlist with a given name.
@@ -257,88 +442,159 @@ class VideoPlayer:
         """
         # If playlist not found
         if playlist_name.upper() not in self.playlists:
-            print(f"Cannot delete playlist {playlist_name}: Playlist does not exist")
+            self._output.write_line(f"Cannot delete playlist {playlist_name}: Playlist does not exist")
 
         else:
             self.playlists.pop(playlist_name.upper())
-            print(f"Deleted playlist: {playlist_name}")
+            self._record("DELETE_PLAYLIST", playlist_name)
+            self._output.write_line(f"Deleted playlist: {playlist_name}")
 
-    def search_videos(self, search_term):
+    def search_videos(self, search_term, page_size=None, cursor=None):
         """Display all the videos whose titles contain the search_term.
 
         Args:
             search_term: The query to be used in search.
+            page_size: Optional number of results to show, see
+                show_all_videos.
+            cursor: The cursor of the page to show.
         """
+        page = self._read_page("search videos", page_size, cursor)
+        if page is None:
+            return
+        page_size, after = page
+        library = self._video_library.snapshot()
+        if page_size is None:
+            list_videos = library.search_titles(search_term)
+        else:
+            list_videos = library.iter_search_titles(search_term, after)
+        self._show_search_results(library, list_videos, search_term,
+                                  "SEARCH_VIDEOS", page_size)
 
-        list_videos = self._video_library.get_all_videos()
-        list_videos.sort()
-        count = 0
-        search_videos = []
+    def search_videos_tag(self, video_tag, page_size=None, cursor=None):
+        """Display all videos whose tags contains the provided tag.
 
-        # Searches for video
-        for video in list_videos:
-            if search_term.upper() in video.title.upper() and not video.flagged:
-                count += 1
-                search_videos.append((str(count), video))
+        Args:
+            video_tag: The video tag to be used in search.
+            page_size: Optional number of results to show, see
+                show_all_videos.
+            cursor: The cursor of the page to show.
+        """
+        page = self._read_page("search videos", page_size, cursor)
+        if page is None:
+            return
+        page_size, after = page
+        library = self._video_library.snapshot()
+        if page_size is None:
+            list_videos = library.search_tag(video_tag)
+        else:
+            list_videos = library.iter_search_tag(video_tag, after)
+        self._show_search_results(library, list_videos, video_tag,
+                                  "SEARCH_VIDEOS_WITH_TAG", page_size)
 
-        # if none found
-        if count == 0:
-            print(f"No search results for {search_term}")
+    def fuzzy_search_videos(self, search_term):
+        """Display the videos whose titles match search_term despite typos.
 
-        else:
-            print(f"Here are the results for {search_term}:")
-            for i in search_videos:
-                print(f"{i[0]}) {i[1]}")
-
-            print("Would you like to play any of the above? If yes, specify the number of the video.")
-            print("If your answer is not a valid number, we will assume it's a no.")
-
-            try:
-                user_input = int(input())
-                if 1 <= user_input <= len(search_videos):
-                    chosen_video = search_videos[user_input - 1][1]
-                    self.play_video(chosen_video.video_id)
-            except:
-                pass
-
-    def search_videos_tag(self, video_tag):
-        """Display all videos whose tags contains the provided tag.
+        The FUZZY_SEARCH_RESULTS most relevant videos are shown, best
+        first, see FuzzyIndex.search.
 
         Args:
-            video_tag: The video tag to be used in search.
+            search_term: The query, words separated by underscores.
+        """
+        library = self._video_library.snapshot()
+        fuzzy_search = getattr(library, "fuzzy_search_titles", None)
+        if fuzzy_search is None:
+            self._output.write_line(
+                "Cannot search videos: This library has no fuzzy search")
+            return
+        videos = (video for video in fuzzy_search(search_term)
+                  if not library.is_flagged(video.video_id))
+        self._show_search_results(
+            library, list(islice(videos, FUZZY_SEARCH_RESULTS)), search_term,
+            "FUZZY_SEARCH_VIDEOS", None)
+
+    def suggest(self, prefix, count=None):
+        """Display the videos whose title or video_id starts with prefix.
+
+        Flagged videos are left out. Nothing is asked afterwards, so the
+        command can be sent on every keystroke.
+
+        Args:
+            prefix: The typed prefix, words separated by underscores.
+            count: Optional number of videos to show, SUGGESTIONS if None.
         """
+        try:
+            count = SUGGESTIONS if count is None else int(count)
+        except ValueError:
+            count = 0
+        if count < 1:
+            self._output.write_line(
+                "Cannot suggest videos: Count must be a positive number")
+            return
+        library = self._video_library.snapshot()
+        suggest = getattr(library, "suggest", None)
+        if suggest is None:
+            self._output.write_line(
+                "Cannot suggest videos: This library has no suggestions")
+            return
+        videos = suggest(prefix, count)
+        if not videos:
+            self._output.write_line(f"No suggestions for {prefix}")
+            return
+        self._output.write_line(f"Here are the suggestions for {prefix}:")
+        for video in videos:
+            self._output.write_line(repr(video))
 
-        list_videos = self._video_library.get_all_videos()
-        list_videos.sort()
-        count = 0
-        search_videos = []
+    def _show_search_results(self, library, list_videos, query, command,
+                             page_size):
+        """Displays the search results and plays the one the user picks.
 
-        # Searches for video
-        for video in list_videos:
-            video_tags = [i.upper() for i in video.tags]
-            if video_tag.upper() in video_tags and not video.flagged:
-                count += 1
-                search_videos.append((str(count), video))
+        Args:
+            library: The snapshot the results were found in.
+            list_videos: The matching videos in title order, flagged ones
+                included.
+            query: The search term or tag, as the user typed it.
+            command: The command that searched, to show the next page.
+            page_size: The number of results to show, None for all.
+        """
+        playable = (video for video in list_videos
+                    if not library.is_flagged(video.video_id))
+        search_videos = list(islice(playable, page_size))
 
         # if none found
-        if count == 0:
-            print(f"No search results for {video_tag}")
+        if not search_videos:
+            self._output.write_line(f"No search results for {query}")
+            return
 
-        else:
-            print(f"Here are the results for {video_tag}:")
-            for i in search_videos:
-                print(f"{i[0]}) {i[1]}")
+        self._output.write_line(f"Here are the results for {query}:")
+        for number, video in enumerate(search_videos, 1):
+            self._output.write_line(f"{number}) {library.format_video(video)}")
+        if page_size is not None and next(playable, None) is not None:
+            self._output.write_line(
+                f"Next page: {command} {query} {page_size} "
+                f"{encode_cursor(search_videos[-1])}")
 
-            print("Would you like to play any of the above? If yes, specify the number of the video.")
-            print("If your answer is not a valid number, we will assume it's a no.")
+        self._output.write_line("Would you like to play any of the above? If yes, specify the number of the video.")
+        self._output.write_line("If your answer is not a valid number, we will assume it's a no.")
 
-            try:
-                user_input = int(input())
-                if 1 <= user_input <= len(search_videos):
-                    chosen_video = search_videos[user_input - 1][1]
-                    self.play_video(chosen_video.video_id)
-            except:
-                pass
+        if self._defer_answers:
+            self._choices = search_videos
+            return
+        self._play_choice(search_videos, self._read_answer)
+
+    def _play_choice(self, search_videos, read_answer):
+        """Plays the search result the user picked, if any.
+
+        Args:
+            search_videos: The videos offered, numbered from 1.
+            read_answer: Called without arguments to get the answer.
+        """
+        try:
+            user_input = int(read_answer())
+            if 1 <= user_input <= len(search_videos):
+                chosen_video = search_videos[user_input - 1]
+                self.play_video(chosen_video.video_id)
+        except:
+            pass
 
     def flag_video(self, video_id, flag_reason=""):
         """Mark a video as flagged.
@@ -350,22 +606,22 @@ class VideoPlayer:
         video = self._video_library.get_video(video_id)
 
         if video != None:
-            if video.flagged == False:
-                video.flagged = True
-
-                if flag_reason != "":
-                    video.flag_reason = flag_reason
+            if not self._is_flagged(video):
+                self._video_library.flag_video(
+                    video_id, flag_reason if flag_reason != "" else None)
+                self._record("FLAG_VIDEO", video_id,
+                             self._video_library.get_flag_reason(video_id))
 
                 if self.current_playing == video:
                     self.stop_video()
 
-                print(f"Successfully flagged video: {video.title} (reason: {video.flag_reason})")
+                self._output.write_line(f"Successfully flagged video: {video.title} (reason: {self._video_library.get_flag_reason(video.video_id)})")
             else:
-                print("Cannot flag video: Video is already flagged")
+                self._output.write_line("Cannot flag video: Video is already flagged")
 
 
         else:
-            print("Cannot flag video: Video does not exist")
+            self._output.write_line("Cannot flag video: Video does not exist")
 
     def allow_video(self, video_id):
         """Removes a flag from a video.
@@ -376,13 +632,14 @@ class VideoPlayer:
         video = self._video_library.get_video(video_id)
 
         if video != None:
-            if video.flagged:
-                video.flagged = False
-                print(f"Successfully removed flag from video: {video.title}")
+            if self._is_flagged(video):
+                self._video_library.allow_video(video_id)
+                self._record("ALLOW_VIDEO", video_id)
+                self._output.write_line(f"Successfully removed flag from video: {video.title}")
 
             else:
-                print("Cannot remove flag from video: Video is not flagged")
+                self._output.write_line("Cannot remove flag from video: Video is not flagged")
 
 
         else:
-            print("Cannot remove flag from video: Video does not exist")
\ No newline at end of file
+            self._output.write_line("Cannot remove flag from video: Video does not exist")
\ No newline at end of file
@@ -2,8 +2,50 @@
 
 
 class Playlist:
-    """A class used to represent a Playlist."""
+    """A class used to represent a Playlist.
+
+    Videos are kept in a dict keyed by video_id, which preserves the order
+    they were added in and makes contains, add and remove O(1).
+    """
 
     def __init__(self, name):
         self.name = name
-        self.videos = []
\ No newline at end of file
+        self._videos = {}
+
+    def __len__(self):
+        return len(self._videos)
+
+    def __iter__(self):
+        """Iterates over the videos in the order they were added."""
+        return iter(self._videos.values())
+
+    def __contains__(self, video):
+        return video.video_id in self._videos
+
+    def add(self, video):
+        """Appends a video to the playlist, if not already in it."""
+        self._videos.setdefault(video.video_id, video)
+
+    def remove(self, video):
+        """Removes a video from the playlist, if it is in it."""
+        self._videos.pop(video.video_id, None)
+
+    def clear(self):
+        """Removes all videos from the playlist."""
+        self._videos.clear()
+
+    def refresh(self, get_video):
+        """Replaces every video by the one get_video returns for its id.
+
+        Videos get_video returns None for are dropped, the others keep
+        their position.
+
+        Args:
+            get_video: Called with a video_id, e.g. VideoLibrary.get_video.
+        """
+        videos = {}
+        for video_id in self._videos:
+            video = get_video(video_id)
+            if video is not None:
+                videos[video_id] = video
+        self._videos = videos
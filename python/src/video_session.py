@@ -0,0 +1,41 @@
+"""A video session class."""
+
+
+class VideoSession:
+    """A class used to represent the state of one user of a VideoPlayer.
+
+    It only holds what differs between users: the video being played,
+    whether it is paused, and the user's playlists. The catalog and the
+    flags live in the VideoLibrary, which many sessions can share, so
+    creating a session is O(1) and never touches the disk.
+    """
+
+    __slots__ = ("current_playing", "paused", "playlists", "catalog_version")
+
+    def __init__(self):
+        self.current_playing = None
+        self.paused = False
+        self.playlists = {}
+        # The library's catalog_version the videos held here come from.
+        self.catalog_version = 0
+
+    def refresh(self, video_library):
+        """Replaces the videos held by the session by the library's ones.
+
+        Called after the library's catalog changed: playlists drop the
+        videos that were removed and pick up the new title and tags of
+        changed ones, and a removed video stops playing. The cost is one
+        lookup per video held, whatever the size of the catalog.
+
+        Args:
+            video_library: The library the session plays from.
+        """
+        library = video_library.snapshot()
+        for playlist in self.playlists.values():
+            playlist.refresh(library.get_video)
+        if self.current_playing is not None:
+            self.current_playing = library.get_video(
+                self.current_playing.video_id)
+            if self.current_playing is None:
+                self.paused = False
+        self.catalog_version = library.catalog_version
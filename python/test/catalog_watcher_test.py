@@ -0,0 +1,30 @@
+import os
+import threading
+
+from src.catalog_watcher import CatalogWatcher
+from src.video_library import VideoLibrary
+
+
+def test_watcher_reloads_a_changed_catalog(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text("Amazing Cats | cats_id | #cat\n")
+    library = VideoLibrary(path)
+    reloaded = threading.Event()
+    diffs = []
+
+    def on_reload(diff):
+        diffs.append(diff)
+        reloaded.set()
+
+    watcher = CatalogWatcher(library, interval=0.01, on_reload=on_reload)
+    watcher.start()
+    try:
+        path.write_text("Amazing Cats | cats_id | #cat\n"
+                        "Funny Dogs | dogs_id | #dog\n")
+        # Make sure the change is visible even on coarse file timestamps.
+        os.utime(path, ns=(0, 1))
+        assert reloaded.wait(5)
+    finally:
+        watcher.stop()
+    assert diffs[0].added == ["dogs_id"]
+    assert library.get_video("dogs_id").title == "Funny Dogs"
@@ -0,0 +1,62 @@
+from src.columnar_library import ColumnarVideoLibrary
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_matches_video_library():
+    columnar = ColumnarVideoLibrary()
+    library = VideoLibrary()
+
+    assert len(columnar) == len(library)
+    assert ([repr(video) for video in columnar.iter_videos()] ==
+            [repr(video) for video in library.iter_videos()])
+    for term in ("cat", "G", "", "nope", "at Goo"):
+        assert ([video.video_id for video in columnar.search_titles(term)] ==
+                [video.video_id for video in library.search_titles(term)])
+    assert ([video.video_id for video in columnar.search_tag("#ANIMAL")] ==
+            [video.video_id for video in library.search_tag("#ANIMAL")])
+    after = ("Another Cat Video", "another_cat_video_id")
+    assert ([video.video_id for video in columnar.iter_videos(after)] ==
+            [video.video_id for video in library.iter_videos(after)])
+    assert ([video.video_id for video in
+             columnar.iter_search_tag("#ANIMAL", after)] ==
+            [video.video_id for video in
+             library.iter_search_tag("#ANIMAL", after)])
+    assert ([video.video_id for video in columnar.iter_search_titles("")] ==
+            [video.video_id for video in library.iter_search_titles("")])
+
+
+def test_views_read_and_write_columns():
+    library = ColumnarVideoLibrary()
+    video = library.get_video("amazing_cats_video_id")
+
+    assert video.title == "Amazing Cats"
+    assert video.tags == ("#cat", "#animal")
+    assert library.get_video("nothing_video_id").tags == ()
+    assert library.get_video("missing_video_id") is None
+
+    library.flag_video("amazing_cats_video_id", "dont_like_cats")
+
+    assert library.is_flagged("amazing_cats_video_id")
+    assert library.format_video(video).endswith(
+        "- FLAGGED (reason: dont_like_cats)")
+    assert library.count_flagged() == 1
+    assert len(library.playable_rows()) == 4
+    assert library.count_with_tag("#animal") == 3
+    assert library.tag_counts()["#cat"] == 2
+
+
+def test_player_runs_on_columnar_library(capfd):
+    player = VideoPlayer(ColumnarVideoLibrary())
+    player.flag_video("amazing_cats_video_id", "dont_like_cats")
+    player.create_playlist("my_playlist")
+    player.add_to_playlist("my_playlist", "another_cat_video_id")
+    player.add_to_playlist("my_playlist", "another_cat_video_id")
+    player.show_all_videos()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 10
+    assert "Cannot add video to my_playlist: Video already added" in lines[3]
+    assert ("Amazing Cats (amazing_cats_video_id) [#cat #animal] - FLAGGED "
+            "(reason: dont_like_cats)") in lines[5]
+    assert "Video about nothing (nothing_video_id) []" in lines[9]
@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from src.command_metrics import CommandMetrics, LatencyHistogram, span
+from src.command_parser import CommandException, CommandParser
+from src.video_player import VideoPlayer
+
+
+def test_histogram_percentiles_are_within_bucket_resolution():
+    histogram = LatencyHistogram()
+    rng = random.Random(0)
+    values = sorted(rng.randrange(1, 10**9) for _ in range(10_000))
+    for value in values:
+        histogram.record(value)
+
+    assert histogram.count == len(values)
+    assert histogram.max == values[-1]
+    for fraction in (0.5, 0.9, 0.99):
+        exact = values[round(fraction * len(values)) - 1]
+        assert exact <= histogram.percentile(fraction) <= exact * 1.125
+    assert histogram.percentile(1.0) == values[-1]
+    assert histogram.cumulative_counts([0, 2**30]) == [0, len(values)]
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for value in range(16):
+        histogram.record(value)
+    assert histogram.percentile(0.5) == 7
+    assert histogram.cumulative_counts([3, 7]) == [4, 8]
+
+
+def test_parser_records_commands_and_errors(capfd):
+    metrics = CommandMetrics()
+    parser = CommandParser(VideoPlayer(), metrics=metrics)
+    parser.execute_command(["PLAY", "amazing_cats_video_id"])
+    parser.execute_command(["play", "funny_dogs_video_id"])
+    parser.execute_command(["NO_SUCH_COMMAND"])
+    with pytest.raises(CommandException):
+        parser.execute_command(["PLAY"])
+    with pytest.raises(CommandException):
+        parser.execute_command([])
+
+    assert metrics.command_histogram("PLAY").count == 3
+    assert metrics.error_count("PLAY") == 1
+    assert metrics.command_histogram("UNKNOWN").count == 2
+    assert metrics.error_count("UNKNOWN") == 1
+    assert metrics.command_histogram("NO_SUCH_COMMAND") is None
+
+    parser.execute_command(["STATS"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert "Command statistics:" in lines[-3]
+    assert "PLAY: count 3, errors 1, p50 " in lines[-2]
+    assert "UNKNOWN: count 2, errors 1, p50 " in lines[-1]
+
+
+def test_stats_writes_prometheus_file(tmp_path, capfd):
+    metrics = CommandMetrics(spans=True)
+    parser = CommandParser(VideoPlayer(read_line=lambda: "no"),
+                           metrics=metrics)
+    parser.execute_command(["SEARCH_VIDEOS_WITH_TAG", "#cat"])
+    parser.execute_command(["STATS", str(tmp_path / "metrics.prom")])
+    out, err = capfd.readouterr()
+    assert f"Wrote metrics to {tmp_path / 'metrics.prom'}" in out
+
+    text = (tmp_path / "metrics.prom").read_text()
+    assert "# TYPE youtube_command_duration_seconds histogram" in text
+    assert ('youtube_command_duration_seconds_bucket'
+            '{command="SEARCH_VIDEOS_WITH_TAG",le="+Inf"} 1') in text
+    assert ('youtube_command_errors_total'
+            '{command="SEARCH_VIDEOS_WITH_TAG"} 0') in text
+    assert "# TYPE youtube_span_duration_seconds histogram" in text
+
+
+def test_spans_are_only_recorded_when_enabled(capfd):
+    metrics = CommandMetrics()
+    parser = CommandParser(VideoPlayer(read_line=lambda: "no"),
+                           metrics=metrics)
+    parser.execute_command(["SEARCH_VIDEOS", "cat"])
+    assert metrics.span_histogram("title_index.search") is None
+
+    with span("outside.command"):
+        pass
+    assert metrics.span_histogram("outside.command") is None
+
+
+def test_stats_is_only_available_with_metrics(capfd):
+    CommandParser(VideoPlayer()).execute_command(["STATS"])
+    out, err = capfd.readouterr()
+    assert "Please enter a valid command" in out
@@ -0,0 +1,100 @@
+import pytest
+
+from src.command_parser import CommandException, CommandParser
+from src.video_player import VideoPlayer
+
+
+def test_commands_are_case_insensitive(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["number_of_videos"])
+    parser.execute_command(["Play", "amazing_cats_video_id"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 2
+    assert "5 videos in the library" in lines[0]
+    assert "Playing video: Amazing Cats" in lines[1]
+
+
+def test_wrong_number_of_arguments():
+    parser = CommandParser(VideoPlayer())
+    with pytest.raises(CommandException, match="followed by video_id"):
+        parser.execute_command(["PLAY"])
+    with pytest.raises(CommandException, match="optional flag reason"):
+        parser.execute_command(["FLAG_VIDEO", "a", "b", "c"])
+    with pytest.raises(CommandException):
+        parser.execute_command([])
+
+
+def test_unknown_command(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["REWIND"])
+    out, err = capfd.readouterr()
+    assert "Please enter a valid command" in out
+
+
+def test_register_command(capfd):
+    parser = CommandParser(VideoPlayer())
+    calls = []
+    parser.register_command(
+        "rewind", calls.append, arity=1,
+        error_message="Please enter REWIND command followed by seconds.",
+        help_text="<seconds> - Rewinds the current video.")
+    parser.execute_command(["REWIND", "10"])
+    parser.execute_command(["HELP"])
+    out, err = capfd.readouterr()
+    assert calls == ["10"]
+    assert "    REWIND <seconds> - Rewinds the current video." in out
+    assert out.rstrip().endswith("EXIT - Terminates the program execution.")
+
+
+def test_show_all_videos_pages(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["SHOW_ALL_VIDEOS"])
+    out, err = capfd.readouterr()
+    expected = out.splitlines()[1:]
+
+    listed = []
+    command = ["SHOW_ALL_VIDEOS", "2"]
+    while command:
+        parser.execute_command(command)
+        out, err = capfd.readouterr()
+        lines = out.splitlines()
+        assert lines[0] == "Here's a list of all available videos:"
+        command = None
+        if lines[-1].startswith("Next page: "):
+            command = lines.pop().split()[2:]
+        listed.extend(lines[1:])
+    assert listed == expected
+
+
+def test_search_pages_skip_flagged_videos(capfd):
+    player = VideoPlayer(read_line=lambda: "1")
+    parser = CommandParser(player)
+    player.flag_video("another_cat_video_id")
+    parser.execute_command(["SEARCH_VIDEOS_WITH_TAG", "#animal", "1"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert "1) Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines[2]
+    assert lines[3].startswith("Next page: SEARCH_VIDEOS_WITH_TAG #animal 1 ")
+    assert "Playing video: Amazing Cats" in lines[-1]
+
+    parser.execute_command(lines[3].split()[2:])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert "1) Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[1]
+    assert "Next page" not in out
+
+
+def test_invalid_page_arguments(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["SHOW_ALL_VIDEOS", "0"])
+    parser.execute_command(["SEARCH_VIDEOS", "cat", "ten"])
+    parser.execute_command(["SHOW_ALL_VIDEOS", "2", "not_a_cursor"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines == [
+        "Cannot show videos: Page size must be a positive number",
+        "Cannot search videos: Page size must be a positive number",
+        "Cannot show videos: Invalid cursor"]
+    with pytest.raises(CommandException, match="optional page size"):
+        parser.execute_command(["SHOW_ALL_VIDEOS", "1", "2", "3"])
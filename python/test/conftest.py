@@ -0,0 +1,19 @@
+import pytest
+
+import src.video_player
+from src.sqlite_library import SqliteVideoLibrary
+
+LIBRARIES = {"memory": None, "sqlite": SqliteVideoLibrary}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--library", choices=sorted(LIBRARIES), default="memory",
+        help="the library VideoPlayer() loads when none is passed in")
+
+
+@pytest.fixture(autouse=True)
+def default_library(request, monkeypatch):
+    library = LIBRARIES[request.config.getoption("--library")]
+    if library is not None:
+        monkeypatch.setattr(src.video_player, "VideoLibrary", library)
@@ -0,0 +1,68 @@
+from src.command_parser import CommandParser
+from src.fuzzy_index import FuzzyIndex, edit_distance
+from src.video import Video
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_edit_distance_is_bounded():
+    assert edit_distance("KITTEN", "SITTING", 3) == 3
+    assert edit_distance("KITTEN", "SITTING", 2) == 3
+    assert edit_distance("GOOGLE", "GOOGEL", 2) == 1
+    assert edit_distance("CATS", "CATS", 0) == 0
+    assert edit_distance("CAT", "CATTLE", 2) == 3
+
+
+def test_search_tolerates_typos_and_ranks_by_relevance():
+    index = FuzzyIndex()
+    index.add("long", "Funny Cats Compilation Part Two")
+    index.add("short", "Funny Cats")
+    index.add("typo", "Funny Cast")
+    index.add("dogs", "Funny Dogs")
+
+    assert list(index.search("funy cats")) == ["short", "long", "typo"]
+    assert list(index.search("FUNNY_DOGS")) == ["dogs"]
+    assert list(index.search("dgs")) == ["dogs"]
+    assert list(index.search("xyz")) == []
+    assert list(index.search("12")) == []
+
+
+def test_copies_do_not_see_each_others_changes():
+    index = FuzzyIndex()
+    index.add("cats", "Amazing Cats")
+    index.add("kittens", "Cute Kittens")
+    copy = index.copy()
+    copy.remove("cats")
+    copy.add("dogs", "Amazing Dogs")
+
+    assert list(index.search("amazng")) == ["cats"]
+    assert list(copy.search("amazng")) == ["dogs"]
+    assert copy.similar_words("CATS") == {}
+
+    index.remove("kittens")
+    assert list(copy.search("kitens")) == ["kittens"]
+
+
+def test_library_keeps_the_fuzzy_index_up_to_date():
+    library = VideoLibrary()
+    assert [video.video_id for video in
+            library.fuzzy_search_titles("vidoe")] == [
+        "another_cat_video_id", "nothing_video_id"]
+    library.add_video(Video("Video", "video_id", []))
+    library.remove_video("nothing_video_id")
+
+    assert [video.video_id for video in
+            library.fuzzy_search_titles("vidoe")] == [
+        "video_id", "another_cat_video_id"]
+
+
+def test_fuzzy_search_command_skips_flagged_videos(capfd):
+    player = VideoPlayer(VideoLibrary(), read_line=lambda: "1")
+    parser = CommandParser(player)
+    player.flag_video("another_cat_video_id")
+    parser.execute_command(["FUZZY_SEARCH_VIDEOS", "vidoe"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[1:3] == ["Here are the results for vidoe:",
+                          "1) Video about nothing (nothing_video_id) []"]
+    assert "Playing video: Video about nothing" in lines[-1]
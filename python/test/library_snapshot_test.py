@@ -0,0 +1,85 @@
+import random
+import threading
+
+from src.video import Video
+from src.video_library import VideoLibrary
+
+
+def test_snapshot_does_not_see_later_writes():
+    library = VideoLibrary()
+    before = library.snapshot()
+    library.flag_video("amazing_cats_video_id", "dont_like_cats")
+    library.add_video(Video("Cat Nap", "cat_nap_video_id", ["#cat"]))
+    after = library.snapshot()
+
+    assert after.version == before.version + 2
+    assert not before.is_flagged("amazing_cats_video_id")
+    assert after.get_flag_reason("amazing_cats_video_id") == "dont_like_cats"
+    assert len(before) == 5
+    assert len(after) == 6
+    assert [v.video_id for v in before.search_tag("#cat")] == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+    assert [v.video_id for v in after.search_tag("#cat")] == [
+        "amazing_cats_video_id", "another_cat_video_id", "cat_nap_video_id"]
+    assert before.get_video("cat_nap_video_id") is None
+
+
+def test_removed_video_stays_in_older_snapshot():
+    library = VideoLibrary()
+    before = library.snapshot()
+    library.remove_video("funny_dogs_video_id")
+    assert before.get_video("funny_dogs_video_id") is not None
+    assert "funny_dogs_video_id" in [v.video_id for v in before.iter_videos()]
+    assert library.get_video("funny_dogs_video_id") is None
+    assert library.search_tag("#dog") == []
+
+
+def test_readers_see_consistent_snapshots_while_one_thread_writes():
+    library = VideoLibrary()
+    video_ids = [video.video_id for video in library.get_all_videos()]
+    extra = Video("Extra Video", "extra_video_id", ["#extra"])
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        rng = random.Random()
+        try:
+            while not stop.is_set():
+                snapshot = library.snapshot()
+                listing = [snapshot.format_video(video)
+                           for video in snapshot.iter_videos()]
+                flagged = [line for line in listing if "FLAGGED" in line]
+                searched = snapshot.search_titles("video")
+                # Re-reading the same snapshot gives the same answers.
+                assert listing == [snapshot.format_video(video)
+                                   for video in snapshot.iter_videos()]
+                assert len(listing) == len(snapshot)
+                assert len(flagged) == sum(
+                    snapshot.is_flagged(video_id) for video_id in video_ids)
+                assert searched == snapshot.search_titles("video")
+                video = library.get_random_video(rng)
+                assert video is None or video.video_id in video_ids + [
+                    extra.video_id]
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(8)]
+    for reader in readers:
+        reader.start()
+    rng = random.Random(0)
+    for i in range(2000):
+        video_id = rng.choice(video_ids)
+        if library.is_flagged(video_id):
+            library.allow_video(video_id)
+        else:
+            library.flag_video(video_id, f"reason_{i}")
+        if i % 10 == 0:
+            library.add_video(extra)
+        elif i % 10 == 5:
+            library.remove_video(extra.video_id)
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert library.snapshot().version >= 2000
@@ -0,0 +1,45 @@
+import io
+
+from src.command_parser import CommandParser
+from src.output_sink import OutputSink
+from src.video_player import VideoPlayer
+
+
+def test_writes_through_outside_commands():
+    stream = io.StringIO()
+    sink = OutputSink(stream)
+    sink.write_line("first")
+    sink.write_line(42)
+    assert stream.getvalue() == "first\n42\n"
+
+
+def test_buffers_until_command_ends():
+    stream = io.StringIO()
+    sink = OutputSink(stream)
+    with sink.command():
+        sink.write_line("first")
+        with sink.command():
+            sink.write_line("second")
+        assert stream.getvalue() == ""
+    assert stream.getvalue() == "first\nsecond\n"
+
+
+def test_player_and_parser_share_the_sink():
+    stream = io.StringIO()
+    player = VideoPlayer(output=OutputSink(stream))
+    parser = CommandParser(player)
+    parser.execute_command(["SHOW_ALL_VIDEOS"])
+    parser.execute_command(["NOT_A_COMMAND"])
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 7
+    assert "Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines[1]
+    assert "Please enter a valid command" in lines[6]
+
+
+def test_question_is_flushed_before_reading_the_answer():
+    stream = io.StringIO()
+    seen = []
+    player = VideoPlayer(output=OutputSink(stream),
+                         read_line=lambda: seen.append(stream.getvalue()))
+    CommandParser(player).execute_command(["SEARCH_VIDEOS", "dog"])
+    assert seen[0].endswith("we will assume it's a no.\n")
@@ -0,0 +1,72 @@
+from src.command_parser import CommandParser
+from src.prefix_index import PrefixIndex
+from src.video import Video
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_completes_titles_and_ids_in_key_order():
+    index = PrefixIndex()
+    index.add("cats_2", "Cats Two")
+    index.add("cats_1", "Cats")
+    index.add("catalog", "Catalog")
+    index.add("dogs", "Dogs")
+
+    assert list(index.iter_video_ids("cat")) == [
+        "catalog", "cats_1", "cats_2"]
+    assert list(index.iter_video_ids("CATS_")) == ["cats_1", "cats_2"]
+    assert list(index.iter_video_ids("d")) == ["dogs"]
+    assert list(index.iter_video_ids("catz")) == []
+
+
+def test_removing_keys_keeps_the_tree_compressed():
+    index = PrefixIndex()
+    index.add("1", "Cats")
+    index.add("2", "Catsup")
+    index.add("3", "Cattle")
+    index.remove("2", "Catsup")
+    index.remove("1", "Cats")
+
+    assert list(index.iter_video_ids("cat")) == ["3"]
+    assert sorted(index._root.children) == ["3", "C"]
+    assert index._root.children["C"].edge == "CATTLE"
+
+
+def test_copies_do_not_see_each_others_changes():
+    index = PrefixIndex()
+    index.add("cats", "Amazing Cats")
+    index.add("kittens", "Pretty Kittens")
+    copy = index.copy()
+    copy.remove("cats", "Amazing Cats")
+    copy.add("dogs", "Amazing Dogs")
+
+    assert list(index.iter_video_ids("amazing")) == ["cats"]
+    assert list(copy.iter_video_ids("amazing")) == ["dogs"]
+
+    index.remove("kittens", "Pretty Kittens")
+    assert list(copy.iter_video_ids("pretty")) == ["kittens"]
+
+
+def test_library_suggestions_skip_flagged_videos():
+    library = VideoLibrary()
+    assert [video.video_id for video in library.suggest("a", 10)] == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+    library.flag_video("amazing_cats_video_id", None)
+    library.add_video(Video("Amazing Dogs", "dogs_id", []))
+
+    assert [video.video_id for video in library.suggest("a", 1)] == [
+        "dogs_id"]
+
+
+def test_suggest_command(capfd):
+    parser = CommandParser(VideoPlayer(VideoLibrary()))
+    parser.execute_command(["SUGGEST", "nothing_v", "1"])
+    parser.execute_command(["SUGGEST", "x"])
+    parser.execute_command(["SUGGEST", "a", "0"])
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Here are the suggestions for nothing_v:",
+        "Video about nothing (nothing_video_id) []",
+        "No suggestions for x",
+        "Cannot suggest videos: Count must be a positive number",
+    ]
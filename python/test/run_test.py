@@ -0,0 +1,22 @@
+import io
+
+from src.run import run_batch
+
+
+def test_run_batch_answers_follow_up_from_stream(capfd):
+    stream = io.StringIO("SEARCH_VIDEOS_WITH_TAG #dog\n"
+                         "1\n"
+                         "\n"
+                         "SHOW_PLAYING\n"
+                         "EXIT\n"
+                         "STOP\n")
+    count = run_batch(stream)
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert count == 3
+    assert len(lines) == 7
+    assert "1) Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[1]
+    assert "Playing video: Funny Dogs" in lines[4]
+    assert "Please enter a valid command" in lines[5]
+    assert "Currently playing: Funny Dogs" in lines[6]
+    assert stream.readline() == "STOP\n"
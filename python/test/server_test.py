@@ -0,0 +1,83 @@
+import asyncio
+
+from src.server import PROMPT, VideoServer
+from src.video_library import VideoLibrary
+
+
+async def _read_response(reader):
+    data = await reader.readuntil(PROMPT.encode())
+    return data.decode()[:-len(PROMPT)].splitlines()
+
+
+async def _run_sessions():
+    server = VideoServer(VideoLibrary())
+    listener = await server.start(port=0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        first_reader, first_writer = await asyncio.open_connection(
+            "127.0.0.1", port)
+        second_reader, second_writer = await asyncio.open_connection(
+            "127.0.0.1", port)
+        await _read_response(first_reader)
+        await _read_response(second_reader)
+
+        first_writer.write(b"CREATE_PLAYLIST mine\nSEARCH_VIDEOS cat\n")
+        created = await _read_response(first_reader)
+        question = await first_reader.readuntil(b"it's a no.\n")
+        first_writer.write(b"2\n")
+        played = await _read_response(first_reader)
+
+        second_writer.write(b"SHOW_ALL_PLAYLISTS\nSHOW_PLAYING\nEXIT\n")
+        playlists = await _read_response(second_reader)
+        playing = await _read_response(second_reader)
+        goodbye = await second_reader.read()
+
+        first_writer.close()
+        second_writer.close()
+        return created, question.decode(), played, playlists, playing, goodbye
+    finally:
+        await server.close()
+
+
+def test_sessions_are_independent():
+    created, question, played, playlists, playing, goodbye = asyncio.run(
+        _run_sessions())
+    assert created == ["Successfully created new playlist: mine"]
+    assert "2) Another Cat Video (another_cat_video_id)" in question
+    assert played == ["Playing video: Another Cat Video"]
+    assert playlists == ["No playlists exist yet"]
+    assert playing == ["No video is currently playing"]
+    assert goodbye.startswith(b"YouTube has now terminated its execution.")
+
+
+async def _run_waiting_clients():
+    server = VideoServer(VideoLibrary(), max_workers=1)
+    listener = await server.start(port=0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        clients = [await asyncio.open_connection("127.0.0.1", port)
+                   for _ in range(3)]
+        for reader, writer in clients:
+            await _read_response(reader)
+        # Both sit on the follow-up question, which holds no worker.
+        for reader, writer in clients[:2]:
+            writer.write(b"SEARCH_VIDEOS cat\n")
+            await reader.readuntil(b"it's a no.\n")
+        reader, writer = clients[2]
+        writer.write(b"NUMBER_OF_VIDEOS\nFLAG_VIDEO funny_dogs_video_id\n")
+        count = await asyncio.wait_for(_read_response(reader), 2)
+        flag = await asyncio.wait_for(_read_response(reader), 2)
+        reader, writer = clients[0]
+        writer.write(b"1\n")
+        played = await asyncio.wait_for(_read_response(reader), 2)
+        return count, flag, played
+    finally:
+        await server.close()
+
+
+def test_clients_waiting_for_an_answer_hold_no_worker():
+    count, flag, played = asyncio.run(_run_waiting_clients())
+    assert count == ["5 videos in the library"]
+    assert flag == ["Cannot flag video: The video library is read-only on "
+                    "this server"]
+    assert played == ["Playing video: Amazing Cats"]
@@ -0,0 +1,78 @@
+import random
+
+from src.ngram_index import NgramIndex
+from src.shared_map import SharedMap
+from src.sorted_index import SortedVideoIndex, sort_key
+from src.tag_index import TagIndex
+from src.video import Video
+
+
+def test_copies_do_not_see_each_others_changes():
+    original = SharedMap({"a": 1, "b": 2})
+    copy = original.copy()
+    copy["a"] = 10
+    del copy["b"]
+    original["c"] = 3
+
+    assert dict(original.items()) == {"a": 1, "b": 2, "c": 3}
+    assert dict(copy.items()) == {"a": 10}
+    assert copy.pop("missing", "default") == "default"
+    assert len(original) == 3 and len(copy) == 1
+
+
+def test_map_grows_its_chunks_with_its_size():
+    shared = SharedMap()
+    for i in range(10000):
+        shared[i] = i
+    copy = shared.copy()
+    for i in range(0, 10000, 2):
+        copy.pop(i)
+
+    assert len(shared._chunks) ** 2 >= len(shared) > 1000
+    assert sorted(shared) == list(range(10000))
+    assert sorted(copy.values()) == list(range(1, 10000, 2))
+
+
+def test_sorted_index_copies_share_chunks():
+    rng = random.Random(0)
+    videos = [Video(f"Title {rng.randrange(100)}", f"id_{i}", [])
+              for i in range(1000)]
+    index = SortedVideoIndex(videos[:500])
+    copy = index.copy()
+    for video in videos[500:]:
+        copy.insert(video)
+    for video in videos[:250]:
+        copy.remove(video)
+
+    assert list(index) == sorted(videos[:500], key=sort_key)
+    expected = sorted(videos[250:], key=sort_key)
+    assert list(copy) == expected
+    after = sort_key(expected[99])
+    assert list(copy.iter_after(after)) == expected[100:]
+
+    # A write only copies the chunk it modifies.
+    other = copy.copy()
+    other.insert(Video("Title 50", "new_id", []))
+    shared = [chunk for chunk in other._video_chunks
+              if any(chunk is old for old in copy._video_chunks)]
+    assert len(shared) == len(copy._video_chunks) - 1 > 0
+
+
+def test_index_copies_do_not_see_changes_to_the_original():
+    videos = [Video(f"Cat video {i}", f"id_{i}", ["#cat"]) for i in range(3)]
+    tag_index = TagIndex(videos)
+    title_index = NgramIndex()
+    for video in videos:
+        title_index.add(video.video_id, video.title)
+    tag_copy = tag_index.copy()
+    title_copy = title_index.copy()
+
+    tag_index.add("id_3", ["#cat"])
+    tag_index.remove("id_0", ["#cat"])
+    title_index.add("id_3", "Cat video 3")
+    title_index.remove("id_0")
+
+    assert list(tag_copy.get("#cat")) == ["id_0", "id_1", "id_2"]
+    assert sorted(title_copy.search("cat")) == ["id_0", "id_1", "id_2"]
+    assert list(tag_index.get("#cat")) == ["id_1", "id_2", "id_3"]
+    assert sorted(title_index.search("cat")) == ["id_1", "id_2", "id_3"]
@@ -0,0 +1,106 @@
+import sqlite3
+
+from src.sqlite_library import SqliteVideoLibrary, connect, import_catalog
+from src.video import Video
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+from src.video_session import VideoSession
+
+
+def test_matches_video_library():
+    sqlite_library = SqliteVideoLibrary()
+    library = VideoLibrary()
+
+    assert len(sqlite_library) == len(library)
+    assert ([repr(video) for video in sqlite_library.iter_videos()] ==
+            [repr(video) for video in library.iter_videos()])
+    for term in ("cat", "G", "", "nope", "at Goo", 'a"b'):
+        assert ([video.video_id
+                 for video in sqlite_library.search_titles(term)] ==
+                [video.video_id for video in library.search_titles(term)])
+    assert ([video.video_id for video in sqlite_library.search_tag("#ANIMAL")]
+            == [video.video_id for video in library.search_tag("#ANIMAL")])
+
+
+def test_add_remove_and_flag_videos():
+    library = SqliteVideoLibrary()
+    library.add_video(Video("Cat Nap", "cat_nap_video_id", ["#cat", "#nap"]))
+    library.flag_video("amazing_cats_video_id")
+
+    assert len(library) == 6
+    assert [video.video_id for video in library.search_titles("CAT N")] == [
+        "cat_nap_video_id"]
+    assert [video.video_id for video in library.search_tag("#nap")] == [
+        "cat_nap_video_id"]
+    assert library.get_flag_reason("amazing_cats_video_id") == "Not supplied"
+    assert dict(library.iter_flags()) == {
+        "amazing_cats_video_id": "Not supplied"}
+
+    assert library.remove_video("cat_nap_video_id").title == "Cat Nap"
+    assert library.remove_video("cat_nap_video_id") is None
+    assert library.search_titles("cat nap") == []
+    assert library.search_tag("#nap") == []
+
+
+def test_import_catalog_in_batches(tmp_path):
+    catalog = tmp_path / "videos.txt"
+    catalog.write_text("".join(
+        f"Video {i} | video_{i % 7} | #tag{i % 3}\n" for i in range(20)))
+    database = tmp_path / "videos.db"
+
+    assert import_catalog(connect(database), catalog, batch_size=4) == 20
+
+    # The database is reopened without importing again.
+    library = SqliteVideoLibrary(database)
+    assert len(library) == 7
+    # Later rows replace earlier ones with the same video_id.
+    assert library.get_video("video_0").title == "Video 14"
+    assert len(library.search_tag("#TAG2")) == 2
+
+
+def test_player_keeps_playlists_in_database(tmp_path, capfd):
+    database = tmp_path / "videos.db"
+    library = SqliteVideoLibrary(database)
+    session = VideoSession()
+    session.playlists = library.playlists()
+    player = VideoPlayer(library, session=session)
+    player.create_playlist("my_PLAYlist")
+    player.add_to_playlist("my_playlist", "amazing_cats_video_id")
+    player.add_to_playlist("my_playlist", "funny_dogs_video_id")
+    player.add_to_playlist("my_playlist", "amazing_cats_video_id")
+    player.create_playlist("other")
+    player.delete_playlist("other")
+
+    reopened = SqliteVideoLibrary(database)
+    session = VideoSession()
+    session.playlists = reopened.playlists()
+    player = VideoPlayer(reopened, session=session)
+    player.show_all_playlists()
+    player.show_playlist("my_playlist")
+    player.remove_from_playlist("my_playlist", "amazing_cats_video_id")
+    player.show_playlist("my_playlist")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 14
+    assert "Cannot add video to my_playlist: Video already added" in lines[3]
+    assert "my_PLAYlist" in lines[7]
+    assert "Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines[9]
+    assert "Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[10]
+    assert "Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[13]
+
+
+def test_connect_drops_the_unused_lower_title_index(tmp_path):
+    path = tmp_path / "videos.db"
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE videos (video_id TEXT PRIMARY KEY, "
+                       "title TEXT NOT NULL, tags TEXT NOT NULL, "
+                       "flag_reason TEXT)")
+    connection.execute(
+        "CREATE INDEX videos_by_lower_title ON videos (lower(title))")
+    connection.commit()
+    connection.close()
+
+    names = {name for (name,) in connect(path).execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "videos_by_lower_title" not in names
+    assert "videos_by_title" in names
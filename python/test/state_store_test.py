@@ -0,0 +1,106 @@
+from src.state_store import LOG_FILE, SNAPSHOT_FILE, StateStore
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+from src.video_session import VideoSession
+
+
+def open_player(directory, **kwargs):
+    store = StateStore(directory, **kwargs)
+    library = VideoLibrary()
+    session = VideoSession()
+    replayed = store.recover(library, session)
+    player = VideoPlayer(library, session=session, journal=store)
+    return player, store, replayed
+
+
+def make_changes(player):
+    player.create_playlist("my_PLAYlist")
+    player.add_to_playlist("my_playlist", "funny_dogs_video_id")
+    player.add_to_playlist("my_playlist", "amazing_cats_video_id")
+    player.remove_from_playlist("my_playlist", "funny_dogs_video_id")
+    player.create_playlist("other")
+    player.delete_playlist("other")
+    player.flag_video("life_at_google_video_id")
+    player.flag_video("nothing_video_id", "dont_like")
+    player.allow_video("nothing_video_id")
+    # Failed commands are not recorded.
+    player.add_to_playlist("missing", "funny_dogs_video_id")
+
+
+def assert_restored(player):
+    assert list(player.playlists) == ["MY_PLAYLIST"]
+    playlist = player.playlists["MY_PLAYLIST"]
+    assert playlist.name == "my_PLAYlist"
+    assert [video.video_id for video in playlist] == ["amazing_cats_video_id"]
+    library = player._video_library
+    assert library.get_flag_reason("life_at_google_video_id") == "Not supplied"
+    assert not library.is_flagged("nothing_video_id")
+
+
+def test_recover_replays_log_without_snapshot(tmp_path, capfd):
+    player, store, _ = open_player(tmp_path)
+    make_changes(player)
+    assert store.lsn == 9
+    # No close(): the process "crashed" and only the log exists.
+    assert not (tmp_path / SNAPSHOT_FILE).exists()
+
+    player, store, replayed = open_player(tmp_path)
+    assert replayed == 9
+    assert_restored(player)
+
+
+def test_close_compacts_log_into_snapshot(tmp_path, capfd):
+    player, store, _ = open_player(tmp_path)
+    make_changes(player)
+    store.close()
+    assert (tmp_path / LOG_FILE).stat().st_size == 0
+
+    player, store, replayed = open_player(tmp_path)
+    assert replayed == 0
+    assert store.lsn == 9
+    assert_restored(player)
+    player.clear_playlist("my_playlist")
+
+    player, store, replayed = open_player(tmp_path)
+    assert replayed == 1
+    assert len(player.playlists["MY_PLAYLIST"]) == 0
+
+
+def test_only_log_tail_after_snapshot_is_replayed(tmp_path, capfd):
+    player, store, _ = open_player(tmp_path, snapshot_every=4)
+    make_changes(player)
+    player, store, replayed = open_player(tmp_path)
+    assert replayed == 1
+    assert_restored(player)
+
+
+def test_torn_last_record_is_dropped(tmp_path, capfd):
+    player, store, _ = open_player(tmp_path)
+    make_changes(player)
+    with open(tmp_path / LOG_FILE, "ab") as log:
+        log.write(b'[10,"CREATE_PLAY')
+
+    player, store, replayed = open_player(tmp_path)
+    assert replayed == 9
+    assert_restored(player)
+    player.create_playlist("after_crash")
+
+    player, store, replayed = open_player(tmp_path)
+    assert replayed == 10
+    assert "AFTER_CRASH" in player.playlists
+
+
+def test_group_commit_syncs_once_per_group(tmp_path, capfd):
+    player, store, _ = open_player(tmp_path, group_size=4)
+    player.create_playlist("a")
+    player.create_playlist("b")
+    player.create_playlist("c")
+    assert store._pending == 3
+    player.create_playlist("d")
+    assert store._pending == 0
+    player.create_playlist("e")
+    store.sync()
+    assert store._pending == 0
+
+    player, store, replayed = open_player(tmp_path)
+    assert replayed == 5
@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+from src.video_catalog import MappedCatalog, compile_catalog
+from src.video_library import DEFAULT_CATALOG, VideoLibrary
+
+
+def test_compiled_library_matches_text_library(tmp_path):
+    path = tmp_path / "videos.ytcat"
+    assert compile_catalog(DEFAULT_CATALOG, path) == 5
+
+    text_library = VideoLibrary()
+    compiled_library = VideoLibrary(path)
+
+    assert len(compiled_library) == 5
+    assert ([repr(video) for video in compiled_library.iter_videos()] ==
+            [repr(video) for video in text_library.iter_videos()])
+    assert ([video.video_id for video in compiled_library.search_tag("#CAT")] ==
+            ["amazing_cats_video_id", "another_cat_video_id"])
+    assert compiled_library.get_video("nothing_video_id").tags == ()
+    assert compiled_library.get_video("missing_video_id") is None
+
+
+def test_mapped_catalog_returns_the_same_video_object(tmp_path):
+    path = tmp_path / "videos.ytcat"
+    compile_catalog(DEFAULT_CATALOG, path)
+    catalog = MappedCatalog(path)
+
+    video = catalog["funny_dogs_video_id"]
+
+    assert catalog.get("funny_dogs_video_id") is video
+    assert next(v for v in catalog.values()
+                if v.video_id == "funny_dogs_video_id") is video
+
+
+def test_compiled_library_can_be_modified(tmp_path):
+    path = tmp_path / "videos.ytcat"
+    compile_catalog(DEFAULT_CATALOG, path)
+    library = VideoLibrary(path)
+
+    library.remove_video("funny_dogs_video_id")
+
+    assert len(library) == 4
+    assert library.search_titles("dog") == []
+
+
+def test_mapped_catalog_iterates_after_a_sort_key(tmp_path):
+    path = tmp_path / "videos.ytcat"
+    compile_catalog(DEFAULT_CATALOG, path)
+    catalog = MappedCatalog(path)
+
+    assert ([video.video_id for video in
+             catalog.iter_sorted(("Another Cat Video", "another"))] ==
+            ["another_cat_video_id", "funny_dogs_video_id",
+             "life_at_google_video_id", "nothing_video_id"])
+    assert list(catalog.iter_sorted(("Zzz", ""))) == []
+
+
+def test_recompiling_keeps_an_open_catalog_readable(tmp_path):
+    source = tmp_path / "videos.txt"
+    source.write_text("".join(f"Video {i} | video_{i:05d} | #tag{i % 7}\n"
+                              for i in range(2000)))
+    path = tmp_path / "videos.ytcat"
+    compile_catalog(source, path)
+    library = VideoLibrary(path)
+    snapshot = library.snapshot()
+
+    source.write_text("Only Video | only_id | #only\n")
+    assert compile_catalog(source, path) == 1
+
+    assert len(list(snapshot.iter_videos())) == 2000
+    assert snapshot.get_video("video_01999").tags == ("#tag4",)
+    assert [video.video_id for video in VideoLibrary(path).iter_videos()] == [
+        "only_id"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "videos.txt", "videos.ytcat"]
+
+
+def test_reload_diffs_a_recompiled_catalog(tmp_path):
+    source = tmp_path / "videos.txt"
+    source.write_text("A | a | #x\nB | b |\nC | c |\n")
+    path = tmp_path / "videos.ytcat"
+    compile_catalog(source, path)
+    library = VideoLibrary(path)
+
+    source.write_text("A | a | #x\nB | b |\nD | d | #x\n")
+    compile_catalog(source, path)
+    diff = library.reload()
+
+    assert (diff.added, diff.removed, diff.changed) == (["d"], ["c"], [])
+    assert [video.video_id for video in library.search_tag("#x")] == [
+        "a", "d"]
+
+    source.write_text("A again | a | #x\nD | d | #x\n")
+    compile_catalog(source, path)
+    diff = library.reload()
+
+    assert (diff.added, diff.removed, diff.changed) == ([], ["b"], ["a"])
+
+
+def test_reload_refuses_a_catalog_rewritten_in_place(tmp_path):
+    source = tmp_path / "videos.txt"
+    source.write_text("A | a |\nB | b |\nC | c |\n")
+    path = tmp_path / "videos.ytcat"
+    compile_catalog(source, path)
+    library = VideoLibrary(path)
+
+    source.write_text("A | a |\nB | b |\nD | d |\n")
+    compile_catalog(source, tmp_path / "other.ytcat")
+    with open(path, "r+b") as catalog_file:
+        catalog_file.write((tmp_path / "other.ytcat").read_bytes())
+    os.utime(path, ns=(0, 10**9))
+
+    with pytest.raises(ValueError, match="rewritten in place"):
+        library.reload()
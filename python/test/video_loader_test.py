@@ -0,0 +1,39 @@
+import pytest
+
+from src.video_library import DEFAULT_CATALOG
+from src.video_loader import iter_video_rows
+
+
+def test_reads_bundled_catalog():
+    rows = list(iter_video_rows(DEFAULT_CATALOG))
+
+    assert len(rows) == 5
+    assert rows[1] == ("Amazing Cats", "amazing_cats_video_id",
+                       ("#cat", "#animal"))
+    assert rows[4] == ("Video about nothing", "nothing_video_id", ())
+
+
+def test_rows_split_across_chunks(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text("Café Tour | cafe_video_id | #food , #travel\r\n"
+                    "\n"
+                    "Second | second_video_id |", encoding="utf-8")
+    progress = []
+
+    rows = list(iter_video_rows(path, chunk_size=3,
+                                progress=lambda *args: progress.append(args)))
+
+    assert rows == [("Café Tour", "cafe_video_id", ("#food", "#travel")),
+                    ("Second", "second_video_id", ())]
+    assert progress[-1] == (path.stat().st_size, path.stat().st_size, 2)
+
+
+def test_rows_share_tags_and_malformed_rows_raise(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text("A | a_id | #cat\nB | b_id | #cat", encoding="utf-8")
+    first, last = iter_video_rows(path)
+    assert last[2] is first[2]
+
+    path.write_text("A | a_id | #cat\nB without fields\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_video_rows(path))
@@ -0,0 +1,31 @@
+from src.video import Video
+from src.video_playlist import Playlist
+
+
+def test_playlist_keeps_insertion_order():
+    playlist = Playlist("my_playlist")
+    dogs = Video("Funny Dogs", "funny_dogs_video_id", [])
+    cats = Video("Amazing Cats", "amazing_cats_video_id", [])
+    google = Video("Life at Google", "life_at_google_video_id", [])
+
+    for video in (dogs, cats, google, dogs):
+        playlist.add(video)
+    playlist.remove(cats)
+    playlist.add(cats)
+
+    assert list(playlist) == [dogs, google, cats]
+    assert len(playlist) == 3
+    assert cats in playlist
+
+
+def test_playlist_remove_and_clear():
+    playlist = Playlist("my_playlist")
+    cats = Video("Amazing Cats", "amazing_cats_video_id", [])
+    playlist.add(cats)
+    playlist.remove(cats)
+    playlist.remove(cats)
+
+    assert cats not in playlist
+    playlist.add(cats)
+    playlist.clear()
+    assert len(playlist) == 0
@@ -0,0 +1,67 @@
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+from src.video_session import VideoSession
+
+
+def test_players_on_one_library_keep_their_own_sessions(capfd):
+    library = VideoLibrary()
+    first = VideoPlayer(library)
+    second = VideoPlayer(library)
+    first.play_video("funny_dogs_video_id")
+    first.create_playlist("my_playlist")
+    second.show_playing()
+    second.show_all_playlists()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 4
+    assert "No video is currently playing" in lines[2]
+    assert "No playlists exist yet" in lines[3]
+    assert first.session.current_playing.video_id == "funny_dogs_video_id"
+    assert second.session.current_playing is None
+
+
+def test_flags_are_shared_through_the_library(capfd):
+    library = VideoLibrary()
+    first = VideoPlayer(library)
+    second = VideoPlayer(library)
+    first.flag_video("funny_dogs_video_id", "dont_like_dogs")
+    second.play_video("funny_dogs_video_id")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 2
+    assert ("Cannot play video: Video is currently flagged "
+            "(reason: dont_like_dogs)") in lines[1]
+
+
+def test_player_can_resume_a_session():
+    session = VideoSession()
+    VideoPlayer(session=session).create_playlist("my_playlist")
+    player = VideoPlayer(session=session)
+    assert list(player.playlists) == ["MY_PLAYLIST"]
+
+
+def test_reload_keeps_playlists_consistent(tmp_path, capfd):
+    path = tmp_path / "videos.txt"
+    path.write_text("Amazing Cats | cats_id | #cat\n"
+                    "Funny Dogs | dogs_id | #dog\n")
+    library = VideoLibrary(path)
+    first = VideoPlayer(library)
+    second = VideoPlayer(library)
+    first.create_playlist("mine")
+    first.add_to_playlist("mine", "cats_id")
+    first.add_to_playlist("mine", "dogs_id")
+    second.play_video("cats_id")
+    capfd.readouterr()
+
+    path.write_text("Funny Dogs Remastered | dogs_id | #dog\n")
+    first.reload_library()
+    first.reload_library()
+    first.show_playlist("mine")
+    second.show_playing()
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Reloaded library: 0 added, 1 removed, 1 changed",
+        "Library is up to date",
+        "Showing playlist: mine",
+        "Funny Dogs Remastered (dogs_id) [#dog]",
+        "No video is currently playing"]
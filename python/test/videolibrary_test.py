@@ -1,4 +1,7 @@
+import random
+
 from src.video_library import VideoLibrary
+from src.video import Video
 
 
 def test_library_has_all_videos():
@@ -24,3 +27,159 @@ def test_parses_video_correctly_without_tags():
     assert video.title == "Video about nothing"
     assert video.video_id == "nothing_video_id"
     assert video.tags == ()
+
+
+def test_search_titles_is_case_insensitive_substring():
+    library = VideoLibrary()
+    results = library.search_titles("cAt")
+
+    assert {video.video_id for video in results} == {
+        "amazing_cats_video_id", "another_cat_video_id"}
+
+
+def test_search_titles_short_and_missing_terms():
+    library = VideoLibrary()
+
+    assert {video.video_id for video in library.search_titles("g")} == {
+        "funny_dogs_video_id", "amazing_cats_video_id",
+        "life_at_google_video_id", "nothing_video_id"}
+    assert library.search_titles("blah") == []
+
+
+def test_search_tag_is_case_insensitive():
+    library = VideoLibrary()
+    results = library.search_tag("#CAT")
+
+    assert [video.video_id for video in results] == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+    assert library.search_tag("cat") == []
+
+
+def test_indexes_follow_added_and_removed_videos():
+    library = VideoLibrary()
+    library.add_video(Video("Cat Facts", "cat_facts_video_id", ["#Cat"]))
+    library.remove_video("amazing_cats_video_id")
+
+    assert [video.video_id for video in library.search_tag("#cat")] == [
+        "another_cat_video_id", "cat_facts_video_id"]
+    assert {video.video_id for video in library.search_titles("cat")} == {
+        "another_cat_video_id", "cat_facts_video_id"}
+    assert library.get_video("amazing_cats_video_id") is None
+    assert library.remove_video("amazing_cats_video_id") is None
+
+
+def test_tag_postings_are_sorted_for_unordered_video_ids(tmp_path):
+    path = tmp_path / "videos.txt"
+    video_ids = [f"id_{i * 7919 % 1000:03d}" for i in range(1000)]
+    path.write_text("".join(f"Video {i} | {video_id} | #all , #Tag{i % 3}\n"
+                            for i, video_id in enumerate(video_ids)))
+    library = VideoLibrary(path)
+    library.add_video(Video("Added", "id_5000", ["#ALL"]))
+    library.add_video(Video("Added", "id_0000", ["#all"]))
+    _, tag_index = library.snapshot()._search_indexes()
+
+    assert list(tag_index.get("#all")) == sorted(video_ids + [
+        "id_5000", "id_0000"])
+    assert list(tag_index.get("#tag1")) == sorted(video_ids[1::3])
+
+
+def test_iter_videos_is_title_ordered():
+    library = VideoLibrary()
+    library.add_video(Video("Amazing Cats", "a_cats_video_id", []))
+    library.remove_video("funny_dogs_video_id")
+
+    assert [video.video_id for video in library.iter_videos()] == [
+        "a_cats_video_id", "amazing_cats_video_id", "another_cat_video_id",
+        "life_at_google_video_id", "nothing_video_id"]
+    assert len(library) == 5
+
+
+def test_videos_share_tag_strings():
+    library = VideoLibrary()
+    cats = library.get_video("amazing_cats_video_id")
+    other_cats = library.get_video("another_cat_video_id")
+
+    assert not hasattr(cats, "__dict__")
+    assert cats.tags is other_cats.tags
+    assert cats.tags[1] is library.get_video("funny_dogs_video_id").tags[1]
+
+
+def test_get_random_video_skips_flagged_videos():
+    library = VideoLibrary()
+    rng = random.Random(7)
+    for video_id in ("funny_dogs_video_id", "amazing_cats_video_id",
+                     "life_at_google_video_id", "nothing_video_id"):
+        library.flag_video(video_id)
+
+    picks = {library.get_random_video(rng).video_id for _ in range(20)}
+    assert picks == {"another_cat_video_id"}
+
+    library.flag_video("another_cat_video_id", "dont_like_cats")
+    assert library.get_random_video(rng) is None
+    assert library.get_flag_reason("another_cat_video_id") == "dont_like_cats"
+    assert library.get_flag_reason("nothing_video_id") == "Not supplied"
+
+    library.allow_video("nothing_video_id")
+    assert library.get_random_video(rng).video_id == "nothing_video_id"
+
+
+def test_iter_videos_starts_after_a_sort_key():
+    library = VideoLibrary()
+    after = ("Another Cat Video", "another_cat_video_id")
+    library.add_video(Video("Cat Facts", "cat_facts_video_id", ["#cat"]))
+
+    assert [video.video_id for video in library.iter_videos(after)] == [
+        "cat_facts_video_id", "funny_dogs_video_id",
+        "life_at_google_video_id", "nothing_video_id"]
+    assert [video.video_id
+            for video in library.iter_search_titles("cat", after)] == [
+        "cat_facts_video_id"]
+    assert [video.video_id for video in library.iter_search_tag("#CAT")] == [
+        "amazing_cats_video_id", "another_cat_video_id", "cat_facts_video_id"]
+    assert list(library.iter_videos(("Zzz", ""))) == []
+
+
+def test_listing_lines_are_cached_and_follow_flags():
+    library = VideoLibrary()
+    video = library.get_video("amazing_cats_video_id")
+    line = library.format_video(video)
+
+    assert line == "Amazing Cats (amazing_cats_video_id) [#cat #animal]"
+    assert library.format_video(video) is line
+    library.flag_video("amazing_cats_video_id", "dont_like_cats")
+    assert library.format_video(video) == (
+        f"{line} - FLAGGED (reason: dont_like_cats)")
+    library.allow_video("amazing_cats_video_id")
+    assert library.format_video(video) is line
+
+
+def test_reload_applies_only_the_changed_rows(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text("Amazing Cats | cats_id | #cat\n"
+                    "Funny Dogs | dogs_id | #dog\n"
+                    "Nothing | nothing_id |\n")
+    library = VideoLibrary(path)
+    library.flag_video("cats_id", "dont_like_cats")
+    dogs = library.get_video("dogs_id")
+    version = library.catalog_version
+
+    assert not library.reload()
+    path.write_text("Amazing Cats Again | cats_id | #cat , #new\n"
+                    "Funny Dogs | dogs_id | #dog\n"
+                    "Cat Facts | facts_id | #cat\n")
+    diff = library.reload()
+
+    assert (diff.added, diff.removed, diff.changed) == (
+        ["facts_id"], ["nothing_id"], ["cats_id"])
+    assert library.catalog_version == version + 1
+    assert library.get_video("dogs_id") is dogs
+    assert library.get_video("nothing_id") is None
+    assert library.get_flag_reason("cats_id") == "dont_like_cats"
+    assert [video.video_id for video in library.search_tag("#CAT")] == [
+        "cats_id", "facts_id"]
+    assert [video.video_id for video in library.search_titles("again")] == [
+        "cats_id"]
+    assert [video.video_id for video in library.iter_videos()] == [
+        "cats_id", "facts_id", "dogs_id"]
+    assert library.get_random_video(random.Random(0)).video_id in {
+        "dogs_id", "facts_id"}